@@ -0,0 +1,95 @@
+# apps/batch.py
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from hypermill_nctools_html_exporter.batch import collect_html_inputs, export_batch
+from hypermill_nctools_html_exporter.images import DEFAULT_RESAMPLE, RESAMPLE_PRESETS
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="export many NC-Tool HTML files at once")
+    ap.add_argument(
+        "inputs",
+        nargs="+",
+        help="HTML files, directories (searched recursively), globs, or @list.txt (one input per line)",
+    )
+    ap.add_argument("--out", required=True, help="output directory")
+    ap.add_argument("--report", choices=["flat", "f2"], default="flat", help="flat list (main.py) or F2 block report (gui.py)")
+    ap.add_argument("--workers", type=int, default=1, help="export N files in parallel processes")
+    ap.add_argument("--pattern", default="*.html", help="file pattern when an input is a directory")
+    ap.add_argument(
+        "--manifest",
+        default=None,
+        help="manifest path without extension (writes .json and .csv; default: <out>/batch_manifest)",
+    )
+    ap.add_argument("--lang", choices=["ja", "en"], default="ja", help="output language (--report f2)")
+    ap.add_argument("--no-embed", action="store_true", help="do not embed images (light mode)")
+    ap.add_argument("--max-px", type=int, default=320, help="max image size (px) for cache/embed")
+    ap.add_argument("--stream", action="store_true", help="parse div.page one at a time (low memory for huge HTML)")
+    ap.add_argument("--parser", choices=["bs4", "lxml"], default="bs4", help="HTML parser backend")
+    ap.add_argument("--no-cache", action="store_true", help="do not use the parse / thumbnail caches")
+    ap.add_argument(
+        "--png-level",
+        type=int,
+        choices=range(10),
+        default=None,
+        metavar="0-9",
+        help="PNG compression level for thumbnails (default: optimize=True, smallest but slowest)",
+    )
+    ap.add_argument("--resample", choices=list(RESAMPLE_PRESETS), default=DEFAULT_RESAMPLE, help="thumbnail resampling preset")
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse unchanged NC-Tool groups (parse/images) from the previous export in --out",
+    )
+    ap.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="parse, resize and write concurrently (first rows sooner, bounded memory; ignored with --incremental)",
+    )
+    args = ap.parse_args()
+
+    html_paths = collect_html_inputs(args.inputs, pattern=args.pattern)
+    if not html_paths:
+        print("NG: no HTML files found")
+        return 2
+
+    out_dir = Path(args.out)
+    manifest = Path(args.manifest) if args.manifest else out_dir / "batch_manifest"
+
+    kwargs = dict(
+        embed_images=(not args.no_embed),
+        max_px=args.max_px,
+        stream=args.stream,
+        parser_backend=args.parser,
+        use_cache=(not args.no_cache),
+        incremental=args.incremental,
+        png_level=args.png_level,
+        resample=args.resample,
+        pipeline=args.pipeline,
+    )
+    if args.report == "f2":
+        kwargs["out_lang"] = args.lang
+
+    items = export_batch(
+        html_paths,
+        out_dir,
+        report=args.report,
+        workers=args.workers,
+        manifest=[manifest.with_suffix(".json"), manifest.with_suffix(".csv")],
+        progress=lambda done, total, msg: print(f"[{done}/{total}] {msg}"),
+        **kwargs,
+    )
+    failed = [i for i in items if not i.ok]
+    print(f"OK: {len(items) - len(failed)} / {len(items)}  manifest: {manifest.with_suffix('.json')}")
+    for item in failed:
+        print("NG:", item.html, item.error)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import sys
+import multiprocessing
 import threading
 import queue
 from pathlib import Path
@@ -13,7 +14,7 @@ from tkinter import ttk, filedialog, messagebox
 if not getattr(sys, "frozen", False):
     sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from hypermill_nctools_html_exporter.core import export_report_f2_from_html
+from hypermill_nctools_html_exporter.core import export_report_f2_from_html, export_targets
 
 
 def main() -> int:
@@ -51,12 +52,17 @@ def main() -> int:
 
     ttk.Button(frm, text="参照", command=choose_out).grid(row=1, column=2)
 
-    # Output language
-    ttk.Label(frm, text="出力言語").grid(row=2, column=0, sticky="w")
-    lang_var = tk.StringVar(value="日本語")
-    lang_combo = ttk.Combobox(frm, textvariable=lang_var, state="readonly", width=12)
-    lang_combo["values"] = ("日本語", "English")
-    lang_combo.grid(row=2, column=1, sticky="w")
+    # Outputs（複数選ぶと解析・画像縮小は1回で、まとめて出力する）
+    ttk.Label(frm, text="出力").grid(row=2, column=0, sticky="w")
+    outputs_frm = ttk.Frame(frm)
+    outputs_frm.grid(row=2, column=1, sticky="w")
+    output_vars = [
+        ("f2:ja", "F2帳票（日本語）", tk.BooleanVar(value=True)),
+        ("f2:en", "F2帳票（English）", tk.BooleanVar(value=False)),
+        ("flat", "一覧", tk.BooleanVar(value=False)),
+    ]
+    for col, (_spec, text, var) in enumerate(output_vars):
+        ttk.Checkbutton(outputs_frm, text=text, variable=var).grid(row=0, column=col, padx=(0, 12), sticky="w")
 
     # max_px
     ttk.Label(frm, text="画像最大辺(px)").grid(row=3, column=0, sticky="w")
@@ -119,7 +125,10 @@ def main() -> int:
             messagebox.showerror("入力エラー", "画像最大辺(px) は正の整数で指定してください")
             return
 
-        out_lang = "ja" if lang_var.get() == "日本語" else "en"
+        targets = [spec for spec, _text, var in output_vars if var.get()]
+        if not targets:
+            messagebox.showerror("入力エラー", "出力を1つ以上選択してください")
+            return
 
         busy["flag"] = True
         prog["value"] = 0
@@ -130,15 +139,28 @@ def main() -> int:
                 def progress(done, total, msg):
                     q.put(("progress", int(done), int(total), str(msg)))
 
-                out_xlsx, _summary = export_report_f2_from_html(
+                if len(targets) == 1 and targets[0].startswith("f2:"):
+                    # F2 1つだけなら従来どおり（ファイル名も言語によらず同じ）
+                    out_xlsx, _summary = export_report_f2_from_html(
+                        html_path=html_path,
+                        out_dir=out_dir,
+                        embed_images=True,   # GUIでは埋め込み固定
+                        max_px=max_px,       # GUI入力を反映
+                        progress=progress,
+                        out_lang=targets[0].split(":")[1],
+                    )
+                    q.put(("done", 1, 1, f"F2帳票を出力しました:\n{out_xlsx}"))
+                    return
+
+                out_paths, _summary = export_targets(
                     html_path=html_path,
                     out_dir=out_dir,
-                    embed_images=True,   # GUIでは埋め込み固定
-                    max_px=max_px,       # GUI入力を反映
+                    targets=targets,
+                    embed_images=True,
+                    max_px=max_px,
                     progress=progress,
-                    out_lang=out_lang,
                 )
-                q.put(("done", 1, 1, f"F2帳票を出力しました:\n{out_xlsx}"))
+                q.put(("done", 1, 1, "出力しました:\n" + "\n".join(str(p) for p in out_paths)))
             except Exception as e:
                 q.put(("error", 0, 1, str(e)))
 
@@ -153,4 +175,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    # exe化したときにプロセスプール（並列解析）の子プロセスがGUIを再起動しないように
+    multiprocessing.freeze_support()
     raise SystemExit(main())
\ No newline at end of file
@@ -1,9 +1,12 @@
 ﻿from __future__ import annotations
 
 import argparse
+import multiprocessing
 from pathlib import Path
 
 from hypermill_nctools_html_exporter import export_from_html
+from hypermill_nctools_html_exporter.core import ExportTarget, export_targets
+from hypermill_nctools_html_exporter.images import DEFAULT_RESAMPLE, RESAMPLE_PRESETS
 
 
 def main() -> int:
@@ -12,21 +15,89 @@ def main() -> int:
     ap.add_argument("--out", required=True, help="output directory")
     ap.add_argument("--no-embed", action="store_true", help="do not embed images (light mode)")
     ap.add_argument("--max-px", type=int, default=320, help="max image size (px) for cache/embed")
+    ap.add_argument("--stream", action="store_true", help="parse div.page one at a time (low memory for huge HTML)")
+    ap.add_argument("--parser", choices=["bs4", "lxml"], default="bs4", help="HTML parser backend")
+    ap.add_argument("--no-cache", action="store_true", help="do not use the parse / thumbnail caches")
+    ap.add_argument("--parse-workers", type=int, default=1, help="parse one HTML in N processes")
+    ap.add_argument("--image-workers", type=int, default=1, help="resize images with N workers")
+    ap.add_argument(
+        "--image-executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="worker type for --image-workers",
+    )
+    ap.add_argument(
+        "--png-level",
+        type=int,
+        choices=range(10),
+        default=None,
+        metavar="0-9",
+        help="PNG compression level for thumbnails (default: optimize=True, smallest but slowest)",
+    )
+    ap.add_argument(
+        "--resample",
+        choices=list(RESAMPLE_PRESETS),
+        default=DEFAULT_RESAMPLE,
+        help="thumbnail resampling preset (fast/balanced use JPEG draft decoding and integer reduce; best = full-size LANCZOS)",
+    )
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse unchanged NC-Tool groups (parse/images) from the previous export in --out",
+    )
+    ap.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="parse, resize and write concurrently (first rows sooner, bounded memory; ignored with --incremental / --target)",
+    )
+    ap.add_argument(
+        "--target",
+        action="append",
+        default=None,
+        metavar="SPEC",
+        help=(
+            "write several outputs from one parse / image pass (repeatable): "
+            "flat or f2[:ja|en][:3row|2row|4row][:openpyxl|raw][:MAX_PX], e.g. --target flat --target f2:en:2row"
+        ),
+    )
+    ap.add_argument("--writers", type=int, default=1, help="write the --target outputs in N threads")
     args = ap.parse_args()
 
     html_path = Path(args.html)
     out_dir = Path(args.out)
-
-    out_xlsx, summary = export_from_html(
-        html_path=html_path,
-        out_dir=out_dir,
+    kwargs = dict(
         embed_images=(not args.no_embed),
         max_px=args.max_px,
+        stream=args.stream,
+        parser_backend=args.parser,
+        use_cache=(not args.no_cache),
+        incremental=args.incremental,
+        parse_workers=args.parse_workers,
+        image_workers=args.image_workers,
+        image_executor=args.image_executor,
+        png_level=args.png_level,
+        resample=args.resample,
     )
+
+    if args.target:
+        try:
+            targets = [ExportTarget.parse(spec) for spec in args.target]
+        except ValueError as e:
+            ap.error(str(e))
+        out_paths, summary = export_targets(
+            html_path=html_path, out_dir=out_dir, targets=targets, writers=args.writers, **kwargs
+        )
+        for out_xlsx in out_paths:
+            print("OK:", out_xlsx)
+        print(summary)
+        return 0
+
+    out_xlsx, summary = export_from_html(html_path=html_path, out_dir=out_dir, pipeline=args.pipeline, **kwargs)
     print("OK:", out_xlsx)
     print(summary)
     return 0
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     raise SystemExit(main())
@@ -0,0 +1,73 @@
+# apps/serve.py
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+
+from hypermill_nctools_html_exporter.images import DEFAULT_RESAMPLE, RESAMPLE_PRESETS
+from hypermill_nctools_html_exporter.service import (
+    DEFAULT_MAX_UNPACKED_MB,
+    DEFAULT_MAX_UPLOAD_MB,
+    DEFAULT_PORT,
+    ExportService,
+    make_server,
+)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="local HTTP export service (POST /export, GET /metrics)")
+    ap.add_argument("--host", default="127.0.0.1", help="loopback address to listen on")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="port (0 = any free port)")
+    ap.add_argument("--workers", type=int, default=1, help="pre-started export worker processes")
+    ap.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_MB, help="reject larger uploads (413)")
+    ap.add_argument(
+        "--max-unpacked-mb",
+        type=int,
+        default=DEFAULT_MAX_UNPACKED_MB,
+        help="reject zips whose contents are larger than this when extracted (413)",
+    )
+    ap.add_argument("--max-px", type=int, default=320, help="default max image size (px); ?max_px= overrides")
+    ap.add_argument("--parser", choices=["bs4", "lxml"], default="bs4", help="HTML parser backend")
+    ap.add_argument("--no-cache", action="store_true", help="do not use the parse / thumbnail caches")
+    ap.add_argument(
+        "--png-level",
+        type=int,
+        choices=range(10),
+        default=None,
+        metavar="0-9",
+        help="default PNG compression level for thumbnails; ?png_level= overrides",
+    )
+    ap.add_argument("--resample", choices=list(RESAMPLE_PRESETS), default=DEFAULT_RESAMPLE, help="default thumbnail resampling preset")
+    ap.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = ap.parse_args()
+
+    service = ExportService(
+        workers=args.workers,
+        max_upload_mb=args.max_upload_mb,
+        max_unpacked_mb=args.max_unpacked_mb,
+        verbose=not args.quiet,
+        max_px=args.max_px,
+        parser_backend=args.parser,
+        use_cache=(not args.no_cache),
+        png_level=args.png_level,
+        resample=args.resample,
+    )
+    try:
+        server = make_server(service, args.host, args.port)
+    except ValueError as e:
+        ap.error(str(e))
+
+    with service, server:
+        host, port = server.server_address[:2]
+        print(f"warm pool ready ({service.workers} workers, {service.metrics.warmup_seconds}s)")
+        print(f"listening on http://{host}:{port}  (POST /export, GET /metrics, Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("stopping...")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
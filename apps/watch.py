@@ -0,0 +1,78 @@
+# apps/watch.py
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from hypermill_nctools_html_exporter.images import DEFAULT_RESAMPLE, RESAMPLE_PRESETS
+from hypermill_nctools_html_exporter.watch import WatchFolder
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="watch a folder and export new / changed NC-Tool HTML files")
+    ap.add_argument("watch_dir", help="folder hyperMILL writes NC-Tool HTML (and its img folder) into")
+    ap.add_argument("--out", required=True, help="output directory")
+    ap.add_argument("--report", choices=["flat", "f2"], default="flat", help="flat list (main.py) or F2 block report (gui.py)")
+    ap.add_argument("--workers", type=int, default=1, help="export up to N files at once (N>=2: process pool)")
+    ap.add_argument("--pattern", default="*.html", help="HTML file pattern (searched recursively)")
+    ap.add_argument("--interval", type=float, default=1.0, help="seconds between folder scans")
+    ap.add_argument("--settle", type=float, default=2.0, help="export once HTML and images are unchanged for this many seconds")
+    ap.add_argument("--status", default=None, help="status file path (default: <out>/watch_status.json)")
+    ap.add_argument("--lang", choices=["ja", "en"], default="ja", help="output language (--report f2)")
+    ap.add_argument("--no-embed", action="store_true", help="do not embed images (light mode)")
+    ap.add_argument("--max-px", type=int, default=320, help="max image size (px) for cache/embed")
+    ap.add_argument("--parser", choices=["bs4", "lxml"], default="bs4", help="HTML parser backend")
+    ap.add_argument("--no-cache", action="store_true", help="do not use the parse / thumbnail caches")
+    ap.add_argument(
+        "--png-level",
+        type=int,
+        choices=range(10),
+        default=None,
+        metavar="0-9",
+        help="PNG compression level for thumbnails (default: optimize=True, smallest but slowest)",
+    )
+    ap.add_argument("--resample", choices=list(RESAMPLE_PRESETS), default=DEFAULT_RESAMPLE, help="thumbnail resampling preset")
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse unchanged NC-Tool groups (parse/images) from the previous export of the same HTML",
+    )
+    args = ap.parse_args()
+
+    kwargs = dict(
+        embed_images=(not args.no_embed),
+        max_px=args.max_px,
+        parser_backend=args.parser,
+        use_cache=(not args.no_cache),
+        incremental=args.incremental,
+        png_level=args.png_level,
+        resample=args.resample,
+    )
+    if args.report == "f2":
+        kwargs["out_lang"] = args.lang
+
+    watcher = WatchFolder(
+        Path(args.watch_dir),
+        Path(args.out),
+        report=args.report,
+        pattern=args.pattern,
+        settle=args.settle,
+        workers=args.workers,
+        status_path=Path(args.status) if args.status else None,
+        progress=lambda done, total, msg: print(f"[{done}/{total}] {msg}", flush=True),
+        **kwargs,
+    )
+    print(f"watching {watcher.watch_dir} -> {watcher.out_dir} (Ctrl+C to stop)  status: {watcher.status_path}")
+    with watcher:
+        try:
+            watcher.run(interval=args.interval)
+        except KeyboardInterrupt:
+            print("stopping (waiting for running exports)...")
+    print(f"done: {watcher.done}  failed: {watcher.failed}  skipped: {watcher.skipped}")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
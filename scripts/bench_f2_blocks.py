@@ -0,0 +1,74 @@
+# scripts/bench_f2_blocks.py
+"""
+F2帳票（3行ブロック）の書き込みコストを、1ブロック（1レコード）あたりの時間で測るベンチマーク。
+画像は埋め込まない（セル・書式・罫線・保存だけを測る）。
+
+使い方（リポジトリ直下で）:
+  python scripts/bench_f2_blocks.py
+  python scripts/bench_f2_blocks.py --blocks 5000 --repeat 3
+  python scripts/bench_f2_blocks.py --blocks 50000 --backend raw
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from hypermill_nctools_html_exporter.export_xlsx_blocks import export_blocks_f2_xlsx  # noqa: E402
+from hypermill_nctools_html_exporter.model import NcToolRecord, RecordTable  # noqa: E402
+
+
+def make_records(n: int) -> RecordTable:
+    return RecordTable.from_records([
+        NcToolRecord(
+            nctool_no=i,
+            nctool_name=f"T{i:05d}-D{i % 20 + 1}",
+            holder_name=f"[HSK63A]_H{i % 50}",
+            tool_name=f"TOOL-{i}",
+            tool_diameter_mm=str(i % 20 + 1),
+            tool_flutes=str(i % 6 + 1),
+            ext_overhang_mm="0",
+            tool_overhang_mm="45",
+            overhang_mm="120",
+        )
+        for i in range(1, n + 1)
+    ])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--blocks", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--backend", choices=["openpyxl", "raw"], default="openpyxl")
+    ap.add_argument("--layout", choices=["3row", "2row", "4row"], default="3row")
+    args = ap.parse_args()
+
+    records = make_records(args.blocks)
+    best = float("inf")
+    with tempfile.TemporaryDirectory() as td:
+        out = Path(td) / "f2.xlsx"
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            export_blocks_f2_xlsx(records, out, embed_images=False, backend=args.backend, layout=args.layout)
+            best = min(best, time.perf_counter() - t0)
+
+        # 書き込み中に増えたメモリのピーク（レコード自体は含まない）
+        tracemalloc.start()
+        export_blocks_f2_xlsx(records, out, embed_images=False, backend=args.backend, layout=args.layout)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(
+        f"backend={args.backend} layout={args.layout} blocks={args.blocks} total={best:.3f}s "
+        f"per_block={best / args.blocks * 1e6:.0f}us peak={peak / 1e6:.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# scripts/bench_nested_tables.py
+"""
+入れ子の深い合成HTMLで parse_nctools_html の解析時間を測るベンチマーク。
+
+  - page-depth : NCツールページを何段入れ子にするか（後続のNCツールページが前のページの内側に入る）
+  - table-depth: KV表のセル内に何段 table を入れ子にするか
+
+各ページの table/行/セルを1回ずつしか辿らなければ、ツール数やどちらの深さを増やしても
+「入力1KBあたりの時間」はほぼ一定（=全体は線形）になる。
+
+使い方（リポジトリ直下で）:
+  python scripts/bench_nested_tables.py
+  python scripts/bench_nested_tables.py --backend lxml --tools 2000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from hypermill_nctools_html_exporter.parse_html import parse_nctools_html  # noqa: E402
+
+
+def _nested_table(depth: int, text: str) -> str:
+    inner = text
+    for _ in range(depth):
+        inner = f"<table><tbody><tr><td>{inner}</td><td>-</td></tr></tbody></table>"
+    return inner
+
+
+def _tool_group(i: int, table_depth: int) -> str:
+    """
+    1 NCツール分（閉じタグ </div> は呼び出し側で付ける）。
+    """
+    return (
+        f'<div class="page"><h3>NC-Tool:T{i} ({i})</h3>'
+        '<table width="100%"><tr><td>'
+        "<table><tbody>"
+        f"<tr><td>NC-Tool comment</td><td>c{i}</td></tr>"
+        f"<tr><td>Cutter material</td><td>{_nested_table(table_depth, 'x')}</td></tr>"
+        "</tbody></table>"
+        '<table border="1"><tbody>'
+        "<tr><td>Coupling type</td><td>Name</td><td>Reach</td></tr>"
+        f"<tr><td>holder</td><td>H{i}</td><td>50</td></tr>"
+        f"<tr><td>tool</td><td>T{i}</td><td>30</td></tr>"
+        "</tbody></table>"
+        f'</td><td><img src="img\\t{i}.png"/></td></tr></table>'
+        f'<div class="page"><h3>Tool: T{i} (endMill)</h3>'
+        f"<table><tbody><tr><td>Diameter</td><td>{i % 20 + 1}</td></tr></tbody></table>"
+        '<table border="1"><tbody><tr><td>S (n)</td></tr><tr><td>1000</td></tr></tbody></table></div>'
+        f'<div class="page"><h3>Holder: H{i}</h3>'
+        "<table><tbody><tr><td>Holder comment</td><td>h</td></tr></tbody></table></div>"
+    )
+
+
+def make_html(n_tools: int, page_depth: int, table_depth: int) -> str:
+    parts = ['<html><body><div><h2>NC Tools</h2>']
+    open_pages = 0
+    for i in range(1, n_tools + 1):
+        if open_pages >= page_depth:
+            parts.append("</div>" * open_pages)
+            open_pages = 0
+        parts.append(_tool_group(i, table_depth))
+        open_pages += 1
+    parts.append("</div>" * open_pages)
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def _bench(path: Path, backend: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        records, _errors = parse_nctools_html(path, backend=backend)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", choices=["bs4", "lxml", "all"], default="all")
+    ap.add_argument("--tools", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    backends = ["bs4", "lxml"] if args.backend == "all" else [args.backend]
+    cases = [
+        # (tools, page_depth, table_depth)
+        (args.tools, 1, 0),
+        (args.tools * 2, 1, 0),
+        (args.tools, 50, 0),
+        (args.tools, args.tools, 0),
+        (args.tools, 1, 20),
+        (args.tools, 1, 80),
+    ]
+
+    print(f"{'backend':7} {'tools':>6} {'page_d':>6} {'table_d':>7} {'KB':>7} {'sec':>8} {'us/KB':>7}")
+    with tempfile.TemporaryDirectory() as td:
+        for tools, page_depth, table_depth in cases:
+            path = Path(td) / f"bench_{tools}_{page_depth}_{table_depth}.html"
+            path.write_text(make_html(tools, page_depth, table_depth), encoding="utf-8")
+            kb = path.stat().st_size / 1024
+            for backend in backends:
+                sec = _bench(path, backend, args.repeat)
+                print(
+                    f"{backend:7} {tools:>6} {page_depth:>6} {table_depth:>7} "
+                    f"{kb:>7.0f} {sec:>8.3f} {sec / kb * 1e6:>7.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
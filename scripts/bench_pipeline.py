@@ -0,0 +1,100 @@
+# scripts/bench_pipeline.py
+"""
+段階実行（解析 → 画像縮小 → 書き込み）とパイプライン実行（pipeline=True）の比較ベンチマーク。
+最初の行を書き始めるまでの時間・全体の時間・メモリのピークを測る。
+
+同梱サンプルの NCツールページを --repeat 回並べた大きい HTML を作り、
+HTML が参照する画像は合成画像で用意する（画像の種類数はサンプルと同じ）。
+
+使い方（リポジトリ直下で）:
+  python scripts/bench_pipeline.py
+  python scripts/bench_pipeline.py --repeat 200 --report f2 --image-workers 2
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from PIL import Image  # noqa: E402
+
+from hypermill_nctools_html_exporter.core import export_from_html, export_report_f2_from_html  # noqa: E402
+
+_RE_IMG_SRC = re.compile(r'<img\b[^>]*\bsrc="([^"]+)"', re.IGNORECASE)
+
+
+def make_job(directory: Path, sample: Path, repeat: int) -> Path:
+    """
+    sample の div.page 部分を repeat 回並べた HTML と、参照画像（合成）を作る。
+    """
+    text = sample.read_text(encoding="utf-8")
+    start = text.index('<div class="page"')
+    end = text.rindex("</body>")
+    html_path = directory / f"bench_x{repeat}.html"
+    html_path.write_text(text[:start] + text[start:end] * repeat + text[end:], encoding="utf-8")
+
+    grad = Image.linear_gradient("L").resize((1200, 900))
+    for k, src in enumerate(sorted(set(_RE_IMG_SRC.findall(text)))):
+        p = directory / src.replace("\\", "/")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        Image.merge("RGB", (grad, grad.rotate(90 * (k % 4)), grad)).save(p)
+    return html_path
+
+
+def run(html_path: Path, out_dir: Path, *, report: str, pipeline: bool, image_workers: int) -> dict:
+    fn = export_report_f2_from_html if report == "f2" else export_from_html
+    kwargs = {"f2_backend": "raw"} if report == "f2" else {}
+
+    marks = {}
+    t0 = time.perf_counter()
+
+    def progress(done: int, total: int, msg: str) -> None:
+        # 段階実行は「XLSXを書き込み中」が最初の行を書き始める時点
+        if "書き込み" in msg and "write" not in marks:
+            marks["write"] = time.perf_counter() - t0
+
+    tracemalloc.start()
+    _out, summary = fn(
+        html_path,
+        out_dir,
+        use_cache=False,
+        image_workers=image_workers,
+        pipeline=pipeline,
+        progress=progress,
+        **kwargs,
+    )
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    total = time.perf_counter() - t0
+
+    first = summary.get("first_row_seconds") if pipeline else marks.get("write")
+    return {"records": summary["records"], "first_row": first, "total": total, "peak_mb": peak / 1e6}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sample", default=str(next((ROOT / "html").glob("NCツール_DD0600*/*.html"))))
+    ap.add_argument("--repeat", type=int, default=50, help="how many times to repeat the sample's pages")
+    ap.add_argument("--report", choices=["flat", "f2"], default="flat")
+    ap.add_argument("--image-workers", type=int, default=1)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        html_path = make_job(Path(td), Path(args.sample), args.repeat)
+        for pipeline in (False, True):
+            r = run(html_path, Path(td) / "out", report=args.report, pipeline=pipeline, image_workers=args.image_workers)
+            print(
+                f"{'pipeline' if pipeline else 'phased  '} records={r['records']} "
+                f"first_row={r['first_row']:.3f}s total={r['total']:.3f}s peak={r['peak_mb']:.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
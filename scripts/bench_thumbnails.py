@@ -0,0 +1,95 @@
+# scripts/bench_thumbnails.py
+"""
+縮小方式のプリセット（fast / balanced / best）ごとに、サムネイル作成の時間と出力サイズを測るベンチマーク。
+
+  - --images: 画像フォルダ（html/<ジョブ>/img など）。省略時は合成画像
+              （大きい JPEG / アルファ無し PNG / アルファ付き PNG / max_px 以内の PNG）で測る
+
+使い方（リポジトリ直下で）:
+  python scripts/bench_thumbnails.py
+  python scripts/bench_thumbnails.py --images "html/<ジョブ>/img" --max-px 320 --png-level 6
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from PIL import Image  # noqa: E402
+
+from hypermill_nctools_html_exporter.images import RESAMPLE_PRESETS, render_thumbnail_png  # noqa: E402
+
+_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".gif"}
+
+
+def make_images(directory: Path) -> List[Path]:
+    """
+    ベンチ用の合成画像（グラデーション）を作る。
+    """
+    grad = Image.linear_gradient("L").resize((2400, 1800))
+    rgb = Image.merge("RGB", (grad, grad.rotate(90, expand=False), grad.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    rgba = rgb.copy()
+    rgba.putalpha(grad)
+
+    images = {
+        "large.jpg": rgb,
+        "large_rgb.png": rgb,
+        "large_rgba.png": rgba,
+        "small.png": rgb.resize((300, 225)),
+    }
+    out = []
+    for name, im in images.items():
+        p = directory / name
+        if p.suffix == ".jpg":
+            im.save(p, quality=90)
+        else:
+            im.save(p)
+        out.append(p)
+    return out
+
+
+def _bench(paths: List[Path], preset: str, max_px: int, png_level: Optional[int], repeat: int):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = sum(len(render_thumbnail_png(p, max_px=max_px, png_level=png_level, preset=preset)) for p in paths)
+        best = min(best, time.perf_counter() - t0)
+    return best, size
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", default=None, help="image directory (default: synthesized images)")
+    ap.add_argument("--max-px", type=int, default=320)
+    ap.add_argument("--png-level", type=int, choices=range(10), default=None, metavar="0-9")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        if args.images:
+            paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in _EXTS)
+        else:
+            paths = make_images(Path(td))
+        if not paths:
+            raise SystemExit(f"no images: {args.images}")
+
+        print(f"{len(paths)} images, max_px={args.max_px}, png_level={args.png_level}")
+        print(f"{'preset':9} {'file':24} {'ms':>8} {'KB':>8}")
+        for preset in RESAMPLE_PRESETS:
+            rows = [(p.name, *_bench([p], preset, args.max_px, args.png_level, args.repeat)) for p in paths]
+            if len(paths) > 8:
+                # フォルダ指定で枚数が多いときは合計だけ
+                rows = [("(total)", sum(r[1] for r in rows), sum(r[2] for r in rows))]
+            for name, sec, size in rows:
+                print(f"{preset:9} {name[:24]:24} {sec * 1000:>8.1f} {size / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
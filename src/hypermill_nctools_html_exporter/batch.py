@@ -0,0 +1,216 @@
+# src/hypermill_nctools_html_exporter/batch.py
+"""
+複数HTMLの一括出力。
+  - collect_html_inputs: フォルダ / glob / ファイル一覧（@list.txt）から入力HTMLを集める
+  - export_batch       : export_from_html / export_report_f2_from_html をファイル単位でプロセス並列に実行し、
+                         失敗はそのファイルだけに閉じ込めて、最後にマニフェスト（JSON / CSV）を書く
+"""
+from __future__ import annotations
+
+import csv
+import glob
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Sequence, Union
+
+from .core import export_from_html, export_report_f2_from_html
+from .util import atomic_write_bytes, sanitize_filename
+
+
+ProgressCb = Callable[[int, int, str], None]  # (done, total, message)
+BatchReport = Literal["flat", "f2"]  # flat = export_from_html / f2 = export_report_f2_from_html
+
+_GLOB_CHARS = set("*?[")
+
+
+@dataclass
+class BatchItem:
+    """
+    マニフェストの1行（入力HTML 1つ分）。
+    """
+    html: str
+    report: str
+    ok: bool = False
+    out_xlsx: str = ""
+    seconds: float = 0.0
+    records: int = 0
+    errors: int = 0  # 解析エラー件数（errors シート / summary["errors"]）
+    embedded_images: int = 0
+    error: str = ""  # 失敗時の例外（"型: メッセージ"）
+
+
+def _read_file_list(path: Path) -> List[str]:
+    # 1行1入力。空行と # で始まる行は無視。相対パスはリストファイルの場所から解決する
+    items = []
+    for line in path.read_text(encoding="utf-8-sig").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            p = Path(line).expanduser()
+            items.append(str(p if p.is_absolute() else path.parent / p))
+    return items
+
+
+def collect_html_inputs(inputs: Iterable[Union[str, Path]], *, pattern: str = "*.html") -> List[Path]:
+    """
+    入力指定を HTML ファイルの並びに展開する（重複は最初の1つだけ、順序は指定順）。
+      - フォルダ      : 配下（サブフォルダ含む）の pattern に一致するファイル
+      - glob          : "out/**/*.html" など（** は再帰）
+      - "@list.txt"   : 1行1入力のリストファイル（行はフォルダ / glob / ファイルのどれでもよい）
+      - それ以外      : そのままファイルとして扱う（存在しなければ実行時にそのファイルだけ失敗する）
+    """
+    found: List[Path] = []
+    seen = set()
+
+    def add(p: Path) -> None:
+        key = str(p.expanduser().resolve())
+        if key not in seen:
+            seen.add(key)
+            found.append(Path(key))
+
+    for item in inputs:
+        text = str(item)
+        if text.startswith("@"):
+            for p in collect_html_inputs(_read_file_list(Path(text[1:]).expanduser()), pattern=pattern):
+                add(p)
+            continue
+        path = Path(text).expanduser()
+        if path.is_dir():
+            for p in sorted(path.rglob(pattern)):
+                if p.is_file():
+                    add(p)
+        elif _GLOB_CHARS & set(text):
+            for p in sorted(glob.glob(str(path), recursive=True)):
+                if Path(p).is_file():
+                    add(Path(p))
+        else:
+            add(path)
+    return found
+
+
+def _out_dirs(html_paths: Sequence[Path], out_dir: Path) -> List[Path]:
+    """
+    各HTMLの出力先フォルダ（exporter はこの下に <HTML名>/ を作る）。
+    HTML名が重複する入力同士は、並列実行で同じファイルに書かないよう親フォルダ名（さらに重複なら連番）で分ける。
+    """
+    stems: Dict[str, int] = {}
+    for p in html_paths:
+        key = sanitize_filename(p.stem).lower()
+        stems[key] = stems.get(key, 0) + 1
+
+    used = set()
+    dirs = []
+    for p in html_paths:
+        if stems[sanitize_filename(p.stem).lower()] == 1:
+            dirs.append(out_dir)
+            continue
+        sub = sanitize_filename(p.parent.name)
+        n = 2
+        name = sub
+        while (name.lower(), p.stem.lower()) in used:
+            name = f"{sub}_{n}"
+            n += 1
+        used.add((name.lower(), p.stem.lower()))
+        dirs.append(out_dir / name)
+    return dirs
+
+
+def _batch_job(report: BatchReport, html_path: Path, out_dir: Path, kwargs: Dict[str, Any]) -> BatchItem:
+    """
+    1ファイル分の出力（プロセスプールにも渡せるようにトップレベル関数）。例外は BatchItem.error に入れて返す。
+    """
+    item = BatchItem(html=str(html_path), report=report)
+    t0 = time.perf_counter()
+    try:
+        if report == "f2":
+            out_xlsx, summary = export_report_f2_from_html(html_path, out_dir, **kwargs)
+        else:
+            out_xlsx, summary = export_from_html(html_path, out_dir, **kwargs)
+        item.ok = True
+        item.out_xlsx = str(out_xlsx)
+        item.records = int(summary.get("records", 0))
+        item.errors = int(summary.get("errors", 0))
+        item.embedded_images = int(summary.get("embedded_images", 0))
+    except Exception as e:
+        item.error = f"{type(e).__name__}: {e}"
+    item.seconds = round(time.perf_counter() - t0, 3)
+    return item
+
+
+def write_manifest(items: Sequence[BatchItem], path: Path) -> Path:
+    """
+    マニフェストを書く。拡張子 .csv なら CSV（Excel で開けるよう UTF-8 BOM 付き）、それ以外は JSON。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".csv":
+        buf = io.StringIO()
+        w = csv.DictWriter(buf, fieldnames=[f.name for f in fields(BatchItem)], lineterminator="\n")
+        w.writeheader()
+        for item in items:
+            w.writerow(asdict(item))
+        atomic_write_bytes(path, buf.getvalue().encode("utf-8-sig"))
+    else:
+        payload = {
+            "files": len(items),
+            "ok": sum(1 for i in items if i.ok),
+            "failed": sum(1 for i in items if not i.ok),
+            "items": [asdict(i) for i in items],
+        }
+        atomic_write_bytes(path, json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
+    return path
+
+
+def export_batch(
+    html_paths: Sequence[Path],
+    out_dir: Path,
+    *,
+    report: BatchReport = "flat",
+    workers: int = 1,
+    manifest: Sequence[Path] = (),
+    progress: Optional[ProgressCb] = None,
+    **export_kwargs: Any,
+) -> List[BatchItem]:
+    """
+    html_paths を1ファイルずつ出力し、入力順の BatchItem を返す。
+    workers>=2 ならファイル単位でプロセス並列に行う（1ファイルの失敗は他に影響しない）。
+    export_kwargs はそのまま export_from_html / export_report_f2_from_html に渡す（progress 以外）。
+    manifest: 書き出すマニフェストのパス（.json / .csv、複数可）
+    progress(完了数, 全体数, メッセージ) は1ファイル終わるごとに呼ぶ（完了順）。
+    """
+    if report not in ("flat", "f2"):
+        raise ValueError(f"unknown batch report: {report!r}")
+    out_dir = out_dir.expanduser().resolve()
+    dirs = _out_dirs(html_paths, out_dir)
+    total = len(html_paths)
+    items: List[Optional[BatchItem]] = [None] * total
+
+    def done(k: int, n: int) -> None:
+        if progress:
+            item = items[k]
+            progress(n, total, f"{'OK' if item.ok else 'NG'}: {Path(item.html).name}")
+
+    if workers <= 1 or total <= 1:
+        for k, (p, d) in enumerate(zip(html_paths, dirs)):
+            items[k] = _batch_job(report, p, d, export_kwargs)
+            done(k, k + 1)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, total)) as pool:
+            futures = {
+                pool.submit(_batch_job, report, p, d, export_kwargs): k
+                for k, (p, d) in enumerate(zip(html_paths, dirs))
+            }
+            for n, fut in enumerate(as_completed(futures), start=1):
+                k = futures[fut]
+                try:
+                    items[k] = fut.result()
+                except Exception as e:  # ワーカープロセスごと落ちた場合（BrokenProcessPool など）
+                    items[k] = BatchItem(html=str(html_paths[k]), report=report, error=f"{type(e).__name__}: {e}")
+                done(k, n)
+
+    result: List[BatchItem] = items  # type: ignore[assignment]
+    for path in manifest:
+        write_manifest(result, Path(path))
+    return result
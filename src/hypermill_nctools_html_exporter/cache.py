@@ -0,0 +1,266 @@
+# src/hypermill_nctools_html_exporter/cache.py
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import sys
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .images import make_thumbnail_png, thumbnail_tag, ResamplePreset, DEFAULT_RESAMPLE
+from .model import NcToolRecord, RECORD_FIELDS as _RECORD_FIELDS
+from .parse_html import parse_nctools_html, ParserBackend, PARSER_VERSION
+from .util import atomic_write_bytes
+
+
+APP_DIR_NAME = "hypermill-nctools-html-exporter"
+
+# 環境変数でキャッシュ置き場を上書きできる
+ENV_CACHE_DIR = "HMNC_CACHE_DIR"
+
+# 縮小画像キャッシュの容量上限（MB）も環境変数で変えられる
+ENV_THUMB_CACHE_MAX_MB = "HMNC_THUMB_CACHE_MAX_MB"
+
+DEFAULT_PARSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_THUMB_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def default_cache_dir() -> Path:
+    """
+    ユーザー単位のキャッシュフォルダ。
+      - 環境変数 HMNC_CACHE_DIR があればそれを使う
+      - Windows: %LOCALAPPDATA%\\hypermill-nctools-html-exporter\\cache
+      - それ以外: $XDG_CACHE_HOME (既定 ~/.cache)/hypermill-nctools-html-exporter
+    """
+    env = os.environ.get(ENV_CACHE_DIR)
+    if env:
+        return Path(env).expanduser()
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(base) / APP_DIR_NAME / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / APP_DIR_NAME
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DiskLRU:
+    """
+    1エントリ=1ファイルの簡易ディスクキャッシュ。
+    ヒット時に mtime を更新し、容量超過時は mtime の古い順に削除する（LRU）。
+    """
+
+    suffix = ".bin"
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def read(self, key: str) -> Optional[bytes]:
+        p = self.path_for(key)
+        try:
+            data = p.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(p, None)
+        except OSError:
+            pass
+        return data
+
+    def write(self, key: str, data: bytes, *, evict: bool = True) -> None:
+        """
+        evict=False なら容量チェックを省く（まとめて書く場合は最後に evict() を1回呼ぶ）。
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.path_for(key), data)
+        if evict:
+            self.evict()
+
+    def discard(self, key: str) -> None:
+        try:
+            self.path_for(key).unlink()
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        try:
+            it = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for e in it:
+            if not e.name.endswith(self.suffix):
+                continue
+            try:
+                st = e.stat()
+            except OSError:
+                continue  # 他プロセスが削除済み
+            entries.append((st.st_mtime, st.st_size, e.path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class ParseCache(DiskLRU):
+    """
+    parse_nctools_html の結果キャッシュ。
+    キー: HTMLバイト列の SHA-256 + PARSER_VERSION
+    値  : (フィールド名, レコードのフィールド値タプル列, errors) を pickle + zlib 圧縮
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: int = DEFAULT_PARSE_CACHE_MAX_BYTES,
+    ) -> None:
+        super().__init__(directory or (default_cache_dir() / "parse"), max_bytes)
+
+    @staticmethod
+    def key_for(html_sha256: str) -> str:
+        return f"{html_sha256}-p{PARSER_VERSION}"
+
+    def load(self, key: str, html_path: Path) -> Optional[Tuple[List[NcToolRecord], List[str]]]:
+        data = self.read(key)
+        if data is None:
+            return None
+        try:
+            names, rows, errors = pickle.loads(zlib.decompress(data))
+        except Exception:
+            self.discard(key)  # 壊れたエントリは捨てる
+            return None
+        if tuple(names) != _RECORD_FIELDS:
+            return None  # モデル変更後の古いエントリ
+
+        records = [NcToolRecord(*row) for row in rows]
+        for rec in records:
+            rec.source_html_path = str(html_path)
+        return records, list(errors)
+
+    def store(self, key: str, records: List[NcToolRecord], errors: List[str]) -> None:
+        rows = [tuple(getattr(rec, name) for name in _RECORD_FIELDS) for rec in records]
+        payload = (_RECORD_FIELDS, rows, list(errors))
+        self.write(key, zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+def parse_nctools_html_cached(
+    html_path: Path,
+    *,
+    cache: Optional[ParseCache] = None,
+    stream: bool = False,
+    backend: ParserBackend = "bs4",
+    workers: int = 1,
+) -> Tuple[List[NcToolRecord], List[str], bool]:
+    """
+    解析キャッシュ付きの parse_nctools_html。
+    戻り: (records, errors, cache_hit)
+    キャッシュの読み書きに失敗しても解析自体は続行する。
+    """
+    cache = cache or ParseCache()
+    key = ParseCache.key_for(file_sha256(html_path))
+
+    hit = cache.load(key, html_path)
+    if hit is not None:
+        records, errors = hit
+        return records, errors, True
+
+    records, errors = parse_nctools_html(html_path, stream=stream, backend=backend, workers=workers)
+    try:
+        cache.store(key, records, errors)
+    except OSError:
+        pass
+    return records, errors, False
+
+
+def _thumb_cache_max_bytes() -> int:
+    env = os.environ.get(ENV_THUMB_CACHE_MAX_MB)
+    if env:
+        try:
+            return int(float(env) * 1024 * 1024)
+        except ValueError:
+            pass
+    return DEFAULT_THUMB_CACHE_MAX_BYTES
+
+
+class ThumbnailCache(DiskLRU):
+    """
+    縮小済みPNGのキャッシュ（ジョブをまたいで同じ工具画像を使い回す）。
+    キー: 元画像バイト列の SHA-256 + max_px + 縮小方式 + PNG圧縮設定
+    値  : PNGバイト列そのもの
+    """
+
+    suffix = ".png"
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None) -> None:
+        super().__init__(
+            directory or (default_cache_dir() / "thumbs"),
+            _thumb_cache_max_bytes() if max_bytes is None else max_bytes,
+        )
+
+    @staticmethod
+    def key_for(
+        image_sha256: str,
+        max_px: int,
+        preset: ResamplePreset = DEFAULT_RESAMPLE,
+        png_level: Optional[int] = None,
+    ) -> str:
+        return f"{image_sha256}-{max_px}px-{thumbnail_tag(preset, png_level)}"
+
+
+def thumbnail_png_cached(
+    src_img: Path,
+    *,
+    max_px: int,
+    png_level: Optional[int] = None,
+    preset: ResamplePreset = DEFAULT_RESAMPLE,
+    image_sha256: Optional[str] = None,
+    cache: Optional[ThumbnailCache] = None,
+) -> Tuple[Optional[bytes], Optional[str], bool]:
+    """
+    縮小画像キャッシュ付きの make_thumbnail_png。ヒット時は Pillow を一切使わない。
+    image_sha256: 元画像のハッシュが計算済みなら渡す（読み直さない）
+    戻り: (png_bytes, error_message, cache_hit)
+    書き込み時の容量チェックは省くので、一連の処理の最後に cache.evict() を呼ぶこと。
+    """
+    cache = cache or ThumbnailCache()
+    try:
+        key = ThumbnailCache.key_for(
+            image_sha256 or file_sha256(src_img), max_px, preset=preset, png_level=png_level
+        )
+    except OSError:
+        png, err = make_thumbnail_png(src_img, max_px=max_px, png_level=png_level, preset=preset)
+        return png, err, False
+
+    png = cache.read(key)
+    if png is not None:
+        return png, None, True
+
+    png, err = make_thumbnail_png(src_img, max_px=max_px, png_level=png_level, preset=preset)
+    if png is not None:
+        try:
+            cache.write(key, png, evict=False)
+        except OSError:
+            pass
+    return png, err, False
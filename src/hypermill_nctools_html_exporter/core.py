@@ -1,20 +1,269 @@
 ﻿# src/hypermill_nctools_html_exporter/core.py
 from __future__ import annotations
 
+import hashlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any, Tuple, List, Literal
-
-from openpyxl import load_workbook
-
-from .parse_html import parse_nctools_html
-from .images import resolve_image_path, make_temp_resized_png
-from .export_xlsx import write_xlsx
+from typing import Optional, Callable, Dict, Any, Tuple, List, Literal, Sequence, Union
+
+from .model import RecordTable
+from .parse_html import parse_nctools_html, parse_nctools_html_groups, ParserBackend
+from .images import (
+    resolve_image_path,
+    render_thumbnail_png,
+    probe_image_size,
+    thumb_size,
+    thumbnail_tag,
+    ResamplePreset,
+    DEFAULT_RESAMPLE,
+)
+from .export_xlsx import write_xlsx, ErrorRow
 from .util import sanitize_filename
-from .export_xlsx_blocks import export_blocks_f2_xlsx
+from .export_xlsx_blocks import (
+    export_blocks_f2_xlsx,
+    f2_plan,
+    layout_f2_blocks,
+    F2BlockLayout,
+    F2Backend,
+    F2Layout,
+    F2_LAYOUTS,
+)
+from .cache import parse_nctools_html_cached, ThumbnailCache, file_sha256
+from .incremental import GroupEntry, state_path_for, load_state, save_state, image_key
+from .numeric import NumericColumns, numeric_stage
+from .pipeline import RecordPipeline
+from .thumbnails import ImageExecutor, ThumbResult, thumbnail_job
 
 
 ProgressCb = Callable[[int, int, str], None]  # (done, total, message)
 OutLang = Literal["ja", "en"]
+TargetReport = Literal["flat", "f2"]
+
+
+@dataclass
+class _Prepared:
+    """
+    解析 + 画像準備の結果（書き込み前）。
+    """
+    records: RecordTable
+    errors_for_sheet: List[ErrorRow]
+    thumbs: List[Optional[bytes]]  # レコード順の縮小PNG（メモリ上のまま writer に渡す）
+    cache_hit: bool = False
+    numeric: Optional[NumericColumns] = None
+    thumb_cache_hits: int = 0
+    images_unique: int = 0  # 縮小した画像の種類数（同じパス・同じ内容の画像は1つと数える）
+    # incremental 用
+    fingerprints: List[str] = field(default_factory=list)
+    image_keys: List[Any] = field(default_factory=list)
+    groups_reused: int = 0
+
+
+def _run_thumbnail_jobs(
+    sources: List[Path],
+    *,
+    max_px: int,
+    cache_dir: Optional[Path],
+    workers: int,
+    executor: ImageExecutor,
+    png_level: Optional[int] = None,
+    hashes: Optional[List[Optional[str]]] = None,
+    preset: ResamplePreset = DEFAULT_RESAMPLE,
+    on_done: Optional[Callable[[int], None]] = None,
+) -> List[ThumbResult]:
+    """
+    sources を縮小して入力順に結果を返す。workers>=2 ならスレッド/プロセスプールで並列に行う。
+    hashes: sources と同じ並びの元画像 SHA-256（計算済みならキャッシュ照合で読み直さない）
+    on_done(完了枚数) は1枚終わるごとに呼ぶ（完了順）。
+    """
+    results: List[Optional[ThumbResult]] = [None] * len(sources)
+    hashes = hashes or [None] * len(sources)
+
+    if workers <= 1 or len(sources) <= 1:
+        for k, src in enumerate(sources):
+            results[k] = thumbnail_job(src, max_px, cache_dir, png_level, hashes[k], preset)
+            if on_done:
+                on_done(k + 1)
+        return results  # type: ignore[return-value]
+
+    if executor not in ("thread", "process"):
+        raise ValueError(f"unknown image executor: {executor!r}")
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=min(workers, len(sources))) as pool:
+        futures = {
+            pool.submit(thumbnail_job, src, max_px, cache_dir, png_level, hashes[k], preset): k
+            for k, src in enumerate(sources)
+        }
+        for done, fut in enumerate(as_completed(futures), start=1):
+            results[futures[fut]] = fut.result()
+            if on_done:
+                on_done(done)
+    return results  # type: ignore[return-value]
+
+
+def _prepare(
+    html_path: Path,
+    *,
+    embed_images: bool,
+    max_px: int,
+    first_row: int,
+    use_cache: bool,
+    stream: bool,
+    parser_backend: ParserBackend,
+    parse_workers: int = 1,
+    image_workers: int = 1,
+    image_executor: ImageExecutor = "thread",
+    png_level: Optional[int] = None,
+    resample: ResamplePreset = DEFAULT_RESAMPLE,
+    state_path: Optional[Path] = None,
+    progress: Optional[ProgressCb] = None,
+    progress_step: Tuple[int, int] = (1, 3),
+    progress_msg: str = "画像を準備中...",
+) -> _Prepared:
+    """
+    HTML解析 → RecordTable化 → 数値ステージ → 画像解決 & 縮小（PNGはメモリ上に持ち、ファイルは作らない）。
+    first_row: errors シートに書く行番号の開始値
+    state_path: 指定時は incremental（前回と同じ指紋のグループは解析・縮小を再利用）
+    use_cache: 解析キャッシュに加え、縮小画像キャッシュ（ジョブをまたいで共有）も使う
+    image_workers: 2以上で画像縮小を並列に行う（結果はレコード順のまま）
+    png_level: None=optimize=True で保存 / 0-9=その圧縮レベルで保存（optimize を省いて速くする）
+    resample: 縮小方式のプリセット（fast / balanced / best）
+    progress: 画像1枚ごとにも呼ぶ（progress_step の区間を画像枚数で細分する）
+    """
+    prev: Dict[str, GroupEntry] = {}
+    fingerprints: List[str] = []
+    cache_hit = False
+
+    if state_path is not None:
+        prev = load_state(state_path, max_px=max_px, thumb_tag=thumbnail_tag(resample, png_level))
+        records, parse_errors, fingerprints = parse_nctools_html_groups(
+            html_path,
+            reuse={fp: e.record for fp, e in prev.items()},
+            stream=stream,
+            backend=parser_backend,
+        )
+    elif use_cache:
+        records, parse_errors, cache_hit = parse_nctools_html_cached(
+            html_path, stream=stream, backend=parser_backend, workers=parse_workers
+        )
+    else:
+        records, parse_errors = parse_nctools_html(
+            html_path, stream=stream, backend=parser_backend, workers=parse_workers
+        )
+
+    # 以降（画像・書き込み）は列指向で持つ（レコードごとの dataclass は解放される）
+    records = RecordTable.from_records(records)
+
+    if progress:
+        progress(progress_step[0], progress_step[1], progress_msg)
+
+    prepared = _Prepared(
+        records=records,
+        errors_for_sheet=[],
+        thumbs=[],
+        cache_hit=cache_hit,
+        numeric=numeric_stage(records),
+        fingerprints=fingerprints,
+        groups_reused=sum(1 for fp in fingerprints if fp in prev),
+    )
+    thumb_cache = ThumbnailCache() if (use_cache and embed_images) else None
+
+    n = len(records)
+    abs_imgs = [resolve_image_path(html_path, src) for src in records.column("image_rel_src")]
+    records.set_column("image_abs_path", abs_imgs)
+
+    pngs: List[Optional[bytes]] = [None] * n
+    img_errors: List[Optional[str]] = [None] * n
+    by_path: Dict[Path, List[int]] = {}  # 縮小が必要な画像パス -> レコード位置
+
+    for k, abs_img in enumerate(abs_imgs):
+        entry: Optional[GroupEntry] = None
+        if state_path is not None:
+            ikey = image_key(abs_img)
+            prepared.image_keys.append(ikey)
+            entry = prev.get(fingerprints[k])
+            if entry is not None and entry.image_key != ikey:
+                entry = None  # 画像ファイルが変わっている
+
+        if not embed_images:
+            continue
+        if not abs_img:
+            img_errors[k] = f"画像が見つかりません: {records[k].image_rel_src}"
+        elif entry is not None and entry.thumb_png:
+            pngs[k] = entry.thumb_png
+        else:
+            by_path.setdefault(abs_img, []).append(k)
+
+    # 同じ内容の画像ファイル（パス違いを含む）は1回だけ縮小する
+    jobs: Dict[str, List[int]] = {}  # 内容キー -> レコード位置
+    job_src: Dict[str, Tuple[Path, Optional[str]]] = {}
+    for path, ks in by_path.items():
+        try:
+            digest: Optional[str] = file_sha256(path)
+            jkey = digest
+        except OSError:
+            digest, jkey = None, f"path:{path}"  # 読めない画像はパス単位（エラーは縮小側で出す）
+        jobs.setdefault(jkey, []).extend(ks)
+        job_src.setdefault(jkey, (path, digest))
+
+    def _on_image_done(done: int) -> None:
+        if progress:
+            step, steps = progress_step
+            total = max(1, len(jobs))
+            progress(step * total + done, steps * total, f"{progress_msg} ({done}/{len(jobs)})")
+
+    results = _run_thumbnail_jobs(
+        [job_src[j][0] for j in jobs],
+        max_px=max_px,
+        cache_dir=thumb_cache.directory if thumb_cache is not None else None,
+        workers=image_workers,
+        executor=image_executor,
+        png_level=png_level,
+        hashes=[job_src[j][1] for j in jobs],
+        preset=resample,
+        on_done=_on_image_done,
+    )
+    for ks, (png, err, hit) in zip(jobs.values(), results):
+        for k in ks:
+            pngs[k] = png  # 同じ bytes を共有（writer 側でも1つの media パーツになる）
+            img_errors[k] = err
+        prepared.thumb_cache_hits += hit
+
+    prepared.thumbs = pngs
+    prepared.images_unique = len({hashlib.sha1(p).digest() for p in pngs if p})
+
+    for k, rec in enumerate(records):
+        i = first_row + k
+        if img_errors[k]:
+            prepared.errors_for_sheet.append((i, rec.nctool_name, img_errors[k]))
+
+        for w in rec.warnings:
+            prepared.errors_for_sheet.append((i, rec.nctool_name, w))
+
+    for e in parse_errors:
+        prepared.errors_for_sheet.append((0, "", e))
+
+    if thumb_cache is not None:
+        thumb_cache.evict()  # 書き込み時は省いた容量チェックをまとめて行う
+
+    return prepared
+
+
+def _save_incremental_state(prepared: _Prepared, state_path: Path, *, max_px: int, thumb_tag: str) -> None:
+    """
+    書き込み成功後に、今回のグループ指紋と縮小画像を保存する。
+    """
+    entries: Dict[str, GroupEntry] = {}
+    for rec, fp, key, png in zip(
+        prepared.records.to_records(), prepared.fingerprints, prepared.image_keys, prepared.thumbs
+    ):
+        entries[fp] = GroupEntry(record=rec, image_key=key, thumb_png=png)
+    try:
+        save_state(state_path, entries, max_px=max_px, thumb_tag=thumb_tag)
+    except OSError:
+        pass
 
 
 def export_from_html(
@@ -23,11 +272,35 @@ def export_from_html(
     embed_images: bool = True,
     max_px: int = 320,
     progress: Optional[ProgressCb] = None,
+    stream: bool = False,
+    parser_backend: ParserBackend = "bs4",
+    use_cache: bool = True,
+    incremental: bool = False,
+    parse_workers: int = 1,
+    image_workers: int = 1,
+    image_executor: ImageExecutor = "thread",
+    png_level: Optional[int] = None,
+    resample: ResamplePreset = DEFAULT_RESAMPLE,
+    pipeline: bool = False,
 ) -> Tuple[Path, Dict[str, Any]]:
     """
     HTML 1つ -> XLSX 1つ
     - embed_images: True=埋め込み(推奨), False=非埋め込み（画像処理しない）
     - max_px: 埋め込み画像の最大辺(px)
+    - stream: True=div.page 単位の逐次解析（巨大HTML向け・省メモリ）
+    - parser_backend: "bs4"(従来) / "lxml"(XPath・高速)
+    - use_cache: True=同一内容のHTMLは解析キャッシュを使い、解析を省略する
+                 （縮小画像もユーザーキャッシュに保存し、同じ画像は縮小を省略する）
+    - incremental: True=NCツールのページグループ単位の指紋を出力XLSXの隣に保存し、
+                   前回から変わっていないグループは解析・画像縮小を再利用する
+    - parse_workers: 2以上で1つのHTMLをNCツール単位に分割してプロセス並列で解析する
+    - image_workers: 2以上で画像縮小を並列に行う（image_executor="thread"/"process"）。
+                     progress には画像1枚ごとの進捗も通知する
+    - png_level: 縮小PNGの圧縮。None=optimize=True（最小・遅い）/ 0-9=zlibレベル（optimize なし）
+    - resample: 画像の縮小方式。fast / balanced / best（既定。従来の原寸 LANCZOS）
+    - pipeline: True=解析・画像縮小・書き込みを並行に行う（pipeline.RecordPipeline）。
+                NCツール1件ごとに書き始めるので最初の行が早く、メモリは件数に比例しない。
+                解析キャッシュ・parse_workers は使わない。incremental 指定時は従来どおり段階実行
     """
     html_path = html_path.expanduser().resolve()
     out_dir = out_dir.expanduser().resolve()
@@ -39,60 +312,91 @@ def export_from_html(
     if progress:
         progress(0, 4, "HTMLを解析中...")
 
-    records, parse_errors = parse_nctools_html(html_path)
-
-    if progress:
-        progress(1, 4, "画像パスを解決中...")
-
     base_name = sanitize_filename(html_path.stem)
     out_folder = out_dir / base_name
     out_folder.mkdir(parents=True, exist_ok=True)
-
-    errors_for_sheet: List[tuple[int, str, str]] = []
-    temp_files: list[Path] = []
-
-    # 画像解決 & temp縮小（出力先にimagesは作らない）
-    for i, rec in enumerate(records, start=2):  # Excel row index (header=1)
-        abs_img = resolve_image_path(html_path, rec.image_rel_src)
-        rec.image_abs_path = abs_img
-
-        if embed_images:
-            if not abs_img:
-                errors_for_sheet.append((i, rec.nctool_name, f"画像が見つかりません: {rec.image_rel_src}"))
-            else:
-                key = f"{rec.nctool_no or 'NA'}_{rec.nctool_name}".strip()
-                tmp_png, err = make_temp_resized_png(abs_img, key_name=key, max_px=max_px)
-                rec.image_cached_path = tmp_png
-                if tmp_png:
-                    temp_files.append(tmp_png)
-                if err:
-                    errors_for_sheet.append((i, rec.nctool_name, err))
-
-        for w in rec.warnings:
-            errors_for_sheet.append((i, rec.nctool_name, w))
-
-    for e in parse_errors:
-        errors_for_sheet.append((0, "", e))
+    out_xlsx = out_folder / f"nctools_list__{base_name}.xlsx"
+    state_path = state_path_for(out_xlsx) if incremental else None
+
+    if pipeline and state_path is None:
+        errors_for_sheet: List[ErrorRow] = []
+        if progress:
+            progress(1, 4, "解析・画像縮小・書き込み中...")
+        with RecordPipeline(
+            html_path,
+            embed_images=embed_images,
+            max_px=max_px,
+            stream=True,
+            parser_backend=parser_backend,
+            use_cache=use_cache,
+            image_workers=image_workers,
+            image_executor=image_executor,
+            png_level=png_level,
+            resample=resample,
+            first_row=2,  # Excel row index (header=1)
+            errors=errors_for_sheet,
+        ) as records:
+            written, _img_count = write_xlsx(
+                records,
+                out_xlsx,
+                embed_images=embed_images,
+                numeric=records.numeric,
+                thumbs=records.thumbs,
+                errors=errors_for_sheet,
+            )
+        if progress:
+            progress(4, 4, "完了")
+        return out_xlsx, {
+            "html": str(html_path),
+            "out_xlsx": str(out_xlsx),
+            "records": written,
+            "embed_images": embed_images,
+            "max_px": max_px,
+            "errors": len(errors_for_sheet),
+            "parse_cache_hit": False,
+            "thumb_cache_hits": records.stats.thumb_cache_hits,
+            "images_total": records.stats.images_total,
+            "images_unique": records.stats.images_unique,
+            "pipeline": True,
+            "first_row_seconds": records.stats.first_row_seconds,
+        }
+
+    prepared = _prepare(
+        html_path,
+        embed_images=embed_images,
+        max_px=max_px,
+        first_row=2,  # Excel row index (header=1)
+        use_cache=use_cache,
+        stream=stream,
+        parser_backend=parser_backend,
+        parse_workers=parse_workers,
+        image_workers=image_workers,
+        image_executor=image_executor,
+        png_level=png_level,
+        resample=resample,
+        state_path=state_path,
+        progress=progress,
+        progress_step=(1, 4),
+        progress_msg="画像パスを解決中...",
+    )
+    records = prepared.records
+    errors_for_sheet = prepared.errors_for_sheet
 
     if progress:
         progress(2, 4, "XLSXを書き込み中...")
 
-    out_xlsx = out_folder / f"nctools_list__{base_name}.xlsx"
-    try:
-        write_xlsx(records, out_xlsx, embed_images=embed_images)
-    finally:
-        for p in temp_files:
-            try:
-                p.unlink()
-            except Exception:
-                pass
-
-    # errorsシートに書き込む
-    wb = load_workbook(out_xlsx)
-    ws_err = wb["errors"]
-    for row_index, name, msg in errors_for_sheet:
-        ws_err.append([row_index, name, msg])
-    wb.save(out_xlsx)
+    write_xlsx(
+        records,
+        out_xlsx,
+        embed_images=embed_images,
+        numeric=prepared.numeric,
+        thumbs=prepared.thumbs,
+        errors=errors_for_sheet,  # errorsシートも同じ書き込みで出す
+    )
+    if state_path is not None:
+        _save_incremental_state(
+            prepared, state_path, max_px=max_px, thumb_tag=thumbnail_tag(resample, png_level)
+        )
 
     if progress:
         progress(4, 4, "完了")
@@ -104,10 +408,30 @@ def export_from_html(
         "embed_images": embed_images,
         "max_px": max_px,
         "errors": len(errors_for_sheet),
+        "parse_cache_hit": prepared.cache_hit,
+        "thumb_cache_hits": prepared.thumb_cache_hits,
+        "images_total": sum(1 for p in prepared.thumbs if p),
+        "images_unique": prepared.images_unique,
     }
+    if incremental:
+        summary["groups_reused"] = prepared.groups_reused
+        summary["groups_rebuilt"] = len(records) - prepared.groups_reused
     return out_xlsx, summary
 
 
+def _layout_f2_dry_run(
+    records: RecordTable, *, embed_images: bool, max_px: int, layout: F2Layout = "3row"
+) -> List[F2BlockLayout]:
+    """
+    縮小後の画像寸法を元画像のヘッダーから見積もり（画素はデコードしない）、F2 の配置を計算する。
+    """
+    sizes: List[Optional[Tuple[int, int]]] = []
+    for abs_img in records.column("image_abs_path"):
+        dims = probe_image_size(abs_img) if (embed_images and abs_img) else None
+        sizes.append(thumb_size(dims[0], dims[1], max_px) if dims else None)
+    return layout_f2_blocks(sizes, lines=f2_plan(layout).n_lines)
+
+
 def export_report_f2_from_html(
     html_path: Path,
     out_dir: Path,
@@ -115,69 +439,147 @@ def export_report_f2_from_html(
     max_px: int = 320,
     progress: Optional[ProgressCb] = None,
     out_lang: OutLang = "ja",
+    stream: bool = False,
+    parser_backend: ParserBackend = "bs4",
+    use_cache: bool = True,
+    incremental: bool = False,
+    parse_workers: int = 1,
+    image_workers: int = 1,
+    image_executor: ImageExecutor = "thread",
+    png_level: Optional[int] = None,
+    resample: ResamplePreset = DEFAULT_RESAMPLE,
+    dry_run: bool = False,
+    f2_backend: F2Backend = "openpyxl",
+    f2_layout: F2Layout = "3row",
+    pipeline: bool = False,
 ) -> Tuple[Path, dict]:
     """
     HTML1つ → F2帳票（3行ブロック）XLSX
-    出力先に images フォルダは作らない（縮小はテンポラリ）。
+    出力先に images フォルダは作らない（縮小PNGはメモリ上で直接埋め込む）。
+    stream=True で div.page 単位の逐次解析（巨大HTML向け・省メモリ）。
+    parser_backend="lxml" でXPathによる高速解析（結果は "bs4" と同一）。
+    use_cache=True なら同一内容のHTMLは解析キャッシュを使い、解析を省略する（縮小画像も同様にキャッシュ）。
+    incremental=True なら変更のないNCツールグループの解析・画像縮小を前回出力から再利用する。
+    parse_workers>=2 で1つのHTMLをNCツール単位に分割してプロセス並列で解析する。
+    image_workers>=2 で画像縮小をスレッド（image_executor="process" ならプロセス）並列で行う。
+    png_level=0-9 で縮小PNGの optimize パスを省き、その圧縮レベルで保存する（None=従来どおり）。
+    resample=fast/balanced で速い縮小方式を選ぶ（JPEG の縮小デコードと整数縮小を使う。既定の best は従来どおり）。
+    dry_run=True なら画像の縮小も XLSX の書き込みもせず、画像ヘッダーの寸法だけで
+    全ブロックの配置を計算して summary["layout"] に返す（出力フォルダも作らない）。
+    f2_backend="raw" で Workbook を組み立てずに XLSX を直接書く（出力内容は同じ・大量ブロック向け）。
+    f2_layout=3row/2row/4row でブロックの行数を選ぶ（export_blocks_f2_xlsx の layout）。
+    pipeline=True なら解析・画像縮小・書き込みを並行に行い、NCツール1件ごとにブロックを書く
+    （raw バックエンドで書く。解析キャッシュ・parse_workers は使わない。incremental / dry_run 指定時は従来どおり）。
     """
     html_path = html_path.expanduser().resolve()
     out_dir = out_dir.expanduser().resolve()
-    out_dir.mkdir(parents=True, exist_ok=True)
 
     if progress:
         progress(0, 3, "HTMLを解析中...")
 
-    records, parse_errors = parse_nctools_html(html_path)
-
-    if progress:
-        progress(1, 3, "画像を準備中...")
-
     base_name = sanitize_filename(html_path.stem)
     out_folder = out_dir / base_name
-    out_folder.mkdir(parents=True, exist_ok=True)
-
-    errors_for_sheet: list[tuple[int, str, str]] = []
-    temp_files: list[Path] = []
-
-    for i, rec in enumerate(records, start=1):
-        abs_img = resolve_image_path(html_path, rec.image_rel_src)
-        rec.image_abs_path = abs_img
-
-        if embed_images:
-            if abs_img:
-                key = f"{rec.nctool_no or 'NA'}_{rec.nctool_name}"
-                tmp_png, err = make_temp_resized_png(abs_img, key_name=key, max_px=max_px)
-                rec.image_cached_path = tmp_png
-                if tmp_png:
-                    temp_files.append(tmp_png)
-                if err:
-                    errors_for_sheet.append((i, rec.nctool_name, err))
-            else:
-                errors_for_sheet.append((i, rec.nctool_name, f"画像が見つかりません: {rec.image_rel_src}"))
-
-        for w in rec.warnings:
-            errors_for_sheet.append((i, rec.nctool_name, w))
-
-    for e in parse_errors:
-        errors_for_sheet.append((0, "", e))
+    out_xlsx = out_folder / f"nctools_report__{base_name}.xlsx"
+    if not dry_run:
+        out_folder.mkdir(parents=True, exist_ok=True)
+    state_path = state_path_for(out_xlsx) if (incremental and not dry_run) else None
+
+    if pipeline and state_path is None and not dry_run:
+        pipe_errors: List[ErrorRow] = []
+        if progress:
+            progress(1, 3, "解析・画像縮小・書き込み中...")
+        with RecordPipeline(
+            html_path,
+            embed_images=embed_images,
+            max_px=max_px,
+            stream=True,
+            parser_backend=parser_backend,
+            use_cache=use_cache,
+            image_workers=image_workers,
+            image_executor=image_executor,
+            png_level=png_level,
+            resample=resample,
+            first_row=1,
+            errors=pipe_errors,
+        ) as records:
+            written, img_count = export_blocks_f2_xlsx(
+                records,
+                out_xlsx,
+                embed_images=embed_images,
+                lang=out_lang,
+                thumbs=records.thumbs,
+                backend="raw",
+                layout=f2_layout,
+            )
+        if progress:
+            progress(3, 3, "完了")
+        return out_xlsx, {
+            "html": str(html_path),
+            "out_xlsx": str(out_xlsx),
+            "records": written,
+            "embedded_images": img_count,
+            "errors": len(pipe_errors),
+            "out_lang": out_lang,
+            "parse_cache_hit": False,
+            "thumb_cache_hits": records.stats.thumb_cache_hits,
+            "images_total": records.stats.images_total,
+            "images_unique": records.stats.images_unique,
+            "pipeline": True,
+            "first_row_seconds": records.stats.first_row_seconds,
+        }
+
+    prepared = _prepare(
+        html_path,
+        embed_images=embed_images and not dry_run,
+        max_px=max_px,
+        first_row=1,
+        use_cache=use_cache,
+        stream=stream,
+        parser_backend=parser_backend,
+        parse_workers=parse_workers,
+        image_workers=image_workers,
+        image_executor=image_executor,
+        png_level=png_level,
+        resample=resample,
+        state_path=state_path,
+        progress=progress,
+        progress_step=(1, 3),
+        progress_msg="画像を準備中...",
+    )
+    records = prepared.records
+    errors_for_sheet = prepared.errors_for_sheet
+
+    if dry_run:
+        layouts = _layout_f2_dry_run(records, embed_images=embed_images, max_px=max_px, layout=f2_layout)
+        if progress:
+            progress(3, 3, "完了")
+        return out_xlsx, {
+            "html": str(html_path),
+            "out_xlsx": str(out_xlsx),
+            "dry_run": True,
+            "records": len(records),
+            "embedded_images": sum(1 for lay in layouts if lay.image_size),
+            "errors": len(errors_for_sheet),
+            "parse_cache_hit": prepared.cache_hit,
+            "layout": layouts,
+        }
 
     if progress:
         progress(2, 3, "XLSXを書き込み中...")
 
-    out_xlsx = out_folder / f"nctools_report__{base_name}.xlsx"
-    try:
-        written, img_count = export_blocks_f2_xlsx(
-            records,
-            out_xlsx,
-            embed_images=embed_images,
-            lang=out_lang,
+    written, img_count = export_blocks_f2_xlsx(
+        records,
+        out_xlsx,
+        embed_images=embed_images,
+        lang=out_lang,
+        thumbs=prepared.thumbs,
+        backend=f2_backend,
+        layout=f2_layout,
+    )
+    if state_path is not None:
+        _save_incremental_state(
+            prepared, state_path, max_px=max_px, thumb_tag=thumbnail_tag(resample, png_level)
         )
-    finally:
-        for p in temp_files:
-            try:
-                p.unlink()
-            except Exception:
-                pass
 
     if progress:
         progress(3, 3, "完了")
@@ -189,5 +591,284 @@ def export_report_f2_from_html(
         "embedded_images": img_count,
         "errors": len(errors_for_sheet),
         "out_lang": out_lang,
+        "parse_cache_hit": prepared.cache_hit,
+        "thumb_cache_hits": prepared.thumb_cache_hits,
+        "images_total": sum(1 for p in prepared.thumbs if p),
+        "images_unique": prepared.images_unique,
+    }
+    if incremental:
+        summary["groups_reused"] = prepared.groups_reused
+        summary["groups_rebuilt"] = len(records) - prepared.groups_reused
+    return out_xlsx, summary
+
+
+@dataclass(frozen=True)
+class ExportTarget:
+    """
+    export_targets の出力1つ分。
+    report: "flat"=一覧（export_from_html と同じ内容）/ "f2"=F2帳票（export_report_f2_from_html と同じ内容）
+    lang / layout / backend: F2 のみ（out_lang / f2_layout / f2_backend に当たる）
+    max_px: None=export_targets の max_px を使う
+    """
+    report: TargetReport = "flat"
+    lang: OutLang = "ja"
+    layout: F2Layout = "3row"
+    backend: F2Backend = "openpyxl"
+    max_px: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.report not in ("flat", "f2"):
+            raise ValueError(f"unknown report: {self.report!r}")
+        if self.lang not in ("ja", "en"):
+            raise ValueError(f"unknown output language: {self.lang!r}")
+        f2_plan(self.layout)
+        if self.backend not in ("openpyxl", "raw"):
+            raise ValueError(f"unknown F2 backend: {self.backend!r}")
+        if self.report == "flat" and (self.lang, self.layout, self.backend) != ("ja", "3row", "openpyxl"):
+            raise ValueError("lang / layout / backend are F2 options")
+        if self.max_px is not None and self.max_px <= 0:
+            raise ValueError(f"max_px must be positive: {self.max_px}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "ExportTarget":
+        """
+        "report[:opt...]" 形式の指定を読む（CLI 用）。
+        opt は ja/en・3row/2row/4row・openpyxl/raw・最大辺の px 数（例: "f2:en:2row", "flat:160"）。
+        """
+        report, *opts = [part.strip() for part in spec.split(":")]
+        kwargs: Dict[str, Any] = {}
+        for opt in opts:
+            value: Any = opt
+            if opt in ("ja", "en"):
+                key = "lang"
+            elif opt in F2_LAYOUTS:
+                key = "layout"
+            elif opt in ("openpyxl", "raw"):
+                key = "backend"
+            elif opt.isdigit():
+                key, value = "max_px", int(opt)
+            else:
+                raise ValueError(f"unknown export target option {opt!r} in {spec!r}")
+            if key in kwargs:
+                raise ValueError(f"{key} given twice in {spec!r}")
+            kwargs[key] = value
+        return cls(report=report, **kwargs)  # type: ignore[arg-type]
+
+    @property
+    def label(self) -> str:
+        """
+        parse で同じ target に戻る表記（summary・進捗表示用）。
+        """
+        parts = [self.report]
+        if self.report == "f2":
+            parts += [self.lang, self.layout]
+            if self.backend != "openpyxl":
+                parts.append(self.backend)
+        if self.max_px is not None:
+            parts.append(str(self.max_px))
+        return ":".join(parts)
+
+    def file_name(self, base_name: str) -> str:
+        """
+        出力ファイル名。flat と f2（ja / 3row）は単独出力と同じ名前、それ以外は違いを末尾に付ける。
+        """
+        if self.report == "flat":
+            parts = [f"nctools_list__{base_name}"]
+        else:
+            parts = [f"nctools_report__{base_name}"]
+            parts += [v for v, default in ((self.lang, "ja"), (self.layout, "3row")) if v != default]
+        if self.max_px is not None:
+            parts.append(f"{self.max_px}px")
+        return "__".join(parts) + ".xlsx"
+
+
+def _shrink_thumbs(
+    thumbs: List[Optional[bytes]],
+    max_px: int,
+    *,
+    png_level: Optional[int],
+    preset: ResamplePreset,
+) -> Tuple[List[Optional[bytes]], Dict[int, str]]:
+    """
+    縮小済みPNGを最大辺 max_px 以内にさらに縮小する（元画像は読み直さない）。
+    同じ bytes（同じ画像）は1回だけ縮小し、結果も共有する。
+    戻り: (PNG の並び, 縮小に失敗したレコード位置 -> エラー)。失敗したレコードは画像なしにする。
+    """
+    done: Dict[int, Tuple[Optional[bytes], Optional[str]]] = {}
+    out: List[Optional[bytes]] = []
+    errors: Dict[int, str] = {}
+    for k, png in enumerate(thumbs):
+        if png is not None:
+            result = done.get(id(png))
+            if result is None:
+                try:
+                    result = (render_thumbnail_png(png, max_px=max_px, png_level=png_level, preset=preset), None)
+                except Exception as e:
+                    result = (None, f"画像縮小失敗: {max_px}px ({e})")
+                done[id(png)] = result
+            png, err = result
+            if err:
+                errors[k] = err
+        out.append(png)
+    return out, errors
+
+
+def export_targets(
+    html_path: Path,
+    out_dir: Path,
+    targets: Sequence[Union[ExportTarget, str]] = ("flat",),
+    embed_images: bool = True,
+    max_px: int = 320,
+    progress: Optional[ProgressCb] = None,
+    stream: bool = False,
+    parser_backend: ParserBackend = "bs4",
+    use_cache: bool = True,
+    incremental: bool = False,
+    parse_workers: int = 1,
+    image_workers: int = 1,
+    image_executor: ImageExecutor = "thread",
+    png_level: Optional[int] = None,
+    resample: ResamplePreset = DEFAULT_RESAMPLE,
+    writers: int = 1,
+) -> Tuple[List[Path], Dict[str, Any]]:
+    """
+    HTML 1つ → 複数のXLSX（一覧、言語・レイアウト違いのF2帳票など）
+    解析と画像縮小は1回だけ行い、その結果を target ごとの writer に渡す。
+    - targets: ExportTarget またはその文字列指定（ExportTarget.parse）。同じ target は1つにまとめる
+    - max_px: max_px を持たない target の最大辺。画像は targets の中で最大の max_px で縮小し、
+              それより小さい target には縮小済みPNGからさらに縮小したものを渡す
+    - writers: 2以上で target ごとの書き込みをスレッド並列で行う
+    - incremental: 指紋は最初の target の出力の隣に保存する
+    その他は export_from_html と同じ（pipeline / dry_run は単独出力の関数を使う）。
+    戻り: (target 順の出力パス, summary)。summary["targets"] に target ごとの件数・書き込み秒数を入れる。
+    """
+    resolved: List[ExportTarget] = []
+    for t in targets:
+        t = ExportTarget.parse(t) if isinstance(t, str) else t
+        if t not in resolved:
+            resolved.append(t)
+    if not resolved:
+        raise ValueError("no export targets")
+
+    html_path = html_path.expanduser().resolve()
+    out_dir = out_dir.expanduser().resolve()
+    if not html_path.exists():
+        raise FileNotFoundError(str(html_path))
+
+    base_name = sanitize_filename(html_path.stem)
+    out_folder = out_dir / base_name
+    out_paths = [out_folder / t.file_name(base_name) for t in resolved]
+    if len(set(out_paths)) != len(out_paths):
+        raise ValueError("export targets that differ only in backend would write the same file")
+    out_folder.mkdir(parents=True, exist_ok=True)
+
+    steps = 2 + len(resolved)
+    if progress:
+        progress(0, steps, "HTMLを解析中...")
+
+    target_px = [t.max_px or max_px for t in resolved]
+    prep_px = max(target_px)
+    state_path = state_path_for(out_paths[0]) if incremental else None
+
+    prepared = _prepare(
+        html_path,
+        embed_images=embed_images,
+        max_px=prep_px,
+        first_row=2,  # 一覧の Excel 行番号（F2 は errors の件数だけ使う）
+        use_cache=use_cache,
+        stream=stream,
+        parser_backend=parser_backend,
+        parse_workers=parse_workers,
+        image_workers=image_workers,
+        image_executor=image_executor,
+        png_level=png_level,
+        resample=resample,
+        state_path=state_path,
+        progress=progress,
+        progress_step=(1, steps),
+        progress_msg="画像を準備中...",
+    )
+    records = prepared.records
+    errors_for_sheet = prepared.errors_for_sheet
+
+    thumbs_by_px: Dict[int, Tuple[List[Optional[bytes]], Dict[int, str]]] = {prep_px: (prepared.thumbs, {})}
+    for px in set(target_px) - {prep_px}:
+        thumbs_by_px[px] = _shrink_thumbs(prepared.thumbs, px, png_level=png_level, preset=resample)
+
+    lock = threading.Lock()
+    finished = [0]
+
+    def _write(k: int) -> Dict[str, Any]:
+        target, out_xlsx = resolved[k], out_paths[k]
+        thumbs, shrink_errors = thumbs_by_px[target_px[k]]
+        # writer は画像の埋め込み失敗を errors に追記するので、target ごとに別のリストを渡す
+        errors = list(errors_for_sheet)
+        for j, err in shrink_errors.items():
+            errors.append((2 + j, records[j].nctool_name, err))
+        t0 = time.perf_counter()
+        if target.report == "f2":
+            written, img_count = export_blocks_f2_xlsx(
+                records,
+                out_xlsx,
+                embed_images=embed_images,
+                lang=target.lang,
+                thumbs=thumbs,
+                backend=target.backend,
+                layout=target.layout,
+            )
+        else:
+            written, img_count = write_xlsx(
+                records,
+                out_xlsx,
+                embed_images=embed_images,
+                numeric=prepared.numeric,
+                thumbs=thumbs,
+                errors=errors,
+            )
+        if progress:
+            with lock:
+                finished[0] += 1
+                progress(2 + finished[0], steps, f"XLSXを書き込み中... ({target.label})")
+        return {
+            "target": target.label,
+            "out_xlsx": str(out_xlsx),
+            "records": written,
+            "embedded_images": img_count,
+            "errors": len(errors),
+            "max_px": target_px[k],
+            "seconds": round(time.perf_counter() - t0, 4),
+        }
+
+    if progress:
+        progress(2, steps, "XLSXを書き込み中...")
+    if writers > 1 and len(resolved) > 1:
+        with ThreadPoolExecutor(max_workers=min(writers, len(resolved))) as ex:
+            results = list(ex.map(_write, range(len(resolved))))
+    else:
+        results = [_write(k) for k in range(len(resolved))]
+
+    if state_path is not None:
+        _save_incremental_state(
+            prepared, state_path, max_px=prep_px, thumb_tag=thumbnail_tag(resample, png_level)
+        )
+
+    if progress:
+        progress(steps, steps, "完了")
+
+    summary = {
+        "html": str(html_path),
+        "out_dir": str(out_folder),
+        "records": len(records),
+        "embed_images": embed_images,
+        "max_px": prep_px,
+        "errors": len(errors_for_sheet),
+        "parse_cache_hit": prepared.cache_hit,
+        "thumb_cache_hits": prepared.thumb_cache_hits,
+        "images_total": sum(1 for p in prepared.thumbs if p),
+        "images_unique": prepared.images_unique,
+        "targets": results,
     }
-    return out_xlsx, summary
\ No newline at end of file
+    if incremental:
+        summary["groups_reused"] = prepared.groups_reused
+        summary["groups_rebuilt"] = len(records) - prepared.groups_reused
+    return out_paths, summary
@@ -1,17 +1,21 @@
 # src\hypermill_nctools_html_exporter\export_xlsx.py
 from __future__ import annotations
 
-from dataclasses import asdict
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
 
 from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
 from openpyxl.utils import get_column_letter
-from openpyxl.drawing.image import Image as XLImage
 
-from .model import NcToolRecord
+from .model import Records
+from .numeric import NumericColumns
+from .xlsx_media import MediaPool
 
 
+# errors シートの1行: (row_index, nctool_name, message)
+ErrorRow = Tuple[int, str, str]
+
 DEFAULT_COLUMNS = [
     # identity
     "nctool_no",
@@ -22,6 +26,11 @@ DEFAULT_COLUMNS = [
     "holder_length",
     "tool_name",
     "tool_length",
+    # computed
+    "overhang_mm",
+    "total_length_mm",
+    "overhang_ld_ratio",
+    "tool_ld_ratio",
     # tool page
     "tool_type",
     "tool_page_name",
@@ -50,86 +59,156 @@ DEFAULT_COLUMNS = [
 ]
 
 
-def _autosize_columns(ws, max_width: int = 60) -> None:
-    for col in range(1, ws.max_column + 1):
-        letter = get_column_letter(col)
-        max_len = 10
-        for r in range(1, min(ws.max_row, 200) + 1):
-            v = ws.cell(row=r, column=col).value
+# 数値セルの表示形式（指定の無い列は Excel 既定）
+_NUMBER_FORMATS = {
+    "overhang_ld_ratio": "0.00",
+    "tool_ld_ratio": "0.00",
+}
+
+
+# 列幅は先頭この行数（ヘッダー含む）の値の長さで決める
+_AUTOSIZE_ROWS = 200
+
+
+class _RowStream:
+    """
+    write_only シートへ行を流す。
+    列幅（<cols>）は行より前に書く必要があるので、先頭 _AUTOSIZE_ROWS 行だけ溜めながら
+    列ごとの最大文字数を更新し、溜め終えたら列幅を設定してまとめて書く。以降は溜めずにそのまま書く。
+    """
+
+    def __init__(self, ws, n_cols: int, max_width: int = 60) -> None:
+        self.ws = ws
+        self.rows = 0
+        self._max_width = max_width
+        self._max_len = [10] * n_cols
+        self._pending: Optional[List[Tuple[List[Any], Optional[float]]]] = []
+
+    def append(self, values: List[Any], height: Optional[float] = None) -> int:
+        """
+        1行書く（values には WriteOnlyCell も混ぜてよい）。戻り: その行番号（1-based）
+        """
+        self.rows += 1
+        if self._pending is None:
+            self._write(self.rows, values, height)
+            return self.rows
+
+        for col, v in enumerate(values):
+            v = v.value if isinstance(v, Cell) else v
             if v is None:
                 continue
-            s = str(v)
-            if len(s) > max_len:
-                max_len = len(s)
-        ws.column_dimensions[letter].width = min(max_width, max(10, max_len + 2))
+            n = len(str(v))
+            if col >= len(self._max_len):
+                self._max_len.append(10)
+            if n > self._max_len[col]:
+                self._max_len[col] = n
+        self._pending.append((values, height))
+        if self.rows >= _AUTOSIZE_ROWS:
+            self.flush()
+        return self.rows
+
+    def flush(self) -> None:
+        if self._pending is None:
+            return
+        for col, max_len in enumerate(self._max_len, start=1):
+            self.ws.column_dimensions[get_column_letter(col)].width = min(self._max_width, max(10, max_len + 2))
+        pending, self._pending = self._pending, None
+        for r, (values, height) in enumerate(pending, start=1):
+            self._write(r, values, height)
+
+    def _write(self, row_idx: int, values: List[Any], height: Optional[float]) -> None:
+        dims = self.ws.row_dimensions
+        if height is not None:
+            dims[row_idx].height = height
+        self.ws.append(values)
+        dims.pop(row_idx, None)  # 書き終えた行の寸法は持たない（行数が増えてもメモリを一定に保つ）
 
 
 def write_xlsx(
-    records: List[NcToolRecord],
+    records: Records,
     out_xlsx: Path,
     embed_images: bool = True,
     image_col_name: str = "image_cached_path",
     image_cell_col: int | None = None,
     row_height: int = 90,
+    numeric: Optional[NumericColumns] = None,
+    thumbs: Optional[Sequence[Optional[bytes]]] = None,
+    errors: Optional[List[ErrorRow]] = None,
 ) -> Tuple[int, int]:
     """
-    records -> XLSX
+    records -> XLSX（NcToolRecord の list / RecordTable のどちらでも可。
+    レコードを順に1回なめるだけなので、イテレータ（pipeline.RecordPipeline など）でもよい）
+    numeric: 数値ステージの結果。指定時は寸法列を数値セルで書く（数値が取れない値は文字列のまま）
+    thumbs: レコード順の縮小PNGバイト列。指定時は image_cached_path ではなくメモリから埋め込む
+            （同じ内容の画像はブック内で1つの media パーツを共有する）
+    errors: errors シートの行 (row_index, nctool_name, message) を受けるシンク。
+            渡された行は同じ書き込みで errors シートに出し、書き込み中の画像埋め込み失敗も追記する
+            （ブックを読み直して追記する必要はない）
+    write_only のブックに行を生成順に流すので、行数が増えてもメモリはほぼ一定
+    （列幅は先頭 _AUTOSIZE_ROWS 行から決める）。
     Returns: (written_rows, embedded_images)
     """
     out_xlsx.parent.mkdir(parents=True, exist_ok=True)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "nctools"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("nctools")
 
     cols = list(DEFAULT_COLUMNS)
     if embed_images and "image" not in cols:
         cols.append("image")
+    if embed_images and image_cell_col is None:
+        image_cell_col = cols.index("image") + 1
+
+    rows = _RowStream(ws, max(len(cols), image_cell_col or 0))
+    rows.append(cols)
 
-    ws.append(cols)
+    num_cols = [(i, c) for i, c in enumerate(cols) if numeric is not None and c in numeric]
 
+    media = MediaPool()
     img_count = 0
+    written = 0
     for idx, rec in enumerate(records, start=2):
-        d = asdict(rec)
+        written += 1
         row = []
         for c in cols:
             if c == "image":
                 row.append("")
             else:
-                v = d.get(c, "")
+                v = getattr(rec, c, "")
                 if hasattr(v, "__fspath__"):
                     v = str(v)
                 row.append(v)
-        ws.append(row)
-        ws.row_dimensions[idx].height = row_height
-
-    if embed_images:
-        if image_cell_col is None:
-            image_cell_col = cols.index("image") + 1
-
-        for r, rec in enumerate(records, start=2):
-            p = rec.image_cached_path
-            if not p:
-                continue
+        for i, c in num_cols:
+            x = numeric.value(c, idx - 2)
+            if x is not None:
+                row[i] = x
+            if c in _NUMBER_FORMATS:
+                cell = WriteOnlyCell(ws, value=row[i])
+                cell.number_format = _NUMBER_FORMATS[c]
+                row[i] = cell
+        rows.append(row, height=row_height)
+
+        if embed_images:
             try:
-                img = XLImage(str(p))
-                cell = ws.cell(row=r, column=image_cell_col)
-                ws.add_image(img, cell.coordinate)
-                img_count += 1
-            except Exception:
-                pass
-
-        ws.column_dimensions[get_column_letter(image_cell_col)].width = 18
+                img = media.open(thumbs, idx - 2, rec.image_cached_path)
+                if img is not None:
+                    ws.add_image(img, f"{get_column_letter(image_cell_col)}{idx}")
+                    img_count += 1
+            except Exception as e:
+                if errors is not None:
+                    errors.append((idx, rec.nctool_name, f"画像埋め込み失敗: {e}"))
 
-    _autosize_columns(ws)
+    rows.flush()
 
     ws_meta = wb.create_sheet("meta")
-    ws_meta.append(["records", len(records)])
+    ws_meta.append(["records", written])
     ws_meta.append(["embedded_images", img_count])
     ws_meta.append(["embed_images", str(embed_images)])
 
     ws_err = wb.create_sheet("errors")
     ws_err.append(["row_index(1-based in nctools)", "nctool_name", "message"])
+    for row_index, name, msg in errors or ():
+        ws_err.append([row_index, name, msg])
 
-    wb.save(out_xlsx)
-    return len(records), img_count
+    media.save(wb, out_xlsx)
+    return written, img_count
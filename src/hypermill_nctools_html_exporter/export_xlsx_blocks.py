@@ -1,11 +1,15 @@
 # src/hypermill_nctools_html_exporter/export_xlsx_blocks.py
 from __future__ import annotations
 
+from copy import copy
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Literal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Literal
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.styles import Font, Alignment, Border, NamedStyle, Side
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.cell_style import StyleArray
 from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.utils.units import pixels_to_EMU, points_to_pixels
@@ -13,10 +17,12 @@ from openpyxl.utils.units import pixels_to_EMU, points_to_pixels
 from openpyxl.drawing.spreadsheet_drawing import OneCellAnchor, AnchorMarker
 from openpyxl.drawing.xdr import XDRPositiveSize2D
 
-from .model import NcToolRecord
+from .model import Records
+from .xlsx_media import MediaPool
 
 
 Lang = Literal["ja", "en"]
+F2Backend = Literal["openpyxl", "raw"]
 
 _LABELS = {
     "ja": {
@@ -73,61 +79,103 @@ def _row_height_to_pixels(points: float) -> int:
     return int(points_to_pixels(points))
 
 
-def _apply_block_border(ws, start_row: int, end_row: int, max_col: int, img_col: int) -> None:
-    thin = Side(style="thin")
-    thick = Side(style="medium")
-    none = Side(style=None)
+# columns
+COL_NO = 1
+COL_NCNAME = 2
+COL_CALIBER = 3   # 手入力
+COL_IDENT = 4     # 手入力
+COL_H = 5         # 手入力
+COL_D = 6         # 手入力
+COL_IMG = 7       # 画像
+COL_KIND = 8      # 種別
+COL_COMP = 9      # 名称
+COL_DETAIL = 10   # 詳細
+COL_NOTE = 11     # 手入力
+
+_COL_WIDTHS = {
+    COL_NO: 6,
+    COL_NCNAME: 24,
+    COL_CALIBER: 7,
+    COL_IDENT: 7,
+    COL_H: 7,
+    COL_D: 7,
+    COL_IMG: 40,
+    COL_KIND: 12,
+    COL_COMP: 55,
+    COL_DETAIL: 55,
+    COL_NOTE: 50,
+}
 
-    for r in range(start_row, end_row + 1):
-        for c in range(1, max_col + 1):
-            left = thin
-            right = thin
-            top = thin
-            bottom = thin
+_BLOCK_ROW_HEIGHT = 80  # pt
+_BLOCK_LINES = 3        # holder / extension / tool（既定レイアウトの行数）
 
-            if r == start_row:
-                top = thick
-            if r == end_row:
-                bottom = thick
-            if c == 1:
-                left = thick
-            if c == max_col:
-                right = thick
 
-            # 画像列は縦結合なので内部横線を消す
-            if c == img_col:
-                if r != start_row:
-                    top = none
-                if r != end_row:
-                    bottom = none
+@dataclass(frozen=True)
+class F2BlockLayout:
+    """
+    1ブック内の1ブロック（1レコード）の配置。
+    image_size / image_offset は画像列の結合セルに対する px（画像無しは None）。
+    """
+    row_top: int
+    row_bottom: int
+    image_size: Optional[Tuple[int, int]] = None
+    image_offset: Optional[Tuple[int, int]] = None
 
-            ws.cell(r, c).border = Border(left=left, right=right, top=top, bottom=bottom)
 
+def _center_offset(img_w_px: int, img_h_px: int, cell_w_px: int, cell_h_px: int) -> Tuple[int, int]:
+    off_x_px = max(0, (cell_w_px - img_w_px) // 2)
+    off_y_px = max(0, (cell_h_px - img_h_px) // 2)
 
-def _center_image_in_merged_cell(ws, img: XLImage, col: int, row_top: int, row_bottom: int) -> None:
-    col_letter = get_column_letter(col)
+    # 微調整（環境差吸収）
+    off_x_px = max(0, off_x_px + 12)
+    return off_x_px, off_y_px
 
-    col_width = ws.column_dimensions[col_letter].width or 8.43
-    cell_w_px = _col_width_to_pixels(col_width)
 
-    total_h_px = 0
-    for r in range(row_top, row_bottom + 1):
-        h_pt = ws.row_dimensions[r].height or 15
-        total_h_px += _row_height_to_pixels(h_pt)
+def layout_f2_block(
+    index: int,
+    image_size: Optional[Tuple[int, int]],
+    *,
+    block_rows: Optional[int] = None,
+    start_row: int = 2,
+    lines: int = _BLOCK_LINES,
+) -> F2BlockLayout:
+    """
+    index 番目（0-based）のブロックの行位置と画像の中央寄せオフセット。
+    lines はブロックの行数（F2BlockPlan.lines の長さ）、block_rows はブロックの間隔（None なら lines）。
+    """
+    r1 = start_row + index * (block_rows or lines)
+    r_last = r1 + lines - 1
+    if image_size is None:
+        return F2BlockLayout(r1, r_last)
+    cell_w_px = _col_width_to_pixels(_COL_WIDTHS[COL_IMG])
+    cell_h_px = _row_height_to_pixels(_BLOCK_ROW_HEIGHT) * lines
+    return F2BlockLayout(r1, r_last, image_size, _center_offset(image_size[0], image_size[1], cell_w_px, cell_h_px))
 
-    img_w_px = int(getattr(img, "width", 0) or 0)
-    img_h_px = int(getattr(img, "height", 0) or 0)
 
-    off_x_px = max(0, (cell_w_px - img_w_px) // 2)
-    off_y_px = max(0, (total_h_px - img_h_px) // 2)
+def layout_f2_blocks(
+    image_sizes: Sequence[Optional[Tuple[int, int]]],
+    *,
+    block_rows: Optional[int] = None,
+    start_row: int = 2,
+    lines: int = _BLOCK_LINES,
+) -> List[F2BlockLayout]:
+    """
+    全ブロックの行位置と画像の中央寄せオフセットを先に計算する。
+    画像は寸法（ヘッダーから読める）だけあればよく、画素は要らない。
+    """
+    return [
+        layout_f2_block(k, size, block_rows=block_rows, start_row=start_row, lines=lines)
+        for k, size in enumerate(image_sizes)
+    ]
 
-    # 微調整（環境差吸収）
-    off_x_px = max(0, off_x_px + 12)
 
+def _anchor_image(img: XLImage, col: int, layout: F2BlockLayout) -> None:
+    img_w_px, img_h_px = layout.image_size
+    off_x_px, off_y_px = layout.image_offset
     marker = AnchorMarker(
         col=col - 1,
         colOff=pixels_to_EMU(off_x_px),
-        row=row_top - 1,
+        row=layout.row_top - 1,
         rowOff=pixels_to_EMU(off_y_px),
     )
     size = XDRPositiveSize2D(
@@ -137,21 +185,287 @@ def _center_image_in_merged_cell(ws, img: XLImage, col: int, row_top: int, row_b
     img.anchor = OneCellAnchor(_from=marker, ext=size)
 
 
+_THIN = Side(style="thin")
+_THICK = Side(style="medium")
+_NO_LINE = Side(style=None)
+
+_FONTS = {
+    "header": Font(size=11, bold=True),
+    "no": Font(size=12, bold=True),
+    "title": Font(size=14, bold=True),
+    "norm": DEFAULT_FONT,  # 本文はブックの既定フォント（Calibri / テーマ minor）のまま
+}
+_ALIGN = Alignment(vertical="center", horizontal="left", wrap_text=True)
+
+
+# セル書式の組み合わせ: (フォント, 外周の上端か, 外周の下端か, 列位置)
+StyleKey = Tuple[str, bool, bool, str]
+
+
+def _style_key(font: str, is_top: bool, is_bottom: bool, col: int) -> StyleKey:
+    pos = "first" if col == COL_NO else "last" if col == COL_NOTE else "img" if col == COL_IMG else "inner"
+    return font, is_top, is_bottom, pos
+
+
+def _block_font(line: int, col: int) -> str:
+    if line == 0 and col == COL_NO:
+        return "no"
+    if line == 0 and col == COL_NCNAME:
+        return "title"
+    return "norm"
+
+
+# ヘッダー行の列ごとの書式
+HEADER_STYLE_KEYS: List[StyleKey] = [_style_key("header", True, True, c) for c in range(COL_NO, COL_NOTE + 1)]
+
+# 縦結合する列（ブロック内の全行を1セルにする）
+MERGED_COLS = (COL_NO, COL_NCNAME, COL_CALIBER, COL_IDENT, COL_H, COL_D, COL_IMG, COL_NOTE)
+
+# 手入力欄（先頭行に空文字を書く）
+_MANUAL_COLS = (COL_CALIBER, COL_IDENT, COL_H, COL_D, COL_NOTE)
+
+
+def _block_border(key: StyleKey) -> Border:
+    """
+    ブロック外周は太線、内側は細線。画像列は縦結合なので内部横線を消す。
+    """
+    _font, is_top, is_bottom, pos = key
+    inner = _NO_LINE if pos == "img" else _THIN
+    return Border(
+        left=_THICK if pos == "first" else _THIN,
+        right=_THICK if pos == "last" else _THIN,
+        top=_THICK if is_top else inner,
+        bottom=_THICK if is_bottom else inner,
+    )
+
+
+# ----------------------------
+# 行の種別ごとの値（種別 / 名称 / 詳細）
+# ----------------------------
+_SEP = " / "
+
+
+def _holder_detail(rec, L: dict) -> str:
+    return (
+        f"{L['d_diameter']}: {_safe_str(rec.tool_diameter_mm)}{_SEP}"
+        f"{L['d_flutes']}: {_safe_str(rec.tool_flutes)}{_SEP}"
+        f"{L['d_radius']}: {_safe_str(rec.tool_corner_radius_mm)}\n"
+        f"{L['d_shank']}: {_safe_str(rec.tool_shank_d_mm)}\n"
+        f"{L['d_taper']}: {_safe_str(rec.tool_taper_angle_deg)}{_SEP}"
+        f"{L['d_rotation']}: {_safe_str(rec.spindle_rotation)}"
+    )
+
+
+def _ext_overhang(rec, L: dict) -> str:
+    return f"{L['d_ext_overhang']}: {_safe_str(getattr(rec, 'ext_overhang_mm', '0'))}"
+
+
+def _tool_overhang(rec, L: dict) -> str:
+    return f"{L['d_tool_overhang']}: {_safe_str(getattr(rec, 'tool_overhang_mm', ''))}"
+
+
+def _extensions(rec) -> List[str]:
+    text = _safe_str(getattr(rec, "extensions_str", ""))
+    return text.split(_SEP) if text else []
+
+
+def _line_holder(rec, L: dict) -> Tuple[str, str, str]:
+    return L["kind_holder"], _safe_str(rec.holder_name or rec.holder_page_name), _holder_detail(rec, L)
+
+
+def _line_extension(rec, L: dict) -> Tuple[str, str, str]:
+    return (
+        L["kind_extension"],
+        _safe_str(getattr(rec, "extensions_str", "")),
+        f"{_ext_overhang(rec, L)}{_SEP}{_tool_overhang(rec, L)}",
+    )
+
+
+def _line_tool(rec, L: dict) -> Tuple[str, str, str]:
+    return (
+        L["kind_tool"],
+        _safe_str(rec.tool_page_name or rec.tool_name),
+        f"{L['d_overhang']}: {_safe_str(getattr(rec, 'overhang_mm', ''))}",
+    )
+
+
+def _line_holder_extension(rec, L: dict) -> Tuple[str, str, str]:
+    # 2行レイアウト: holder 行に extension をまとめる
+    kind, name, detail = _line_holder(rec, L)
+    ext = _safe_str(getattr(rec, "extensions_str", ""))
+    if ext:
+        kind = f"{kind}{_SEP}{L['kind_extension']}"
+        name = f"{name}\n{ext}"
+    return kind, name, f"{detail}\n{_ext_overhang(rec, L)}{_SEP}{_tool_overhang(rec, L)}"
+
+
+def _line_extension_first(rec, L: dict) -> Tuple[str, str, str]:
+    # 4行レイアウト: 1つ目の extension
+    exts = _extensions(rec)
+    return L["kind_extension"], exts[0] if exts else "", _ext_overhang(rec, L)
+
+
+def _line_extension_rest(rec, L: dict) -> Tuple[str, str, str]:
+    # 4行レイアウト: 2つ目以降の extension
+    return L["kind_extension"], _SEP.join(_extensions(rec)[1:]), _tool_overhang(rec, L)
+
+
+_LINE_VALUES: Dict[str, Callable[[object, dict], Tuple[str, str, str]]] = {
+    "holder": _line_holder,
+    "extension": _line_extension,
+    "tool": _line_tool,
+    "holder+extension": _line_holder_extension,
+    "extension1": _line_extension_first,
+    "extension2+": _line_extension_rest,
+}
+
+
+@dataclass(frozen=True)
+class F2BlockPlan:
+    """
+    1ブロックの形をコンパイルしたもの（全レコード共通。値だけがレコードごとに変わる）。
+      - lines       : 行ごとの種別（_LINE_VALUES のキー）
+      - style_keys  : 行 × 列の書式（StyleKey）。バックエンドはこれを書式ID / スタイル配列に解決して使う
+      - merged_cols : ブロック内の全行を縦結合する列
+    """
+    name: str
+    lines: Tuple[str, ...]
+    style_keys: Tuple[Tuple[StyleKey, ...], ...]
+    merged_cols: Tuple[int, ...] = MERGED_COLS
+    row_height: float = _BLOCK_ROW_HEIGHT
+
+    @property
+    def n_lines(self) -> int:
+        return len(self.lines)
+
+    def values(self, rec, L: dict) -> List[List[object]]:
+        """
+        1ブロック分のセル値（行数 × 11列、値を書かないセルは None）。
+        呼径/識別/補正H/補正D/追記 は手入力欄なので常に空で出力する。
+        """
+        rows: List[List[object]] = [[None] * COL_NOTE for _ in self.lines]
+        top = rows[0]
+        top[COL_NO - 1] = rec.nctool_no
+        top[COL_NCNAME - 1] = rec.nctool_name
+        for c in _MANUAL_COLS:
+            top[c - 1] = ""
+        for row, kind in zip(rows, self.lines):
+            row[COL_KIND - 1], row[COL_COMP - 1], row[COL_DETAIL - 1] = _LINE_VALUES[kind](rec, L)
+        return rows
+
+
+def compile_f2_plan(name: str, lines: Sequence[str]) -> F2BlockPlan:
+    unknown = [k for k in lines if k not in _LINE_VALUES]
+    if not lines or unknown:
+        raise ValueError(f"invalid F2 block lines: {list(lines)!r}")
+    last = len(lines) - 1
+    style_keys = tuple(
+        tuple(_style_key(_block_font(line, c), line == 0, line == last, c) for c in range(COL_NO, COL_NOTE + 1))
+        for line in range(len(lines))
+    )
+    return F2BlockPlan(name=name, lines=tuple(lines), style_keys=style_keys)
+
+
+F2Layout = Literal["3row", "2row", "4row"]
+
+F2_LAYOUTS: Dict[str, F2BlockPlan] = {
+    "3row": compile_f2_plan("3row", ("holder", "extension", "tool")),
+    "2row": compile_f2_plan("2row", ("holder+extension", "tool")),
+    "4row": compile_f2_plan("4row", ("holder", "extension1", "extension2+", "tool")),
+}
+
+
+def f2_plan(layout: F2Layout) -> F2BlockPlan:
+    plan = F2_LAYOUTS.get(layout)
+    if plan is None:
+        raise ValueError(f"unknown F2 layout: {layout!r}")
+    return plan
+
+
+class _F2Styles:
+    """
+    F2 のセル書式（フォント × 罫線 × 配置）の組み合わせを NamedStyle として1回だけ登録し、
+    そのスタイル配列をセルへコピーする（セルごとに Font / Border を作って比較しない・名前も引かない）。
+    組み合わせはヘッダー行と、ブロックの上端・中間・下端行 × 列位置（左端 / 画像列 / 右端 / その他）だけ。
+    """
+
+    def __init__(self, wb, plan: F2BlockPlan) -> None:
+        self._wb = wb
+        self._arrays: Dict[StyleKey, StyleArray] = {}
+        self.header = [self._array(key) for key in HEADER_STYLE_KEYS]
+        self.block = [[self._array(key) for key in keys] for keys in plan.style_keys]
+
+    def _array(self, key: StyleKey) -> StyleArray:
+        arr = self._arrays.get(key)
+        if arr is None:
+            font, is_top, is_bottom, pos = key
+            style = NamedStyle(
+                name=f"F2 {font} {'T' if is_top else ''}{'B' if is_bottom else ''} {pos}",
+                font=_FONTS[font],
+                border=_block_border(key),
+                alignment=_ALIGN,
+            )
+            self._wb.add_named_style(style)
+            arr = self._arrays[key] = style.as_tuple()
+        return arr
+
+
+def _stamp_row(ws, row: int, values: Sequence[object], styles: Sequence[StyleArray]) -> None:
+    for col, (v, arr) in enumerate(zip(values, styles), start=COL_NO):
+        cell = ws.cell(row, col)
+        if v is not None:
+            cell.value = v
+        cell._style = copy(arr)
+
+
 def export_blocks_f2_xlsx(
-    records: List[NcToolRecord],
+    records: Records,
     out_xlsx: Path,
     *,
     embed_images: bool = True,
-    block_rows: int = 3,
+    block_rows: Optional[int] = None,
     start_row: int = 2,
     lang: Lang = "ja",
+    thumbs: Optional[Sequence[Optional[bytes]]] = None,
+    backend: F2Backend = "openpyxl",
+    layout: F2Layout = "3row",
 ) -> Tuple[int, int]:
     """
     ヘッダー:
       No / NCツール名 / 呼径 / 識別 / 補正H / 補正D / 画像 / 種別 / 名称 / 詳細 / 追記
 
     呼径/識別/補正H/補正D は手入力欄なので常に空で出力する。
+    thumbs: レコード順の縮小PNGバイト列。指定時は image_cached_path ではなくメモリから埋め込む
+            （同じ内容の画像はブック内で1つの media パーツを共有する）
+    backend:
+      - "openpyxl": Workbook を組み立てて保存する（既定）
+      - "raw"     : sheet1.xml / drawing1.xml を zip へ直接流す（export_xlsx_blocks_raw）。
+                    出力内容は同じで、メモリはブロック数に比例しない
+    layout: ブロックの形（F2_LAYOUTS）。
+      - "3row": holder / extension / tool（既定）
+      - "2row": holder + extension / tool
+      - "4row": holder / 1つ目の extension / 2つ目以降の extension / tool
+    block_rows: ブロックの間隔（行数）。None ならブロックの行数。
+    ブロックの形は F2BlockPlan に1回だけコンパイルし、各レコードは値を差し込むだけ。
+    画像は寸法だけ読む遅延ハンドルで扱い、全ブロックの配置（layout_f2_blocks）を先に決めてから書く。
     """
+    plan = f2_plan(layout)
+    if backend == "raw":
+        from .export_xlsx_blocks_raw import write_blocks_f2_raw
+
+        return write_blocks_f2_raw(
+            records,
+            out_xlsx,
+            embed_images=embed_images,
+            block_rows=block_rows,
+            start_row=start_row,
+            lang=lang,
+            thumbs=thumbs,
+            plan=plan,
+        )
+    if backend != "openpyxl":
+        raise ValueError(f"unknown F2 backend: {backend!r}")
+
     L = _LABELS.get(lang, _LABELS["ja"])
 
     out_xlsx.parent.mkdir(parents=True, exist_ok=True)
@@ -160,128 +474,57 @@ def export_blocks_f2_xlsx(
     ws = wb.active
     ws.title = L["sheet_title"]
 
-    # columns
-    COL_NO = 1
-    COL_NCNAME = 2
-    COL_CALIBER = 3   # 手入力
-    COL_IDENT = 4     # 手入力
-    COL_H = 5         # 手入力
-    COL_D = 6         # 手入力
-    COL_IMG = 7       # 画像
-    COL_KIND = 8      # 種別
-    COL_COMP = 9      # 名称
-    COL_DETAIL = 10   # 詳細
-    COL_NOTE = 11     # 手入力
-
-    sep = " / "
-
-    _fit_columns(
-        ws,
-        {
-            COL_NO: 6,
-            COL_NCNAME: 24,
-            COL_CALIBER: 7,
-            COL_IDENT: 7,
-            COL_H: 7,
-            COL_D: 7,
-            COL_IMG: 40,
-            COL_KIND: 12,
-            COL_COMP: 55,
-            COL_DETAIL: 55,
-            COL_NOTE: 50,
-        },
-    )
+    _fit_columns(ws, _COL_WIDTHS)
 
-    font_header = Font(size=11, bold=True)
-    font_title = Font(size=14, bold=True)
-    font_norm = Font(size=11)
-    align_vcenter_left = Alignment(vertical="center", horizontal="left", wrap_text=True)
+    styles = _F2Styles(wb, plan)
 
     # header
     ws.row_dimensions[1].height = 22
     headers = L["headers"]
-    for i, text in enumerate(headers, start=1):
-        cell = ws.cell(1, i)
-        cell.value = text
-        cell.font = font_header
-        cell.alignment = align_vcenter_left
-    _apply_block_border(ws, 1, 1, COL_NOTE, img_col=COL_IMG)
+    _stamp_row(ws, 1, headers, styles.header)
+
+    media = MediaPool()
+    images: List[Optional[XLImage]] = []
+    for k, rec in enumerate(records):
+        img = None
+        if embed_images:
+            try:
+                img = media.open(thumbs, k, rec.image_cached_path)
+            except Exception:
+                pass
+        images.append(img)
+
+    layouts = layout_f2_blocks(
+        [(img.width, img.height) if img is not None else None for img in images],
+        block_rows=block_rows,
+        start_row=start_row,
+        lines=plan.n_lines,
+    )
 
     img_count = 0
     written = 0
 
-    for rec in records:
-        r1 = start_row + written * block_rows
-        r2, r3 = r1 + 1, r1 + 2
+    for rec, img, lay in zip(records, images, layouts):
+        r1, r_last = lay.row_top, lay.row_bottom
 
-        for rr in (r1, r2, r3):
-            ws.row_dimensions[rr].height = 80
+        for rr in range(r1, r_last + 1):
+            ws.row_dimensions[rr].height = plan.row_height
 
         # merge (tool-wide columns)
-        for c in (COL_NO, COL_NCNAME, COL_CALIBER, COL_IDENT, COL_H, COL_D, COL_IMG, COL_NOTE):
-            ws.merge_cells(start_row=r1, start_column=c, end_row=r3, end_column=c)
-
-        # common fields (write only at r1)
-        ws.cell(r1, COL_NO).value = rec.nctool_no
-        ws.cell(r1, COL_NO).font = Font(size=12, bold=True)
-
-        ws.cell(r1, COL_NCNAME).value = rec.nctool_name
-        ws.cell(r1, COL_NCNAME).font = font_title
-
-        # 手入力欄：空で固定
-        ws.cell(r1, COL_CALIBER).value = ""
-        ws.cell(r1, COL_IDENT).value = ""
-        ws.cell(r1, COL_H).value = ""
-        ws.cell(r1, COL_D).value = ""
-        ws.cell(r1, COL_NOTE).value = ""
-
-        # row1 holder
-        holder = rec.holder_name or rec.holder_page_name
-        ws.cell(r1, COL_KIND).value = L["kind_holder"]
-        ws.cell(r1, COL_COMP).value = _safe_str(holder)
-        ws.cell(r1, COL_DETAIL).value = (
-            f"{L['d_diameter']}: {_safe_str(rec.tool_diameter_mm)}{sep}"
-            f"{L['d_flutes']}: {_safe_str(rec.tool_flutes)}{sep}"
-            f"{L['d_radius']}: {_safe_str(rec.tool_corner_radius_mm)}\n"
-            f"{L['d_shank']}: {_safe_str(rec.tool_shank_d_mm)}\n"
-            f"{L['d_taper']}: {_safe_str(rec.tool_taper_angle_deg)}{sep}"
-            f"{L['d_rotation']}: {_safe_str(rec.spindle_rotation)}"
-        )
+        for c in plan.merged_cols:
+            ws.merge_cells(start_row=r1, start_column=c, end_row=r_last, end_column=c)
 
-        # row2 extension
-        ws.cell(r2, COL_KIND).value = L["kind_extension"]
-        ws.cell(r2, COL_COMP).value = _safe_str(getattr(rec, "extensions_str", ""))
-        ws.cell(r2, COL_DETAIL).value = (
-            f"{L['d_ext_overhang']}: {_safe_str(getattr(rec, 'ext_overhang_mm', '0'))}{sep}"
-            f"{L['d_tool_overhang']}: {_safe_str(getattr(rec, 'tool_overhang_mm', ''))}"
-        )
-
-        # row3 tool
-        tool = rec.tool_page_name or rec.tool_name
-        ws.cell(r3, COL_KIND).value = L["kind_tool"]
-        ws.cell(r3, COL_COMP).value = _safe_str(tool)
-        ws.cell(r3, COL_DETAIL).value = f"{L['d_overhang']}: {_safe_str(getattr(rec, 'overhang_mm', ''))}"
-
-        # style
-        for rr in (r1, r2, r3):
-            for cc in range(COL_NO, COL_NOTE + 1):
-                cell = ws.cell(rr, cc)
-                if cell.font is None or cell.font == Font():
-                    cell.font = font_norm
-                cell.alignment = align_vcenter_left
+        # 値と書式（コンパイル済みのスタイル配列）を1セル1回で書く
+        for rr, values, arrays in zip(range(r1, r_last + 1), plan.values(rec, L), styles.block):
+            _stamp_row(ws, rr, values, arrays)
 
         # image
-        if embed_images and rec.image_cached_path:
-            try:
-                img = XLImage(str(rec.image_cached_path))
-                ws.add_image(img, ws.cell(r1, COL_IMG).coordinate)
-                _center_image_in_merged_cell(ws, img, col=COL_IMG, row_top=r1, row_bottom=r3)
-                img_count += 1
-            except Exception:
-                pass
+        if img is not None:
+            ws.add_image(img, ws.cell(r1, COL_IMG).coordinate)
+            _anchor_image(img, COL_IMG, lay)
+            img_count += 1
 
-        _apply_block_border(ws, r1, r3, COL_NOTE, img_col=COL_IMG)
         written += 1
 
-    wb.save(out_xlsx)
-    return written, img_count
\ No newline at end of file
+    media.save(wb, out_xlsx)
+    return written, img_count
@@ -0,0 +1,341 @@
+# src/hypermill_nctools_html_exporter/export_xlsx_blocks_raw.py
+"""
+F2帳票（3行ブロック）を openpyxl の Workbook を組み立てずに書く raw OOXML バックエンド。
+
+sheet1.xml は1ブロックずつ zip に直接流し、drawing1.xml の画像アンカーは一時ファイルに溜めてから
+まとめて書く。結合範囲はブロック位置から計算し直すので保持しない。
+セル書式は export_xlsx_blocks と同じ組み合わせ（HEADER_STYLE_KEYS / F2BlockPlan.style_keys）を
+styles.xml の cellXfs に並べ、そのインデックスを直接書く。
+メモリに残るのは共有 media パーツ（同じ内容は1つ）と書式表だけで、ブロック数には比例しない。
+"""
+from __future__ import annotations
+
+import datetime
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.units import pixels_to_EMU
+
+from .export_xlsx_blocks import (
+    COL_IMG,
+    COL_NOTE,
+    F2_LAYOUTS,
+    HEADER_STYLE_KEYS,
+    F2BlockPlan,
+    StyleKey,
+    _COL_WIDTHS,
+    _FONTS,
+    _LABELS,
+    Lang,
+    _block_border,
+    layout_f2_block,
+)
+from .model import Records
+from .xlsx_media import MediaPool
+
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+_NS_XDR = "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing"
+_NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_CT_SHEET = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+_CT_DRAWING = "application/vnd.openxmlformats-officedocument.drawing+xml"
+
+_HEADER_ROW_HEIGHT = 22
+
+# XML 1.0 で書けない制御文字（openpyxl はここで例外にするが、帳票では落とす）
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _font_xml(key: str) -> str:
+    # "norm"（ブックの既定フォント）は fontId=0 を使うのでここには来ない
+    f = _FONTS[key]
+    bold = '<b val="1"/>' if f.b else ""
+    return f'<font>{bold}<sz val="{f.sz:g}"/></font>'
+
+
+def _border_xml(key: StyleKey) -> str:
+    b = _block_border(key)
+    parts = []
+    for side in ("left", "right", "top", "bottom"):
+        style = getattr(b, side).style
+        parts.append(f'<{side} style="{style}"/>' if style else f"<{side}/>")
+    return f"<border>{''.join(parts)}<diagonal/></border>"
+
+
+class _StyleTable:
+    """
+    StyleKey -> cellXfs インデックス。0 は既定書式。
+    フォント "norm" は既定フォント（fontId=0）、それ以外は fonts の2つ目以降に並べる。
+    """
+
+    def __init__(self, plan: F2BlockPlan) -> None:
+        self.fonts: List[str] = []
+        self.borders: List[StyleKey] = []
+        self.xfs: Dict[StyleKey, int] = {}
+        for keys in [HEADER_STYLE_KEYS, *plan.style_keys]:
+            for key in keys:
+                if key not in self.xfs:
+                    if key[0] != "norm" and key[0] not in self.fonts:
+                        self.fonts.append(key[0])
+                    self.borders.append(key)
+                    self.xfs[key] = len(self.xfs) + 1
+
+    def _font_id(self, font: str) -> int:
+        return 0 if font == "norm" else self.fonts.index(font) + 1
+
+    def ids(self, keys: Sequence[StyleKey]) -> List[int]:
+        return [self.xfs[k] for k in keys]
+
+    def xml(self) -> str:
+        fonts = "".join(_font_xml(k) for k in self.fonts)
+        borders = "".join(_border_xml(k) for k in self.borders)
+        xfs = "".join(
+            f'<xf numFmtId="0" fontId="{self._font_id(key[0])}" fillId="0" '
+            f'borderId="{self.borders.index(key) + 1}" xfId="0" applyFont="1" applyBorder="1" applyAlignment="1">'
+            '<alignment horizontal="left" vertical="center" wrapText="1"/></xf>'
+            for key in self.xfs
+        )
+        return (
+            f'{_XML_DECL}<styleSheet xmlns="{_NS_MAIN}">'
+            f'<fonts count="{len(self.fonts) + 1}">'
+            '<font><sz val="11"/><color theme="1"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+            f"{fonts}</fonts>"
+            '<fills count="2"><fill><patternFill/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+            f'<borders count="{len(self.borders) + 1}"><border><left/><right/><top/><bottom/><diagonal/></border>'
+            f"{borders}</borders>"
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(self.xfs) + 1}"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+            f"{xfs}</cellXfs>"
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            "</styleSheet>"
+        )
+
+
+def _cell_xml(ref: str, style: int, value) -> str:
+    if value is None or value == "":
+        return f'<c r="{ref}" s="{style}"/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}" s="{style}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}" s="{style}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c r="{ref}" s="{style}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row_xml(row: int, height: float, values: Sequence[object], styles: Sequence[int], letters: Sequence[str]) -> str:
+    cells = "".join(_cell_xml(f"{letters[c]}{row}", styles[c], values[c]) for c in range(len(letters)))
+    return f'<row r="{row}" ht="{height:g}" customHeight="1">{cells}</row>'
+
+
+def _anchor_xml(pic_id: int, rel_id: str, layout) -> str:
+    off_x_px, off_y_px = layout.image_offset
+    w_px, h_px = layout.image_size
+    return (
+        "<xdr:oneCellAnchor>"
+        f"<xdr:from><xdr:col>{COL_IMG - 1}</xdr:col><xdr:colOff>{pixels_to_EMU(off_x_px)}</xdr:colOff>"
+        f"<xdr:row>{layout.row_top - 1}</xdr:row><xdr:rowOff>{pixels_to_EMU(off_y_px)}</xdr:rowOff></xdr:from>"
+        f'<xdr:ext cx="{pixels_to_EMU(w_px)}" cy="{pixels_to_EMU(h_px)}"/>'
+        "<xdr:pic>"
+        f'<xdr:nvPicPr><xdr:cNvPr id="{pic_id}" name="Image {pic_id}" descr="Picture"/><xdr:cNvPicPr/></xdr:nvPicPr>'
+        f'<xdr:blipFill><a:blip r:embed="{rel_id}" cstate="print"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+        '<xdr:spPr><a:prstGeom prst="rect"/></xdr:spPr>'
+        "</xdr:pic><xdr:clientData/></xdr:oneCellAnchor>"
+    )
+
+
+def _rels_xml(rels: Sequence[Tuple[str, str, str]]) -> str:
+    body = "".join(f'<Relationship Id="{rid}" Type="{typ}" Target={quoteattr(target)}/>' for rid, typ, target in rels)
+    return f'{_XML_DECL}<Relationships xmlns="{_NS_PKG_REL}">{body}</Relationships>'
+
+
+def _package_parts(sheet_title: str, has_drawing: bool, media_exts: Sequence[str]) -> Dict[str, str]:
+    now = datetime.datetime.now(tz=datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    defaults = "".join(
+        f'<Default Extension="{ext}" ContentType="image/{ext}"/>' for ext in sorted(set(media_exts))
+    )
+    overrides = [
+        ("/xl/workbook.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"),
+        ("/xl/styles.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"),
+        ("/xl/worksheets/sheet1.xml", _CT_SHEET),
+        ("/docProps/core.xml", "application/vnd.openxmlformats-package.core-properties+xml"),
+        ("/docProps/app.xml", "application/vnd.openxmlformats-officedocument.extended-properties+xml"),
+    ]
+    if has_drawing:
+        overrides.append(("/xl/drawings/drawing1.xml", _CT_DRAWING))
+    rel = _NS_REL
+    return {
+        "[Content_Types].xml": (
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f"{defaults}"
+            + "".join(f'<Override PartName="{p}" ContentType="{ct}"/>' for p, ct in overrides)
+            + "</Types>"
+        ),
+        "_rels/.rels": _rels_xml([
+            ("rId1", f"{rel}/officeDocument", "xl/workbook.xml"),
+            ("rId2", "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties",
+             "docProps/core.xml"),
+            ("rId3", f"{rel}/extended-properties", "docProps/app.xml"),
+        ]),
+        "docProps/app.xml": (
+            f"{_XML_DECL}<Properties "
+            'xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            "<Application>Microsoft Excel</Application></Properties>"
+        ),
+        "docProps/core.xml": (
+            f"{_XML_DECL}<cp:coreProperties "
+            'xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            "<dc:creator>hypermill-nctools-html-exporter</dc:creator>"
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified>'
+            "</cp:coreProperties>"
+        ),
+        "xl/workbook.xml": (
+            f'{_XML_DECL}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+            '<bookViews><workbookView activeTab="0"/></bookViews>'
+            f'<sheets><sheet name={quoteattr(sheet_title)} sheetId="1" r:id="rId1"/></sheets>'
+            '<calcPr calcId="124519" fullCalcOnLoad="1"/></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": _rels_xml([
+            ("rId1", f"{rel}/worksheet", "worksheets/sheet1.xml"),
+            ("rId2", f"{rel}/styles", "styles.xml"),
+        ]),
+    }
+
+
+def write_blocks_f2_raw(
+    records: Records,
+    out_xlsx: Path,
+    *,
+    embed_images: bool = True,
+    block_rows: Optional[int] = None,
+    start_row: int = 2,
+    lang: Lang = "ja",
+    thumbs: Optional[Sequence[Optional[bytes]]] = None,
+    plan: F2BlockPlan = F2_LAYOUTS["3row"],
+) -> Tuple[int, int]:
+    """
+    export_blocks_f2_xlsx(backend="raw") の実体。引数・戻り値・出力内容（セル値・書式・結合・画像配置）は
+    openpyxl バックエンドと同じ。
+    records はレコードを順に1回なめるだけなので、イテレータ（pipeline.RecordPipeline など）でもよい。
+    """
+    L = _LABELS.get(lang, _LABELS["ja"])
+    out_xlsx.parent.mkdir(parents=True, exist_ok=True)
+
+    styles = _StyleTable(plan)
+    header_styles = styles.ids(HEADER_STYLE_KEYS)
+    block_styles = [styles.ids(keys) for keys in plan.style_keys]
+    lines = plan.n_lines
+    step = block_rows or lines
+    letters = [get_column_letter(c) for c in range(1, COL_NOTE + 1)]
+
+    media = MediaPool()
+    parts: Dict[str, object] = {}  # media パーツ -> 書き出し用ハンドル（同じ内容は1つ）
+    rel_ids: Dict[str, str] = {}  # media パーツ -> drawing の rId
+    # 件数が分からない（イテレータで渡された）ときは dimension を省く（省略可能な要素）
+    n = len(records) if hasattr(records, "__len__") else None
+    dimension = ""
+    if n is not None:
+        dimension = f'<dimension ref="A1:{letters[-1]}{start_row + (n - 1) * step + lines - 1 if n else 1}"/>'
+    img_count = 0
+    written = 0
+
+    with ZipFile(out_xlsx, "w", ZIP_DEFLATED, allowZip64=True) as zf, tempfile.TemporaryFile() as anchors:
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            cols = "".join(
+                f'<col min="{c}" max="{c}" width="{w:g}" customWidth="1"/>' for c, w in sorted(_COL_WIDTHS.items())
+            )
+            sheet.write((
+                f'{_XML_DECL}<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}">'
+                f"{dimension}"
+                '<sheetViews><sheetView workbookViewId="0"><selection activeCell="A1" sqref="A1"/></sheetView></sheetViews>'
+                '<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>'
+                f"<cols>{cols}</cols><sheetData>"
+                + _row_xml(1, _HEADER_ROW_HEIGHT, L["headers"], header_styles, letters)
+            ).encode("utf-8"))
+
+            for k, rec in enumerate(records):
+                img = None
+                if embed_images:
+                    try:
+                        img = media.open(thumbs, k, rec.image_cached_path)
+                    except Exception:
+                        pass
+                layout = layout_f2_block(
+                    k,
+                    (img.width, img.height) if img is not None else None,
+                    block_rows=block_rows,
+                    start_row=start_row,
+                    lines=lines,
+                )
+
+                rows = [
+                    _row_xml(layout.row_top + line, plan.row_height, values, block_styles[line], letters)
+                    for line, values in enumerate(plan.values(rec, L))
+                ]
+                sheet.write("".join(rows).encode("utf-8"))
+
+                if img is not None:
+                    rid = rel_ids.get(img.path)
+                    if rid is None:
+                        rid = rel_ids[img.path] = f"rId{len(rel_ids) + 1}"
+                        parts[img.path] = img
+                    img_count += 1
+                    anchors.write(_anchor_xml(img_count, rid, layout).encode("utf-8"))
+                written += 1
+
+            sheet.write(b"</sheetData>")
+            if written:
+                sheet.write(f'<mergeCells count="{written * len(plan.merged_cols)}">'.encode("utf-8"))
+                # 結合範囲はブロック先頭行からのオフセットで決まる（ブロックごとに保持しない）
+                spans = [(letters[c - 1], lines - 1) for c in plan.merged_cols]
+                for k in range(written):
+                    r1 = start_row + k * step
+                    sheet.write("".join(
+                        f'<mergeCell ref="{col}{r1}:{col}{r1 + span}"/>' for col, span in spans
+                    ).encode("utf-8"))
+                sheet.write(b"</mergeCells>")
+            sheet.write(b'<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>')
+            if img_count:
+                sheet.write(b'<drawing r:id="rId1"/>')
+            sheet.write(b"</worksheet>")
+
+        if img_count:
+            rel = _NS_REL
+            zf.writestr(
+                "xl/worksheets/_rels/sheet1.xml.rels",
+                _rels_xml([("rId1", f"{rel}/drawing", "../drawings/drawing1.xml")]),
+            )
+            with zf.open("xl/drawings/drawing1.xml", "w", force_zip64=True) as drawing:
+                drawing.write(
+                    f'{_XML_DECL}<xdr:wsDr xmlns:xdr="{_NS_XDR}" xmlns:a="{_NS_A}" xmlns:r="{_NS_REL}">'.encode("utf-8")
+                )
+                anchors.seek(0)
+                shutil.copyfileobj(anchors, drawing)
+                drawing.write(b"</xdr:wsDr>")
+            zf.writestr(
+                "xl/drawings/_rels/drawing1.xml.rels",
+                _rels_xml([(rid, f"{rel}/image", f"..{path[3:]}") for path, rid in rel_ids.items()]),
+            )
+            for path, img in parts.items():
+                zf.writestr(path[1:], img._data())
+
+        zf.writestr("xl/styles.xml", styles.xml())
+        media_exts = [Path(p).suffix[1:] for p in parts]
+        for name, xml in _package_parts(L["sheet_title"], bool(img_count), media_exts).items():
+            zf.writestr(name, xml)
+
+    return written, img_count
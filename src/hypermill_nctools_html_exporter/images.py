@@ -1,13 +1,30 @@
 # src\hypermill_nctools_html_exporter\images.py
 from __future__ import annotations
 
+import io
+import struct
 from pathlib import Path
-from typing import Optional, Tuple
-import tempfile
+from typing import BinaryIO, Literal, Optional, Tuple, Union
 
 from PIL import Image
 
 
+# 縮小方式のプリセット
+#   fast    : JPEG は draft で縮小デコード + reduce で整数分の1 + BILINEAR で仕上げ
+#   balanced: draft/reduce は最終サイズの2倍までに留め、LANCZOS で仕上げ
+#   best    : 従来どおり原寸から LANCZOS（常に RGBA・常に再エンコード）。既定（出力を変えない）
+ResamplePreset = Literal["fast", "balanced", "best"]
+RESAMPLE_PRESETS: Tuple[ResamplePreset, ...] = ("fast", "balanced", "best")
+DEFAULT_RESAMPLE: ResamplePreset = "best"
+
+# プリセット -> (draft/reduce の余裕倍率, 仕上げフィルタ)。余裕倍率 0 は draft/reduce しない
+_PRESET_PARAMS = {
+    "fast": (1, Image.Resampling.BILINEAR),
+    "balanced": (2, Image.Resampling.LANCZOS),
+    "best": (0, Image.Resampling.LANCZOS),
+}
+
+
 def resolve_image_path(html_path: Path, image_rel_src: str) -> Optional[Path]:
     """
     HTML内の img src（例: img\\xxxx.png）を、実ファイルに解決する。
@@ -19,43 +36,168 @@ def resolve_image_path(html_path: Path, image_rel_src: str) -> Optional[Path]:
     return p if p.exists() and p.is_file() else None
 
 
-def make_temp_resized_png(
+def png_encoding_tag(png_level: Optional[int]) -> str:
+    """
+    PNG圧縮設定の識別子（キャッシュキー用）。
+    """
+    return "opt" if png_level is None else f"z{png_level}"
+
+
+def resample_tag(preset: ResamplePreset) -> str:
+    """
+    縮小方式の識別子（キャッシュキー用）。best は従来の "lanczos" のまま（既存キャッシュを活かす）。
+    """
+    if preset not in _PRESET_PARAMS:
+        raise ValueError(f"unknown resample preset: {preset}")
+    return "lanczos" if preset == "best" else preset
+
+
+def thumbnail_tag(preset: ResamplePreset, png_level: Optional[int]) -> str:
+    """
+    縮小PNGの作り方（縮小方式 + 圧縮設定）の識別子。キャッシュ・incremental の照合に使う。
+    """
+    return f"{resample_tag(preset)}-{png_encoding_tag(png_level)}"
+
+
+def _has_alpha(im: Image.Image) -> bool:
+    return im.mode in ("RGBA", "LA", "PA", "RGBa", "La") or "transparency" in im.info
+
+
+def thumb_size(w: int, h: int, max_px: int) -> Tuple[int, int]:
+    """
+    最大辺 max_px に収めたときの寸法（render_thumbnail_png の出力寸法と同じ。拡大はしない）。
+    """
+    m = max(w, h)
+    if m <= max_px or m <= 0:
+        return w, h
+    scale = max_px / m
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 寸法を持つ JPEG の SOF マーカー（DHT=C4, JPG=C8, DAC=CC を除く）
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _probe_jpeg(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    f.seek(2)
+    while True:
+        b = f.read(1)
+        while b == b"\xff":  # フィルバイト
+            b = f.read(1)
+        if not b:
+            return None
+        marker = b[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue  # 長さを持たないマーカー
+        seg = f.read(2)
+        if len(seg) < 2:
+            return None
+        (length,) = struct.unpack(">H", seg)
+        if marker in _JPEG_SOF:
+            body = f.read(5)
+            if len(body) < 5:
+                return None
+            h, w = struct.unpack(">HH", body[1:5])
+            return w, h
+        f.seek(length - 2, io.SEEK_CUR)
+
+
+def probe_image(src: Union[Path, bytes]) -> Optional[Tuple[str, int, int]]:
+    """
+    画像の (形式, 幅, 高さ) をヘッダーだけから読む（画素はデコードしない）。
+    PNG / JPEG はヘッダーを直接読み、それ以外は Pillow のヘッダー解析に任せる。
+    形式は小文字（"png" / "jpeg" / "gif" ...）。読めなければ None。
+    """
+    try:
+        f: BinaryIO = io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else open(src, "rb")
+        with f:
+            head = f.read(24)
+            if head.startswith(_PNG_SIGNATURE) and head[12:16] == b"IHDR":
+                w, h = struct.unpack(">II", head[16:24])
+                return "png", w, h
+            if head.startswith(b"\xff\xd8"):
+                size = _probe_jpeg(f)
+                return ("jpeg", *size) if size else None
+            f.seek(0)
+            with Image.open(f) as im:
+                return (im.format or "png").lower(), im.size[0], im.size[1]
+    except Exception:
+        return None
+
+
+def probe_image_size(src: Union[Path, bytes]) -> Optional[Tuple[int, int]]:
+    """
+    画像の (幅, 高さ) をヘッダーだけから読む。読めなければ None。
+    """
+    info = probe_image(src)
+    return (info[1], info[2]) if info else None
+
+
+def render_thumbnail_png(
+    src_img: Union[Path, bytes],
+    *,
+    max_px: int = 320,
+    png_level: Optional[int] = None,
+    preset: ResamplePreset = DEFAULT_RESAMPLE,
+) -> bytes:
+    """
+    画像を最大辺 max_px 以内に縮小したPNGのバイト列を返す（失敗時は例外）。
+    src_img: 画像ファイルのパス、または画像のバイト列（縮小済みPNGをさらに小さくするとき）
+    png_level: None=optimize=True（最小・最も遅い）/ 0-9=zlib圧縮レベル（optimize パスを省く）
+    preset: fast / balanced はアルファの無い画像を RGBA にせず、
+            max_px 以内の PNG は再エンコードせずにそのまま返す
+    """
+    gap, final_filter = _PRESET_PARAMS[preset]
+    with Image.open(io.BytesIO(src_img) if isinstance(src_img, bytes) else src_img) as im:
+        w, h = im.size
+        new_size = thumb_size(w, h, max_px)
+
+        if gap and new_size == (w, h) and im.format == "PNG":
+            return src_img if isinstance(src_img, bytes) else Path(src_img).read_bytes()
+
+        if gap and im.format == "JPEG":
+            # 1/2, 1/4, 1/8 の縮小デコード（new_size * gap 以上は残る）
+            im.draft("RGB", (new_size[0] * gap, new_size[1] * gap))
+
+        if preset == "best" or _has_alpha(im):
+            im = im.convert("RGBA")
+        elif im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+
+        if gap:
+            factor = min(im.size[0] // (new_size[0] * gap), im.size[1] // (new_size[1] * gap))
+            if factor >= 2:
+                im = im.reduce(factor)
+
+        if im.size != new_size:
+            im = im.resize(new_size, final_filter)
+
+        buf = io.BytesIO()
+        if png_level is None:
+            im.save(buf, format="PNG", optimize=True)
+        else:
+            im.save(buf, format="PNG", compress_level=png_level)
+    return buf.getvalue()
+
+
+def make_thumbnail_png(
     src_img: Path,
     *,
-    key_name: str = "",
     max_px: int = 320,
-) -> Tuple[Optional[Path], Optional[str]]:
+    png_level: Optional[int] = None,
+    preset: ResamplePreset = DEFAULT_RESAMPLE,
+) -> Tuple[Optional[bytes], Optional[str]]:
     """
-    画像をPNGとして「OSテンポラリ」に縮小保存する（出力先フォルダには一切作らない）。
-    戻り: (temp_png_path, error_message)
+    縮小PNGのバイト列を作る。
+    戻り: (png_bytes, error_message)
     """
     try:
         src_img = Path(src_img)
         if not src_img.exists():
             return None, f"画像が見つかりません: {src_img}"
-
-        with Image.open(src_img) as im:
-            im = im.convert("RGBA")
-            w, h = im.size
-            m = max(w, h)
-            if m > max_px and m > 0:
-                scale = max_px / m
-                new_w = max(1, int(w * scale))
-                new_h = max(1, int(h * scale))
-                im = im.resize((new_w, new_h), Image.Resampling.LANCZOS)
-
-            fd, tmp_name = tempfile.mkstemp(prefix="hmimg_", suffix=".png")
-            # fdは使わない（Windowsでロック回避のため閉じる）
-            try:
-                import os
-                os.close(fd)
-            except Exception:
-                pass
-
-            tmp_path = Path(tmp_name)
-            im.save(tmp_path, format="PNG", optimize=True)
-
-        return tmp_path, None
+        return render_thumbnail_png(src_img, max_px=max_px, png_level=png_level, preset=preset), None
 
     except Exception as e:
-        return None, f"画像縮小(temp)失敗: {src_img} ({e})"
+        return None, f"画像縮小失敗: {src_img} ({e})"
+
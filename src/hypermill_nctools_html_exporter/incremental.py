@@ -0,0 +1,131 @@
+# src/hypermill_nctools_html_exporter/incremental.py
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import os
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .model import NcToolRecord, RECORD_FIELDS as _RECORD_FIELDS
+from .util import atomic_write_bytes
+
+
+# 保存形式を変えたら上げる（3: pickle をやめて JSON。出力フォルダは共有フォルダのことが多く、他人が置いたファイルも読む）
+STATE_VERSION = 3
+
+STATE_SUFFIX = ".groups"
+
+ImageKey = Tuple[str, int, int]  # (abs path, size, mtime_ns)
+
+
+@dataclass
+class GroupEntry:
+    """
+    前回出力時の 1 NCツールグループ分の状態。
+    """
+    record: NcToolRecord
+    image_key: Optional[ImageKey] = None
+    thumb_png: Optional[bytes] = None  # 縮小済みPNG（max_px は状態ファイル単位で一致を確認）
+
+
+def state_path_for(out_xlsx: Path) -> Path:
+    """
+    指紋ファイルは出力XLSXの隣に置く（例: nctools_report__X.xlsx -> nctools_report__X.groups）
+    """
+    return out_xlsx.with_suffix(STATE_SUFFIX)
+
+
+def image_key(path: Optional[Path]) -> Optional[ImageKey]:
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (str(path), st.st_size, st.st_mtime_ns)
+
+
+def _decode_row(row: Any) -> NcToolRecord:
+    # 値は str / int / None、warnings だけ str のリスト。それ以外の形は ValueError
+    if not isinstance(row, list) or len(row) != len(_RECORD_FIELDS):
+        raise ValueError("bad row")
+    for name, v in zip(_RECORD_FIELDS, row):
+        if name == "warnings":
+            ok = isinstance(v, list) and all(isinstance(w, str) for w in v)
+        else:
+            ok = v is None or (isinstance(v, (str, int)) and not isinstance(v, bool))
+        if not ok:
+            raise ValueError(f"bad value for {name}")
+    return NcToolRecord(*row)
+
+
+def _decode_image_key(key: Any) -> Optional[ImageKey]:
+    if key is None:
+        return None
+    if (
+        isinstance(key, list)
+        and len(key) == 3
+        and isinstance(key[0], str)
+        and all(isinstance(v, int) and not isinstance(v, bool) for v in key[1:])
+    ):
+        return (key[0], key[1], key[2])
+    raise ValueError("bad image key")
+
+
+def load_state(path: Path, *, max_px: int, thumb_tag: str = "") -> Dict[str, GroupEntry]:
+    """
+    前回の指紋ファイル（JSON）を読む。無い/壊れている/形が違う/条件が違う場合は空（=全グループ再構築）。
+    """
+    try:
+        data = json.loads(path.read_bytes().decode("utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if data.get("version") != STATE_VERSION or data.get("fields") != list(_RECORD_FIELDS):
+        return {}
+    same_thumb = data.get("thumb") == [max_px, thumb_tag]
+    groups = data.get("groups")
+    if not isinstance(groups, dict):
+        return {}
+
+    out: Dict[str, GroupEntry] = {}
+    try:
+        for fp, entry in groups.items():
+            if not isinstance(entry, dict):
+                return {}
+            png = entry.get("png")
+            if png is not None and not isinstance(png, str):
+                return {}
+            out[fp] = GroupEntry(
+                record=_decode_row(entry.get("row")),
+                image_key=_decode_image_key(entry.get("image_key")),
+                thumb_png=base64.b64decode(png, validate=True) if png else None,
+            )
+            if not same_thumb:
+                out[fp].thumb_png = None  # 縮小サイズ・縮小方式が違うので画像は作り直す
+    except (ValueError, TypeError, binascii.Error):
+        return {}
+    return out
+
+
+def save_state(path: Path, entries: Dict[str, GroupEntry], *, max_px: int, thumb_tag: str = "") -> None:
+    groups = {}
+    for fp, e in entries.items():
+        # 画像パスは実行ごとに解決し直すので保存しない
+        rec = replace(e.record, image_abs_path=None, image_cached_path=None)
+        groups[fp] = {
+            "row": [getattr(rec, name) for name in _RECORD_FIELDS],
+            "image_key": list(e.image_key) if e.image_key else None,
+            "png": base64.b64encode(e.thumb_png).decode("ascii") if e.thumb_png else None,
+        }
+    payload = {
+        "version": STATE_VERSION,
+        "fields": list(_RECORD_FIELDS),
+        "thumb": [max_px, thumb_tag],
+        "groups": groups,
+    }
+    atomic_write_bytes(path, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
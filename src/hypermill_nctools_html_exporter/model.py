@@ -1,9 +1,10 @@
 #src\hypermill_nctools_html_exporter\model.py
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
 
 @dataclass
@@ -26,6 +27,8 @@ class NcToolRecord:
     tool_overhang_mm: str = ""     # 工具突き出し（tool_length相当を複写）
     overhang_mm: str = ""          # 突き出し長さ（ext + tool）
     total_length_mm: str = ""      # 全長（holder + ext + tool）
+    overhang_ld_ratio: str = ""    # L/D（突き出し長さ / 工具径）
+    tool_ld_ratio: str = ""        # L/D（工具突き出し / 工具径）
 
 
     # image
@@ -64,3 +67,114 @@ class NcToolRecord:
 
     # parsing warnings
     warnings: list[str] = field(default_factory=list)
+
+
+RECORD_FIELDS = tuple(f.name for f in fields(NcToolRecord))
+
+
+class RecordRow:
+    """
+    RecordTable の1行ビュー。NcToolRecord と同じ属性名で読み書きできる（値は表の列に直接入る）。
+    warnings は tuple で返す（追記は RecordTable.append 前の NcToolRecord で行う）。
+    """
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "RecordTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def to_record(self) -> NcToolRecord:
+        return self._table.record(self._index)
+
+    def __repr__(self) -> str:
+        return f"RecordRow({self._index}, nctool_name={self.nctool_name!r})"
+
+
+def _row_property(name: str) -> property:
+    def fget(row: RecordRow) -> Any:
+        return row._table._cols[name][row._index]
+
+    def fset(row: RecordRow, value: Any) -> None:
+        row._table._cols[name][row._index] = _intern(value)
+
+    return property(fget, fset)
+
+
+for _name in RECORD_FIELDS:
+    setattr(RecordRow, _name, _row_property(_name))
+del _name
+
+
+def _intern(v: Any) -> Any:
+    # 同じ文字列（ホルダー名・工具種別・HTMLパス等）は1つのオブジェクトを共有する
+    return sys.intern(v) if type(v) is str else v
+
+
+class RecordTable:
+    """
+    NcToolRecord の列指向版（フィールドごとの list を持つ）。
+    1レコード=1インスタンスの dataclass より小さく、asdict なしで行/列を読める。
+      - 文字列は sys.intern で共有
+      - warnings は tuple（空は共有の ()）
+      - 行は RecordRow（__slots__ のビュー）で返す
+    """
+    __slots__ = ("_cols", "_len")
+
+    def __init__(self) -> None:
+        self._cols: Dict[str, List[Any]] = {name: [] for name in RECORD_FIELDS}
+        self._len = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[NcToolRecord]) -> "RecordTable":
+        table = cls()
+        for rec in records:
+            table.append(rec)
+        return table
+
+    def append(self, rec: NcToolRecord) -> RecordRow:
+        for name, col in self._cols.items():
+            v = getattr(rec, name)
+            if name == "warnings":
+                col.append(tuple(v) if v else ())
+            else:
+                col.append(_intern(v))
+        self._len += 1
+        return RecordRow(self, self._len - 1)
+
+    def column(self, name: str) -> List[Any]:
+        """
+        列そのもの（コピーしない）。書き換えは set_column を使う。
+        """
+        return self._cols[name]
+
+    def set_column(self, name: str, values: Iterable[Any]) -> None:
+        col = [_intern(v) for v in values]
+        if len(col) != self._len:
+            raise ValueError(f"列 {name} の長さが一致しません: {len(col)} != {self._len}")
+        self._cols[name] = col
+
+    def record(self, index: int) -> NcToolRecord:
+        values = {name: col[index] for name, col in self._cols.items()}
+        values["warnings"] = list(values["warnings"])
+        return NcToolRecord(**values)
+
+    def to_records(self) -> List[NcToolRecord]:
+        return [self.record(i) for i in range(self._len)]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index: int) -> RecordRow:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        return RecordRow(self, index)
+
+    def __iter__(self) -> Iterator[RecordRow]:
+        for i in range(self._len):
+            yield RecordRow(self, i)
+
+
+# exporter / 数値ステージが受け付けるレコード列
+Records = Union[List[NcToolRecord], RecordTable]
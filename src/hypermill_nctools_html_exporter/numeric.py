@@ -0,0 +1,135 @@
+# src/hypermill_nctools_html_exporter/numeric.py
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .model import Records, RecordTable
+from .parse_html import _fmt_mm
+from .util import clean_text
+
+
+# 文字列 -> float 列に変換する寸法フィールド（長さ・径・R・角度）
+NUMERIC_FIELDS = (
+    "holder_length",
+    "tool_length",
+    "ext_overhang_mm",
+    "tool_overhang_mm",
+    "overhang_mm",
+    "tool_diameter_mm",
+    "tool_corner_radius_mm",
+    "tool_cut_length_ap_mm",
+    "tool_shank_d_mm",
+    "tool_chamfer_len_mm",
+    "tool_tip_len_mm",
+    "tool_taper_angle_deg",
+)
+
+# 数値ステージで計算して埋めるフィールド
+DERIVED_FIELDS = (
+    "total_length_mm",
+    "overhang_ld_ratio",
+    "tool_ld_ratio",
+)
+
+# 値の区切り（clean_text 後の文字列には現れない制御文字）
+_SEP = "\x1f"
+
+# 全角数字・全角記号を半角へ + 桁区切りカンマ除去（_to_float_mm と同じ正規化）
+_TRANS = str.maketrans({
+    **{chr(0xFF10 + i): str(i) for i in range(10)},
+    "．": ".",
+    "－": "-",
+    "＋": "+",
+    ",": None,
+})
+
+# 1値(= _SEP まで)ごとに1マッチ。最初の数値があれば group(1)、無ければ None
+_RE_FIRST_NUMBER = re.compile(r"(?:[^\d\x1f]*?([-+]?\d+(?:\.\d+)?)|)[^\x1f]*\x1f")
+
+
+@dataclass
+class NumericColumns:
+    """
+    数値ステージの結果。フィールド名 -> float64 配列（レコード順、欠損は NaN）。
+    """
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def value(self, name: str, index: int) -> Optional[float]:
+        x = self.columns[name][index]
+        return None if np.isnan(x) else float(x)
+
+
+def to_float_array(values: Sequence[str]) -> np.ndarray:
+    """
+    _to_float_mm を全要素まとめて行う版。
+    '130', '130,000', '１３０．０００ mm' などから最初の数値を取り出し、取れなければ NaN。
+    """
+    if not values:
+        return np.empty(0, dtype=np.float64)
+
+    text = _SEP.join([v or "" for v in values])
+    if text.count(_SEP) != len(values) - 1:
+        # 区切り文字を含む値がある（未整形の入力）
+        text = _SEP.join([clean_text(v) for v in values])
+
+    nums = [m.group(1) or "nan" for m in _RE_FIRST_NUMBER.finditer(text.translate(_TRANS) + _SEP)]
+    return np.array(nums, dtype=np.float64)
+
+
+def _fmt_ratio(x: float) -> str:
+    return "" if np.isnan(x) else f"{x:.2f}"
+
+
+def _column(records: Records, name: str) -> List[str]:
+    if isinstance(records, RecordTable):
+        return records.column(name)
+    return [getattr(rec, name) for rec in records]
+
+
+def numeric_stage(records: Records) -> NumericColumns:
+    """
+    全レコードの寸法フィールドを float 列へ一括変換し、
+    total_length_mm（holder + ext + tool）と L/D 比（突き出し / 工具径）を計算する。
+    計算結果は records の文字列フィールドにも書き戻す。
+    """
+    cols: Dict[str, np.ndarray] = {
+        name: to_float_array(_column(records, name)) for name in NUMERIC_FIELDS
+    }
+
+    # extension無しは 0 扱い（ext_overhang_mm は構成部品表が無いときだけ空）
+    total = cols["holder_length"] + np.nan_to_num(cols["ext_overhang_mm"]) + cols["tool_length"]
+
+    dia = cols["tool_diameter_mm"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = dia > 0
+        overhang_ld = np.where(valid, cols["overhang_mm"] / dia, np.nan)
+        tool_ld = np.where(valid, cols["tool_overhang_mm"] / dia, np.nan)
+
+    cols["total_length_mm"] = total
+    cols["overhang_ld_ratio"] = overhang_ld
+    cols["tool_ld_ratio"] = tool_ld
+
+    derived = {
+        "total_length_mm": ["" if np.isnan(t) else _fmt_mm(t) for t in total.tolist()],
+        "overhang_ld_ratio": [_fmt_ratio(x) for x in overhang_ld.tolist()],
+        "tool_ld_ratio": [_fmt_ratio(x) for x in tool_ld.tolist()],
+    }
+    if isinstance(records, RecordTable):
+        for name, values in derived.items():
+            records.set_column(name, values)
+    else:
+        for i, rec in enumerate(records):
+            for name, values in derived.items():
+                setattr(rec, name, values[i])
+
+    return NumericColumns(cols)
@@ -1,11 +1,19 @@
 # src/hypermill_nctools_html_exporter/parse_html.py
 from __future__ import annotations
 
+import codecs
+import hashlib
+import html
+import mmap
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Literal, Any, Mapping
 
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+from bs4 import BeautifulSoup, Tag, XMLParsedAsHTMLWarning
+from lxml import etree
 import warnings
 
 from .model import NcToolRecord
@@ -13,11 +21,20 @@ from .util import clean_text
 
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
+ParserBackend = Literal["bs4", "lxml"]
+
+# 解析結果（NcToolRecord の中身）が変わる修正をしたら上げる（解析キャッシュの無効化に使う）
+PARSER_VERSION = 2
+
+# stream=True 時の読み込み単位
+_STREAM_CHUNK_BYTES = 256 * 1024
+
 # ----------------------------
 # h3 patterns (JA/EN)
 # ----------------------------
 _RE_NCTOOL_H3_JA = re.compile(r"NCツール\(N\):(.+?)\s*\((\d+)\)\s*$")
 _RE_NCTOOL_H3_EN = re.compile(r"NC-Tool:(.+?)\s*\((\d+)\)\s*$")
+_RE_NCTOOL_H3 = [_RE_NCTOOL_H3_JA, _RE_NCTOOL_H3_EN]
 
 _RE_TOOL_H3_JA = re.compile(r"工具:\s*(.+?)\s*\((.+?)\)\s*$")
 _RE_TOOL_H3_EN = re.compile(r"Tool:\s*(.+?)\s*\((.+?)\)\s*$")
@@ -96,13 +113,142 @@ def _norm_kv_key(k: str) -> str:
     return _KV_KEY_MAP.get(k, k)
 
 
-def _parse_kv_table(table) -> Dict[str, str]:
+# ----------------------------
+# Backend (bs4 / lxml)
+# ----------------------------
+# lxml backend 用のXPath（事前コンパイル）
+_X_PAGES = etree.XPath(
+    "descendant::div[contains(concat(' ', normalize-space(@class), ' '), ' page ')]"
+)
+# 行/セルは直下だけ（入れ子tableの行を拾わない）。thead/tbody/tfoot は1段だけ透過する
+_X_ROWS = etree.XPath("tr | thead/tr | tbody/tr | tfoot/tr")
+_X_CELLS = etree.XPath("td")
+_X_TEXT = etree.XPath("descendant::text()", smart_strings=False)
+
+_TABLE_SECTIONS = ("thead", "tbody", "tfoot")
+
+
+def _bs4_children(el: Tag, name: str) -> Iterator[Tag]:
+    for child in el.children:
+        if isinstance(child, Tag) and child.name == name:
+            yield child
+
+
+def _bs4_rows(table: Tag) -> Iterator[Tag]:
+    for child in table.children:
+        if not isinstance(child, Tag):
+            continue
+        if child.name == "tr":
+            yield child
+        elif child.name in _TABLE_SECTIONS:
+            yield from _bs4_children(child, "tr")
+
+
+class _Bs4Ops:
+    """
+    BeautifulSoup の Tag を扱うページ操作。
+    """
+
+    @staticmethod
+    def text(el: Tag) -> str:
+        return clean_text(el.get_text(" ", strip=True))
+
+    @staticmethod
+    def h3_text(page: Tag) -> str:
+        h3_el = page.find("h3")
+        return _Bs4Ops.text(h3_el) if h3_el else ""
+
+    @staticmethod
+    def iter_tables(page: Tag) -> Iterator[Tag]:
+        for el in page.descendants:
+            if isinstance(el, Tag) and el.name == "table":
+                yield el
+
+    @staticmethod
+    def attr(el: Tag, name: str) -> Any:
+        return el.get(name)
+
+    @staticmethod
+    def img_src(page: Tag) -> str:
+        img = page.find("img")
+        return img["src"] if img and img.get("src") else ""
+
+    @staticmethod
+    def rows(table: Tag) -> List[List[str]]:
+        return [[_Bs4Ops.text(td) for td in _bs4_children(tr, "td")] for tr in _bs4_rows(table)]
+
+    @staticmethod
+    def markup(page: Tag) -> bytes:
+        return page.encode()
+
+
+class _LxmlOps:
+    """
+    lxml の要素を事前コンパイル済みXPathで扱うページ操作（bs4より高速）。
+    get_text(" ", strip=True) と同じく、子孫テキストを strip して空でないものを空白連結する。
+    """
+
+    @staticmethod
+    def text(el) -> str:
+        return clean_text(" ".join([t.strip() for t in _X_TEXT(el) if t.strip()]))
+
+    @staticmethod
+    def h3_text(page) -> str:
+        # iter() は最初の1件で止まる（入れ子の後続ページまで辿らない）
+        found = next(page.iter("h3"), None)
+        return _LxmlOps.text(found) if found is not None else ""
+
+    @staticmethod
+    def iter_tables(page) -> Iterator[Any]:
+        return page.iter("table")
+
+    @staticmethod
+    def attr(el, name: str) -> Any:
+        return el.get(name)
+
+    @staticmethod
+    def img_src(page) -> str:
+        found = next(page.iter("img"), None)
+        return (found.get("src") or "") if found is not None else ""
+
+    @staticmethod
+    def rows(table) -> List[List[str]]:
+        return [[_LxmlOps.text(td) for td in _X_CELLS(tr)] for tr in _X_ROWS(table)]
+
+    @staticmethod
+    def markup(page) -> bytes:
+        return etree.tostring(page, method="html", with_tail=False)
+
+
+_OPS = {
+    "bs4": _Bs4Ops,
+    "lxml": _LxmlOps,
+}
+
+
+def _find_tables(page, ops, *, index: int, border_from: int) -> Tuple[Optional[Any], Optional[Any]]:
+    """
+    ページ内 table（文書順）の index 番目と、border_from 番目以降で最初の border=1 を返す。
+    両方見つかった時点で走査を打ち切るので、入れ子になった後続ページの table までは辿らない。
+    """
+    found = None
+    bordered = None
+    for i, t in enumerate(ops.iter_tables(page)):
+        if i == index:
+            found = t
+        if bordered is None and i >= border_from and ops.attr(t, "border") == "1":
+            bordered = t
+        if bordered is not None and i >= index:
+            break
+    return found, bordered
+
+
+def _parse_kv_table(table, ops=_Bs4Ops) -> Dict[str, str]:
     """
     2列/4列のKV表を dict で返す（キーは“正規化”して返す）
     """
     d: Dict[str, str] = {}
-    for tr in table.find_all("tr"):
-        tds = [clean_text(td.get_text(" ", strip=True)) for td in tr.find_all("td")]
+    for tds in ops.rows(table):
         if len(tds) == 2 and tds[0]:
             d[_norm_kv_key(tds[0])] = tds[1]
         elif len(tds) == 4:
@@ -113,20 +259,18 @@ def _parse_kv_table(table) -> Dict[str, str]:
     return d
 
 
-def _parse_grid_table(table) -> List[Dict[str, str]]:
+def _parse_grid_table(table, ops=_Bs4Ops) -> List[Dict[str, str]]:
     """
     1行目をヘッダとして扱うグリッド表を row dict のlistへ。
     ヘッダは“正規化”して返す。
     """
-    trs = table.find_all("tr")
+    trs = ops.rows(table)
     if not trs:
         return []
-    header_raw = [clean_text(td.get_text(" ", strip=True)) for td in trs[0].find_all("td")]
-    header = [_norm_grid_header(h) for h in header_raw]
+    header = [_norm_grid_header(h) for h in trs[0]]
 
     out: List[Dict[str, str]] = []
-    for tr in trs[1:]:
-        vals = [clean_text(td.get_text(" ", strip=True)) for td in tr.find_all("td")]
+    for vals in trs[1:]:
         if not any(vals):
             continue
         row = {header[i]: (vals[i] if i < len(vals) else "") for i in range(len(header))}
@@ -200,7 +344,152 @@ def _match_any(patterns: list[re.Pattern[str]], text: str) -> Optional[re.Match[
     return None
 
 
-def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
+def _is_page_element(el) -> bool:
+    return el.tag == "div" and "page" in (el.get("class") or "").split()
+
+
+def _drop_previous_siblings(el) -> None:
+    """
+    処理済みの先行兄弟を lxml のツリーから外す。
+    外した要素は参照が残っている間（グループ解析中）は生きており、参照が切れた時点で解放される。
+    """
+    parent = el.getparent()
+    if parent is None:
+        return
+    while el.getprevious() is not None:
+        del parent[0]
+
+
+def _iter_pages_stream(html_path: Path, backend: ParserBackend = "bs4") -> Iterator[Any]:
+    """
+    HTMLを逐次読み込みし、div.page を1つずつ文書順に返す（backend に応じて bs4 Tag / lxml 要素）。
+
+    hyperMILLのHTMLでは 工具/ホルダー/エクステンション ページが NCツールページの
+    div.page の内側にネストしているため、トップレベルの div.page が閉じた時点で
+    そのサブツリー内の div.page を文書順に返し、それ以前のサブツリーはツリーから外す。
+    ピークメモリはファイルサイズではなく 1 NCツール分のページサイズに依存する。
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parser = etree.HTMLPullParser(events=("start", "end"), tag="div", huge_tree=True)
+    depth = 0
+
+    def emit() -> Iterator[Any]:
+        nonlocal depth
+        for event, el in parser.read_events():
+            if not _is_page_element(el):
+                continue
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth > 0:
+                continue
+
+            _drop_previous_siblings(el)
+            if backend == "lxml":
+                yield el
+                yield from _X_PAGES(el)
+            else:
+                frag = etree.tostring(el, encoding="unicode", method="html", with_tail=False)
+                yield from BeautifulSoup(frag, "lxml").select("div.page")
+
+    with html_path.open("rb") as f:
+        while True:
+            chunk = f.read(_STREAM_CHUNK_BYTES)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                parser.feed(text)
+            yield from emit()
+            if not chunk:
+                break
+
+    # 閉じられていない div.page（途中で切れた・書き込み中のHTML）は close() で閉じられる
+    parser.close()
+    yield from emit()
+
+
+def _pages_from_text(html_text: str, backend: ParserBackend) -> List[Any]:
+    """
+    HTML文字列を解析し、div.page を文書順に返す。
+    """
+    if backend == "lxml":
+        parser = etree.HTMLParser(huge_tree=True)
+        parser.feed(html_text)
+        return _X_PAGES(parser.close())
+
+    soup = BeautifulSoup(html_text, "lxml")
+    return soup.select("div.page")
+
+
+# libxml2 が不正なUTF-8バイトを検出したときのエラー種別
+_ENCODING_ERROR_TYPES = frozenset(
+    {
+        etree.ErrorTypes.ERR_INVALID_ENCODING,
+        etree.ErrorTypes.ERR_INVALID_CHAR,
+    }
+)
+
+
+@contextmanager
+def _map_file(path: Path) -> Iterator[Any]:
+    """
+    ファイルを読み取り専用でメモリマップし、bytes 互換のバッファとして返す（空ファイルは b""）。
+    """
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空ファイルは mmap できない
+            yield b""
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
+
+
+def _pages_from_bytes(data: Any, backend: ParserBackend) -> List[Any]:
+    """
+    HTMLのバイト列（bytes / mmap）を解析し、div.page を文書順に返す。
+
+    lxml は UTF-8 のバイト列をそのまま libxml2 に渡す（Python側でのデコード・コピーをしない）。
+    不正なバイトがあった場合は libxml2 の扱い（置換文字/エンコーディング切替）が従来と違うため、
+    従来どおり errors="ignore" でデコードした文字列で解析し直す。
+    """
+    if backend == "lxml" and len(data):
+        parser = etree.HTMLParser(encoding="utf-8", huge_tree=True)
+        try:
+            root = etree.fromstring(data, parser)
+        except etree.XMLSyntaxError:
+            root = None
+        if root is not None and not any(e.type in _ENCODING_ERROR_TYPES for e in parser.error_log):
+            return _X_PAGES(root)
+
+    return _pages_from_text(str(data, "utf-8", "ignore"), backend)
+
+
+def _load_pages(html_path: Path, backend: ParserBackend) -> List[Any]:
+    """
+    HTML全体をメモリマップで読み込み、div.page を文書順に返す。
+    """
+    with _map_file(html_path) as data:
+        return _pages_from_bytes(data, backend)
+
+
+def _iter_pages(html_path: Path, stream: bool, backend: ParserBackend) -> Iterable[Any]:
+    if backend not in _OPS:
+        raise ValueError(f"未対応の backend です: {backend}")
+    if stream:
+        return _iter_pages_stream(html_path, backend)
+    return _load_pages(html_path, backend)
+
+
+def parse_nctools_html(
+    html_path: Path,
+    *,
+    stream: bool = False,
+    backend: ParserBackend = "bs4",
+    workers: int = 1,
+) -> Tuple[List[NcToolRecord], List[str]]:
     """
     hyperMILLのNCツールHTMLを解析して NcToolRecord のリストを返す。
 
@@ -211,112 +500,278 @@ def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
     追加要件:
       - holder / extension / tool を別扱いにする（extensionはNCツールページの構成部品表から集計）
       - 全長 / extension突き出し / 工具突き出し / 突き出し長さ を算出
+
+    stream=True:
+      - HTML全体のツリーを作らず、トップレベルの div.page 単位で逐次解析する（巨大HTML向け）
+      - 結果は stream=False と同一
+
+    backend:
+      - "bs4"  : BeautifulSoup のツリーを辿る（従来どおり）
+      - "lxml" : lxml の要素を事前コンパイル済みXPathで辿る（高速）。結果は "bs4" と同一
+
+    workers >= 2:
+      - HTMLのバイト列をNCツールページの開始位置で分割し、プロセスプールで並列に解析する
+      - 結果は workers=1 と同一（分割できない場合は逐次解析）。stream は無視される
     """
+    if workers > 1:
+        parsed = _parse_parallel(html_path, backend=backend, workers=workers)
+        if parsed is not None:
+            return parsed
+
     errors: List[str] = []
-    html_text = html_path.read_text(encoding="utf-8", errors="ignore")
-    soup = BeautifulSoup(html_text, "lxml")
+    records = list(iter_nctools_html(html_path, stream=stream, backend=backend))
+    return records, errors
+
+
+def iter_nctools_html(
+    html_path: Path,
+    *,
+    stream: bool = True,
+    backend: ParserBackend = "bs4",
+) -> Iterator[NcToolRecord]:
+    """
+    parse_nctools_html と同じ解析を、NCツールのページグループが揃うたびに1件ずつ返す。
+    stream=True（既定）なら HTML 全体を読み込まずに最初のレコードが得られる（パイプライン出力用）。
+    """
+    pages = _iter_pages(html_path, stream, backend)
+    ops = _OPS[backend]
+    for group in _iter_groups(pages, ops):
+        yield _parse_group(group, ops, html_path)
+
+
+# ----------------------------
+# Parallel (workers >= 2)
+# ----------------------------
+# div.page の開始タグ直後に h3 が続く位置（NCツールページの候補）
+_RE_PAGE_H3_START = re.compile(
+    rb"<div\b[^>]*\bclass\s*=\s*([\"'])(?:[^\"']*\s)?page(?:\s[^\"']*)?\1[^>]*>\s*<h3\b[^>]*>(.*?)</h3\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_RE_TAG_OR_COMMENT = re.compile(rb"<!--.*?-->|<[^>]*>", re.DOTALL)
 
-    pages = soup.select("div.page")
-    if not pages:
+# 1ワーカーあたりのチャンク数（負荷の偏りをならす）
+_CHUNKS_PER_WORKER = 4
+
+
+def _split_at_nctool_pages(data: Any, n_chunks: int) -> List[Tuple[int, int]]:
+    """
+    NCツールページ（h3 が NCツール開始パターンに一致する div.page）の開始位置でバイト列を区切り、
+    おおよそ n_chunks 個の (start, end) に分ける。先頭チャンクはNCツール開始前の部分を含む。
+    """
+    starts: List[int] = []
+    for m in _RE_PAGE_H3_START.finditer(data):
+        h3_raw = _RE_TAG_OR_COMMENT.sub(b" ", m.group(2)).decode("utf-8", errors="ignore")
+        if _match_any(_RE_NCTOOL_H3, clean_text(html.unescape(h3_raw))):
+            starts.append(m.start())
+    if not starts:
+        return [(0, len(data))]
+
+    target = max(1, len(data) // max(1, n_chunks))
+    bounds = [0]
+    for pos in starts:
+        if pos - bounds[-1] >= target:
+            bounds.append(pos)
+    bounds.append(len(data))
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def _parse_chunk(
+    data: bytes,
+    html_path: str,
+    backend: ParserBackend,
+) -> Tuple[List[NcToolRecord], int, bool]:
+    """
+    プロセスプールのワーカー: チャンク1つを解析する。
+    戻り: (records, div.page 数, 先頭ページがNCツールページか)
+    """
+    ops = _OPS[backend]
+    pages = _pages_from_bytes(data, backend)
+    starts_with_nctool = bool(pages) and _match_any(_RE_NCTOOL_H3, ops.h3_text(pages[0])) is not None
+    records = [
+        _parse_group(group, ops, Path(html_path))
+        for group in _iter_groups(pages, ops, require_pages=False)
+    ]
+    return records, len(pages), starts_with_nctool
+
+
+def _parse_parallel(
+    html_path: Path,
+    *,
+    backend: ParserBackend,
+    workers: int,
+) -> Optional[Tuple[List[NcToolRecord], List[str]]]:
+    """
+    分割並列解析。分割できない/分割位置が逐次解析とずれる場合は None（呼び出し側で逐次解析）。
+    """
+    if backend not in _OPS:
+        raise ValueError(f"未対応の backend です: {backend}")
+
+    with _map_file(html_path) as data:
+        spans = _split_at_nctool_pages(data, workers * _CHUNKS_PER_WORKER)
+        if len(spans) < 2:
+            return None
+
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(_parse_chunk, data[start:end], str(html_path), backend)
+                for start, end in spans
+            ]
+            results = [f.result() for f in futures]
+
+    # 2番目以降のチャンクはNCツールページから始まっていないと逐次解析と一致しない
+    if not all(starts for _recs, _n, starts in results[1:]):
+        return None
+    if sum(n for _recs, n, _starts in results) == 0:
         raise RuntimeError("div.page が見つかりません。HTML形式が想定と違います。")
 
-    records: List[NcToolRecord] = []
-    current: NcToolRecord | None = None
+    errors: List[str] = []
+    records = [rec for recs, _n, _starts in results for rec in recs]
+    return records, errors
 
-    def finalize_current():
-        nonlocal current
-        if current is None:
-            return
-        if not current.nctool_name.strip():
-            current.nctool_name = "(UNKNOWN_NCTOOL)"
-            current.warnings.append("nctool_name が空でした（解析失敗の可能性）")
-        records.append(current)
-        current = None
 
-    for page_idx, p in enumerate(pages, start=1):
-        h3_el = p.find("h3")
-        h3 = clean_text(h3_el.get_text(" ", strip=True)) if h3_el else ""
+def parse_nctools_html_groups(
+    html_path: Path,
+    *,
+    reuse: Optional[Mapping[str, NcToolRecord]] = None,
+    stream: bool = False,
+    backend: ParserBackend = "bs4",
+) -> Tuple[List[NcToolRecord], List[str], List[str]]:
+    """
+    parse_nctools_html と同じ解析を NCツールのページグループ単位で行い、
+    グループごとの指紋（SHA-256）も返す。
+    reuse に同じ指紋のレコードがあれば、そのグループは解析せずに複写して使う。
 
-        # -----------------------
-        # NCツール開始 (JA/EN)
-        # -----------------------
-        m_nct = _match_any([_RE_NCTOOL_H3_JA, _RE_NCTOOL_H3_EN], h3)
-        if m_nct:
-            finalize_current()
-
-            current = NcToolRecord(source_html_path=str(html_path))
-            current.nctool_name = clean_text(m_nct.group(1))
-            current.nctool_no = int(m_nct.group(2))
-
-            # コメント（2番目table想定）
-            nct_tables = p.find_all("table")
-            if len(nct_tables) >= 2:
-                kv = _parse_kv_table(nct_tables[1])
-                current.nctool_comment = kv.get("nctool_comment", "")
-            else:
-                current.warnings.append("NCツールページのtableが不足しています")
-
-            # 構成部品（border=1）: holder / extension / tool を拾う
-            coupling_table = None
-            for t in p.find_all("table"):
-                if t.get("border") == "1":
-                    coupling_table = t
-                    break
-
-            if coupling_table:
-                rows = _parse_grid_table(coupling_table)
-
-                holder_len = None
-                tool_len = None
-                ext_sum = 0.0
-                ext_found = False
-
-                for r in rows:
-                    kind = (r.get("coupling_type", "") or "").strip().lower()
-                    name = r.get("name", "") or ""
-                    ln_str = r.get("reach", "") or ""
-                    ln = _to_float_mm(ln_str)
-
-                    if kind == "holder":
-                        current.holder_name = name
-                        current.holder_length = ln_str
-                        holder_len = ln
-
-                    elif kind == "tool":
-                        current.tool_name = name
-                        current.tool_length = ln_str
-                        tool_len = ln
-
-                    elif kind in ("extension", "subholder", "ext"):
-                        if ln is not None:
-                            ext_sum += ln
-                        ext_found = True
-
-                # extension表示文字列
-                current.extensions_str = _build_extensions_str_from_coupling_rows(rows)
-
-                # --- 計算値 ---
-                current.ext_overhang_mm = _fmt_mm(ext_sum) if ext_found else "0"
-                current.tool_overhang_mm = _fmt_mm(tool_len) if tool_len is not None else ""
-                overhang = (ext_sum + tool_len) if tool_len is not None else None
-                current.overhang_mm = _fmt_mm(overhang) if overhang is not None else ""
+    戻り: (records, errors, fingerprints)  ※fingerprints は records と同じ並び
+    """
+    pages = _iter_pages(html_path, stream, backend)
+    ops = _OPS[backend]
+    reuse = reuse or {}
 
-            else:
-                current.warnings.append("NCツールページの構成部品テーブル（border=1）が見つかりません")
+    errors: List[str] = []
+    records: List[NcToolRecord] = []
+    fingerprints: List[str] = []
+    for group in _iter_groups(pages, ops):
+        fp = _group_fingerprint(group, ops)
+        prev = reuse.get(fp)
+        if prev is not None:
+            rec = replace(prev, source_html_path=str(html_path), warnings=list(prev.warnings))
+        else:
+            rec = _parse_group(group, ops, html_path)
+        records.append(rec)
+        fingerprints.append(fp)
+    return records, errors, fingerprints
+
+
+def _group_fingerprint(group: List[Tuple[str, Any]], ops) -> str:
+    """
+    ページグループ（NCツールページ + 工具/ホルダー/エクステンションページ）の指紋。
+    解析結果に影響する PARSER_VERSION と backend も含める。
+    """
+    h = hashlib.sha256(f"{PARSER_VERSION}:{ops.__name__}".encode("ascii"))
+    for _h3, p in group:
+        h.update(ops.markup(p))
+    return h.hexdigest()
 
-            # 画像（このページ内の img を拾う）
-            img = p.find("img")
-            if img and img.get("src"):
-                current.image_rel_src = img["src"]
-            else:
-                current.warnings.append("NCツールページの画像srcが見つかりません")
 
-            continue
+def _iter_groups(pages: Iterable[Any], ops, require_pages: bool = True) -> Iterator[List[Tuple[str, Any]]]:
+    """
+    div.page を文書順に受け取り、NCツールページから次のNCツールページの手前までを
+    1グループ [(h3, page), ...] として返す。NCツール開始前のページは無視する。
+    require_pages=False なら div.page が1つも無くてもエラーにしない（分割解析のチャンク用）。
+    """
+    group: List[Tuple[str, Any]] | None = None
+    page_count = 0
+    for p in pages:
+        page_count += 1
+        h3 = ops.h3_text(p)
+        if _match_any(_RE_NCTOOL_H3, h3):
+            if group:
+                yield group
+            group = [(h3, p)]
+        elif group is not None:
+            group.append((h3, p))
+
+    if page_count == 0 and require_pages:
+        raise RuntimeError("div.page が見つかりません。HTML形式が想定と違います。")
 
-        # NCツール開始前のページは無視
-        if current is None:
-            continue
+    if group:
+        yield group
 
+
+def _parse_group(group: List[Tuple[str, Any]], ops, html_path: Path) -> NcToolRecord:
+    """
+    1グループ分のページを h3見出しで判定して NcToolRecord を組み立てる。
+    """
+    # -----------------------
+    # NCツール開始 (JA/EN)
+    # -----------------------
+    h3, p = group[0]
+    m_nct = _match_any(_RE_NCTOOL_H3, h3)
+    assert m_nct is not None
+
+    current = NcToolRecord(source_html_path=str(html_path))
+    current.nctool_name = clean_text(m_nct.group(1))
+    current.nctool_no = int(m_nct.group(2))
+
+    # コメント（2番目table想定）/ 構成部品（border=1）
+    kv_table, coupling_table = _find_tables(p, ops, index=1, border_from=0)
+    if kv_table is not None:
+        kv = _parse_kv_table(kv_table, ops)
+        current.nctool_comment = kv.get("nctool_comment", "")
+    else:
+        current.warnings.append("NCツールページのtableが不足しています")
+
+    # 構成部品（border=1）: holder / extension / tool を拾う
+    if coupling_table is not None:
+        rows = _parse_grid_table(coupling_table, ops)
+
+        holder_len = None
+        tool_len = None
+        ext_sum = 0.0
+        ext_found = False
+
+        for r in rows:
+            kind = (r.get("coupling_type", "") or "").strip().lower()
+            name = r.get("name", "") or ""
+            ln_str = r.get("reach", "") or ""
+            ln = _to_float_mm(ln_str)
+
+            if kind == "holder":
+                current.holder_name = name
+                current.holder_length = ln_str
+                holder_len = ln
+
+            elif kind == "tool":
+                current.tool_name = name
+                current.tool_length = ln_str
+                tool_len = ln
+
+            elif kind in ("extension", "subholder", "ext"):
+                if ln is not None:
+                    ext_sum += ln
+                ext_found = True
+
+        # extension表示文字列
+        current.extensions_str = _build_extensions_str_from_coupling_rows(rows)
+
+        # --- 計算値 ---
+        current.ext_overhang_mm = _fmt_mm(ext_sum) if ext_found else "0"
+        current.tool_overhang_mm = _fmt_mm(tool_len) if tool_len is not None else ""
+        overhang = (ext_sum + tool_len) if tool_len is not None else None
+        current.overhang_mm = _fmt_mm(overhang) if overhang is not None else ""
+
+    else:
+        current.warnings.append("NCツールページの構成部品テーブル（border=1）が見つかりません")
+
+    # 画像（このページ内の img を拾う）
+    img_src = ops.img_src(p)
+    if img_src:
+        current.image_rel_src = img_src
+    else:
+        current.warnings.append("NCツールページの画像srcが見つかりません")
+
+
+    for h3, p in group[1:]:
         # -----------------------
         # Tool page (JA/EN)
         # -----------------------
@@ -325,9 +780,9 @@ def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
             current.tool_page_name = clean_text(m_tool.group(1))
             current.tool_type = clean_text(m_tool.group(2))
 
-            tool_tables = p.find_all("table")
-            if tool_tables:
-                kv = _parse_kv_table(tool_tables[0])
+            dim_table, cond_table = _find_tables(p, ops, index=0, border_from=1)
+            if dim_table is not None:
+                kv = _parse_kv_table(dim_table, ops)
 
                 current.tool_diameter_mm = kv.get("diameter", "")
                 current.tool_corner_radius_mm = kv.get("corner_radius", "")
@@ -342,13 +797,8 @@ def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
                 current.warnings.append("工具ページの寸法tableが見つかりません")
 
             # 条件（F2では不要だが先頭行だけ保持）
-            cond_table = None
-            for t in tool_tables[1:]:
-                if t.get("border") == "1":
-                    cond_table = t
-                    break
-            if cond_table:
-                cond_rows = _parse_grid_table(cond_table)
+            if cond_table is not None:
+                cond_rows = _parse_grid_table(cond_table, ops)
                 if cond_rows:
                     c0 = cond_rows[0]
                     # ここは英語HTMLでも列名が "S (n)" 等のままなのでそのままでOK
@@ -369,9 +819,9 @@ def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
         m_holder = _match_any([_RE_HOLDER_H3_JA, _RE_HOLDER_H3_EN], h3)
         if m_holder:
             current.holder_page_name = clean_text(m_holder.group(1))
-            holder_tables = p.find_all("table")
-            if holder_tables:
-                kvh = _parse_kv_table(holder_tables[0])
+            holder_table = next(iter(ops.iter_tables(p)), None)
+            if holder_table is not None:
+                kvh = _parse_kv_table(holder_table, ops)
                 current.holder_comment = kvh.get("holder_comment", "")
             else:
                 current.warnings.append("ホルダーページのtableが見つかりません")
@@ -395,5 +845,7 @@ def parse_nctools_html(html_path: Path) -> Tuple[List[NcToolRecord], List[str]]:
 
         continue
 
-    finalize_current()
-    return records, errors
\ No newline at end of file
+    if not current.nctool_name.strip():
+        current.nctool_name = "(UNKNOWN_NCTOOL)"
+        current.warnings.append("nctool_name が空でした（解析失敗の可能性）")
+    return current
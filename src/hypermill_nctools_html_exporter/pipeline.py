@@ -0,0 +1,269 @@
+# src/hypermill_nctools_html_exporter/pipeline.py
+"""
+解析 → 画像縮小 → 書き込み をパイプラインで並行に行う（core の段階実行 _prepare → write の代わり）。
+
+  解析スレッド : NCツールのページグループが揃うたびにレコードを1件作り（iter_nctools_html）、
+                 数値ステージを通して画像縮小をプールへ投入し、有界キューへ入れる（満杯なら解析が待つ）
+  画像プール   : 縮小を並行に行う（完了順はばらばら）
+  writer       : キューの先頭から順に、そのレコードの縮小完了を待って書く
+有界キューがそのまま並べ直しバッファになるので、出力は入力順のまま、
+同時に持つレコードは window 件まで（ブックに残る画像は MediaPool の共有パーツとして種類数だけ）。
+"""
+from __future__ import annotations
+
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+
+from .cache import ThumbnailCache, file_sha256
+from .export_xlsx import ErrorRow
+from .images import DEFAULT_RESAMPLE, ResamplePreset, resolve_image_path
+from .model import NcToolRecord
+from .numeric import DERIVED_FIELDS, NUMERIC_FIELDS, NumericColumns, numeric_stage
+from .parse_html import ParserBackend, iter_nctools_html
+from .thumbnails import ImageExecutor, thumbnail_job
+
+
+DEFAULT_WINDOW = 64  # 並べ直しバッファ（解析済み・書き込み待ちのレコード）の上限
+_JOB_LRU = 256  # 縮小ジョブ（結果のPNGを含む）を覚えておく画像の種類数。追い出した画像が再び出たら縮小し直す
+
+_DONE = object()
+
+
+@dataclass
+class _Slot:
+    """
+    解析済み・書き込み待ちの1レコード。
+    """
+    index: int
+    record: NcToolRecord
+    numeric: NumericColumns  # このレコード1件分
+    thumb: Optional[Future] = None
+    new_job: bool = False  # thumb がこのレコードで投入した縮小ジョブか（キャッシュヒットはジョブ単位で数える）
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineStats:
+    records: int = 0
+    thumb_cache_hits: int = 0
+    images_total: int = 0
+    images_unique: int = 0
+    first_row_seconds: Optional[float] = None  # 開始から最初のレコードを writer に渡すまで
+
+
+class _CurrentThumbs:
+    """
+    writer の thumbs 引数（thumbs[k]）。書き込み中のレコードの縮小PNGだけを返す。
+    """
+
+    def __init__(self, pipe: "RecordPipeline") -> None:
+        self._pipe = pipe
+
+    def __getitem__(self, index: int) -> Optional[bytes]:
+        return self._pipe._current(index)[0]
+
+
+class _CurrentNumeric(NumericColumns):
+    """
+    writer の numeric 引数（numeric.value(name, k)）。書き込み中のレコードの数値だけを返す。
+    """
+
+    def __init__(self, pipe: "RecordPipeline") -> None:
+        super().__init__({name: None for name in (*NUMERIC_FIELDS, *DERIVED_FIELDS)})
+        self._pipe = pipe
+
+    def __len__(self) -> int:
+        return self._pipe.stats.records
+
+    def value(self, name: str, index: int) -> Optional[float]:
+        return self._pipe._current(index)[1].value(name, 0)
+
+
+class RecordPipeline:
+    """
+    HTML 1つ分のレコードを入力順に返すイテレータ。解析・画像縮小は裏で先行して進む。
+    write_xlsx / export_blocks_f2_xlsx(backend="raw") に records としてそのまま渡し、
+    thumbs / numeric にはこのオブジェクトの thumbs / numeric を渡す。
+    errors には、writer へレコードを渡す直前にそのレコードの画像エラー・警告を追記する
+    （行番号は first_row から）。with 文で使い、途中で抜けたら解析スレッドと画像プールを止める。
+    """
+
+    def __init__(
+        self,
+        html_path: Path,
+        *,
+        embed_images: bool,
+        max_px: int,
+        stream: bool = True,
+        parser_backend: ParserBackend = "bs4",
+        use_cache: bool = True,
+        image_workers: int = 1,
+        image_executor: ImageExecutor = "thread",
+        png_level: Optional[int] = None,
+        resample: ResamplePreset = DEFAULT_RESAMPLE,
+        first_row: int = 2,
+        errors: Optional[List[ErrorRow]] = None,
+        window: int = DEFAULT_WINDOW,
+    ) -> None:
+        if image_executor not in ("thread", "process"):
+            raise ValueError(f"unknown image executor: {image_executor!r}")
+        self.html_path = html_path
+        self.embed_images = embed_images
+        self.max_px = max_px
+        self.stream = stream
+        self.parser_backend = parser_backend
+        self.png_level = png_level
+        self.resample = resample
+        self.first_row = first_row
+        self.errors: List[ErrorRow] = errors if errors is not None else []
+        self.stats = PipelineStats()
+        self.thumbs = _CurrentThumbs(self)
+        self.numeric = _CurrentNumeric(self)
+
+        self._thumb_cache = ThumbnailCache() if (use_cache and embed_images) else None
+        self._image_workers = max(1, image_workers)
+        self._image_executor = image_executor
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(1, window))
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread: Optional[threading.Thread] = None
+        self._slot: Optional[_Slot] = None
+        self._png: Optional[bytes] = None
+
+    def __enter__(self) -> "RecordPipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._thumb_cache is not None:
+            self._thumb_cache.evict()  # 書き込み時は省いた容量チェックをまとめて行う
+
+    def _current(self, index: int):
+        slot = self._slot
+        if slot is None or slot.index != index:
+            raise IndexError(f"record {index} is not the one being written")
+        return self._png, slot.numeric
+
+    def __iter__(self) -> Iterator[NcToolRecord]:
+        if self._thread is not None:
+            raise RuntimeError("RecordPipeline can only be iterated once")
+        t0 = time.perf_counter()
+        pool_cls = ProcessPoolExecutor if self._image_executor == "process" else ThreadPoolExecutor
+        self._pool = pool_cls(max_workers=self._image_workers) if self.embed_images else None
+        self._thread = threading.Thread(target=self._produce, name="nctools-parse", daemon=True)
+        self._thread.start()
+
+        digests: Set[bytes] = set()
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            slot: _Slot = item  # type: ignore[assignment]
+            png, err = None, slot.error
+            if slot.thumb is not None:
+                png, err, hit = slot.thumb.result()
+                if slot.new_job:
+                    self.stats.thumb_cache_hits += hit
+            if png:
+                self.stats.images_total += 1
+                digests.add(hashlib.sha1(png).digest())
+                self.stats.images_unique = len(digests)
+
+            rec = slot.record
+            row = self.first_row + slot.index
+            if err:
+                self.errors.append((row, rec.nctool_name, err))
+            for w in rec.warnings:
+                self.errors.append((row, rec.nctool_name, w))
+
+            self._slot, self._png = slot, png
+            self.stats.records += 1
+            if self.stats.first_row_seconds is None:
+                self.stats.first_row_seconds = round(time.perf_counter() - t0, 4)
+            yield rec
+        self._slot, self._png = None, None
+
+    def _put(self, item: object) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        try:
+            cache_dir = self._thumb_cache.directory if self._thumb_cache is not None else None
+            # 同じ内容の画像の縮小は1回だけ（_prepare と同じく内容ハッシュで、読めない画像はパスで束ねる）。
+            # どちらも直近 _JOB_LRU 種類だけ覚えておき、終わった縮小PNGを実行の最後まで抱えない
+            keys: "OrderedDict[Path, tuple]" = OrderedDict()  # 画像パス -> (ジョブのキー, 内容ハッシュ)
+            jobs: "OrderedDict[str, Future]" = OrderedDict()
+            for k, rec in enumerate(
+                iter_nctools_html(self.html_path, stream=self.stream, backend=self.parser_backend)
+            ):
+                slot = _Slot(index=k, record=rec, numeric=numeric_stage([rec]))
+                rec.image_abs_path = resolve_image_path(self.html_path, rec.image_rel_src)
+                if self.embed_images:
+                    if not rec.image_abs_path:
+                        slot.error = f"画像が見つかりません: {rec.image_rel_src}"
+                    else:
+                        path = rec.image_abs_path
+                        jkey, digest = _lru_get(keys, path) or _lru_put(keys, path, _job_key(path))
+                        slot.thumb = _lru_get(jobs, jkey)
+                        if slot.thumb is None:
+                            slot.thumb = _lru_put(jobs, jkey, self._pool.submit(
+                                thumbnail_job,
+                                path,
+                                self.max_px,
+                                cache_dir,
+                                self.png_level,
+                                digest,
+                                self.resample,
+                            ))
+                            slot.new_job = True
+                if not self._put(slot):
+                    return
+            self._put(_DONE)
+        except BaseException as e:
+            self._put(e)
+
+
+def _job_key(path: Path) -> tuple:
+    try:
+        digest: Optional[str] = file_sha256(path)
+        return digest, digest
+    except OSError:
+        return f"path:{path}", None  # 読めない画像はパス単位（エラーは縮小側で出す）
+
+
+def _lru_get(lru: OrderedDict, key):
+    value = lru.get(key)
+    if value is not None:
+        lru.move_to_end(key)
+    return value
+
+
+def _lru_put(lru: OrderedDict, key, value):
+    lru[key] = value
+    if len(lru) > _JOB_LRU:
+        lru.popitem(last=False)
+    return value
@@ -0,0 +1,437 @@
+# src/hypermill_nctools_html_exporter/service.py
+"""
+ローカル HTTP 出力サービス（標準ライブラリのみ・localhost 専用）。
+起動時にワーカープロセスを立ち上げて bs4 / lxml / openpyxl / Pillow を読み込んでおき（warm pool）、
+リクエストごとの起動・import のコストを無くす。解析キャッシュ・縮小画像キャッシュもそのまま使う。
+
+  POST /export            HTML と img フォルダを入れた zip（Content-Type: application/zip）
+                          または {"path": "サーバー側の HTML パス"}（Content-Type: application/json）
+                          クエリ: report=flat|f2, lang=ja|en, layout=3row|2row|4row, max_px, embed=0|1,
+                                  png_level=0-9, resample=fast|balanced|best, html=<zip内のHTML名>
+                          → 出力 XLSX（X-Export-Records / X-Export-Errors ヘッダー付き）
+  GET  /metrics           リクエスト数・処理中の数・レイテンシ（平均 / p50 / p95 / 最大）・スループット（JSON）
+  GET  /health            {"ok": true}
+"""
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .batch import BatchItem, _batch_job
+from .export_xlsx_blocks import F2_LAYOUTS
+from .images import RESAMPLE_PRESETS
+
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_UPLOAD_MB = 200
+DEFAULT_MAX_UNPACKED_MB = 1024  # zip を展開した合計サイズの上限
+DEFAULT_MAX_ZIP_ENTRIES = 10000
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_LATENCY_WINDOW = 1000   # レイテンシの分位点を出す直近のリクエスト数
+_THROUGHPUT_WINDOW = 60.0  # スループットを数える直近の秒数
+
+
+class _RequestError(Exception):
+    """
+    クライアントへそのまま返すエラー（HTTP ステータス付き）。
+    """
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _warm_worker() -> None:
+    # ワーカープロセスの初期化時に重い依存を読み込んでおく（最初のリクエストで import しない）
+    import bs4  # noqa: F401
+    import openpyxl  # noqa: F401
+    from PIL import Image, PngImagePlugin, JpegImagePlugin  # noqa: F401
+
+    from . import core, export_xlsx_blocks_raw  # noqa: F401
+
+    try:
+        import lxml.etree  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _percentile(sorted_values, q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return round(sorted_values[k], 4)
+
+
+class ServiceMetrics:
+    """
+    /metrics の集計（リクエストを処理するスレッドから呼ばれるのでロックで守る）。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.warmup_seconds: Optional[float] = None
+        self.requests: Dict[str, int] = {}  # "POST /export 200" -> 件数
+        self.in_flight = 0
+        self.exports_ok = 0
+        self.exports_failed = 0
+        self.records_total = 0
+        self.bytes_out = 0
+        self._latency: Deque[Tuple[float, float]] = deque(maxlen=_LATENCY_WINDOW)  # (完了時刻, 秒) /export のみ
+        self._finished: Deque[float] = deque()  # 直近の /export 完了時刻
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, route: str, status: int, seconds: float, *, export: Optional[BatchItem] = None, sent: int = 0) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            key = f"{route} {status}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_out += sent
+            if export is not None:
+                self._latency.append((now, seconds))
+                self._finished.append(now)
+                if export.ok:
+                    self.exports_ok += 1
+                    self.records_total += export.records
+                else:
+                    self.exports_failed += 1
+
+    def snapshot(self, *, workers: int) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            while self._finished and now - self._finished[0] > _THROUGHPUT_WINDOW:
+                self._finished.popleft()
+            lat = sorted(s for _t, s in self._latency)
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "workers": workers,
+                "warmup_seconds": self.warmup_seconds,
+                "in_flight": self.in_flight,
+                "requests": dict(sorted(self.requests.items())),
+                "exports_ok": self.exports_ok,
+                "exports_failed": self.exports_failed,
+                "records_total": self.records_total,
+                "bytes_out": self.bytes_out,
+                "export_latency_seconds": {
+                    "count": len(lat),
+                    "mean": round(sum(lat) / len(lat), 4) if lat else None,
+                    "p50": _percentile(lat, 0.50),
+                    "p95": _percentile(lat, 0.95),
+                    "max": round(lat[-1], 4) if lat else None,
+                },
+                "exports_per_minute": round(len(self._finished) * 60.0 / _THROUGHPUT_WINDOW, 2),
+            }
+
+
+class ExportService:
+    """
+    warm pool とメトリクスを持つ出力サービス本体（HTTP には make_server で載せる）。with 文で start / close する。
+    export_kwargs は全リクエスト共通の既定値（クエリで上書きできるのは report / lang / layout / max_px などだけ）。
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 1,
+        max_upload_mb: int = DEFAULT_MAX_UPLOAD_MB,
+        max_unpacked_mb: int = DEFAULT_MAX_UNPACKED_MB,
+        max_zip_entries: int = DEFAULT_MAX_ZIP_ENTRIES,
+        verbose: bool = False,
+        **export_kwargs: Any,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.max_unpacked_bytes = max_unpacked_mb * 1024 * 1024
+        self.max_zip_entries = max_zip_entries
+        self.verbose = verbose
+        self.export_kwargs = {"use_cache": True, **export_kwargs}
+        self.metrics = ServiceMetrics()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ExportService":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """
+        ワーカーを全数起動して依存の読み込みを済ませる。
+        """
+        t0 = time.perf_counter()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        for fut in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+            fut.result()
+        self.metrics.warmup_seconds = round(time.perf_counter() - t0, 3)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def options(self, query: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+        """
+        クエリ → (report, export の引数)。不正な値は 400。
+        """
+        report = query.get("report", "flat")
+        if report not in ("flat", "f2"):
+            raise _RequestError(HTTPStatus.BAD_REQUEST, f"unknown report: {report!r}")
+        kwargs = dict(self.export_kwargs)
+        try:
+            if "max_px" in query:
+                kwargs["max_px"] = int(query["max_px"])
+                if kwargs["max_px"] <= 0:
+                    raise ValueError("max_px must be positive")
+            if "embed" in query:
+                kwargs["embed_images"] = query["embed"] not in ("0", "false", "no")
+            if "png_level" in query:
+                kwargs["png_level"] = int(query["png_level"])
+                if not 0 <= kwargs["png_level"] <= 9:
+                    raise ValueError("png_level must be 0-9")
+            if "resample" in query:
+                if query["resample"] not in RESAMPLE_PRESETS:
+                    raise ValueError(f"unknown resample preset: {query['resample']!r}")
+                kwargs["resample"] = query["resample"]
+            if report == "f2":
+                if query.get("lang", "ja") not in ("ja", "en"):
+                    raise ValueError(f"unknown lang: {query['lang']!r}")
+                kwargs["out_lang"] = query.get("lang", "ja")
+                if query.get("layout", "3row") not in F2_LAYOUTS:
+                    raise ValueError(f"unknown F2 layout: {query['layout']!r}")
+                kwargs["f2_layout"] = query.get("layout", "3row")
+            elif "lang" in query or "layout" in query:
+                raise ValueError("lang / layout are F2 options")
+        except ValueError as e:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, str(e)) from None
+        return report, kwargs
+
+    def export(self, report: str, html_path: Path, out_dir: Path, kwargs: Dict[str, Any]) -> BatchItem:
+        if self._pool is None:
+            raise RuntimeError("ExportService is not started")
+        return self._pool.submit(_batch_job, report, html_path, out_dir, kwargs).result()
+
+
+def _extract_upload(
+    data: bytes,
+    work: Path,
+    html_name: Optional[str],
+    *,
+    max_bytes: int = DEFAULT_MAX_UNPACKED_MB * 1024 * 1024,
+    max_entries: int = DEFAULT_MAX_ZIP_ENTRIES,
+) -> Path:
+    """
+    アップロードされた zip を work に展開し、出力する HTML のパスを返す。
+    zip 外へ出るパスは 400、展開後の合計サイズ・エントリ数が上限を超える zip は展開せずに 413。
+    """
+    zip_path = work / "upload.zip"
+    zip_path.write_bytes(data)
+    src = work / "src"
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            root = src.resolve()
+            infos = zf.infolist()
+            if len(infos) > max_entries:
+                raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"zip has more than {max_entries} entries")
+            if sum(info.file_size for info in infos) > max_bytes:
+                raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"zip expands to more than {max_bytes} bytes")
+            for info in infos:
+                target = (src / info.filename.replace("\\", "/")).resolve()
+                if root != target and root not in target.parents:
+                    raise _RequestError(HTTPStatus.BAD_REQUEST, f"unsafe path in zip: {info.filename!r}")
+            zf.extractall(src)
+    except zipfile.BadZipFile as e:
+        raise _RequestError(HTTPStatus.BAD_REQUEST, f"bad zip: {e}") from None
+    finally:
+        zip_path.unlink()
+
+    htmls = sorted(p for p in src.rglob("*") if p.is_file() and p.suffix.lower() in (".html", ".htm"))
+    if html_name:
+        htmls = [p for p in htmls if p.name == html_name]
+    if len(htmls) != 1:
+        raise _RequestError(
+            HTTPStatus.BAD_REQUEST,
+            f"zip must contain exactly one HTML (or pass ?html=<name>), found {len(htmls)}",
+        )
+    return htmls[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "nctools-exporter"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> ExportService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.service.verbose:
+            super().log_message(format, *args)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        *,
+        record: Callable[[int], None],
+    ) -> None:
+        """
+        応答を返す。record(送るバイト数) は本文を書く前に呼ぶ（応答を受け取ったクライアントが
+        すぐ /metrics を見ても、このリクエストは処理中に数えられない）。送信に失敗しても1回は呼ぶ。
+        """
+        recorded = False
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            recorded = True
+            record(len(body))
+            self.wfile.write(body)
+        finally:
+            if not recorded:
+                record(0)
+
+    def _send_json(self, status: int, payload: Any, *, record: Callable[[int], None]) -> None:
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", record=record)
+
+    def _read_body(self) -> bytes:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length") from None
+        if length < 0:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > self.service.max_upload_bytes:
+            raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"upload larger than {self.service.max_upload_bytes} bytes")
+        return self.rfile.read(length)
+
+    def do_GET(self) -> None:
+        t0 = time.perf_counter()
+        route = urlsplit(self.path).path
+        self.service.metrics.begin()
+        status = HTTPStatus.OK
+        if route == "/metrics":
+            payload = self.service.metrics.snapshot(workers=self.service.workers)
+        elif route == "/health":
+            payload = {"ok": True}
+        else:
+            status = HTTPStatus.NOT_FOUND
+            payload = {"error": f"not found: {route}"}
+
+        def record(sent: int) -> None:
+            self.service.metrics.end(f"GET {route}", status, time.perf_counter() - t0, sent=sent)
+
+        self._send_json(status, payload, record=record)
+
+    def do_POST(self) -> None:
+        t0 = time.perf_counter()
+        url = urlsplit(self.path)
+        self.service.metrics.begin()
+        item: Optional[BatchItem] = None
+
+        def record_as(status: int) -> Callable[[int], None]:
+            def record(sent: int) -> None:
+                self.service.metrics.end(
+                    f"POST {url.path}", status, time.perf_counter() - t0, export=item, sent=sent
+                )
+            return record
+
+        try:
+            if url.path != "/export":
+                raise _RequestError(HTTPStatus.NOT_FOUND, f"not found: {url.path}")
+            item, body, filename = self._export({k: v[-1] for k, v in parse_qs(url.query).items()})
+            if not item.ok:
+                raise _RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, item.error)
+            headers = {
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+                "X-Export-Records": str(item.records),
+                "X-Export-Errors": str(item.errors),
+                "X-Export-Seconds": str(item.seconds),
+            }
+        except _RequestError as e:
+            self.close_connection = True  # 本文を読み残していることがある
+            self._send_json(e.status, {"error": str(e)}, record=record_as(e.status))
+            return
+        except Exception as e:  # ワーカープロセスごと落ちた場合など
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            self._send_json(status, {"error": f"{type(e).__name__}: {e}"}, record=record_as(status))
+            return
+        self._send(HTTPStatus.OK, body, XLSX_MIME, headers, record=record_as(HTTPStatus.OK))
+
+    def _export(self, query: Dict[str, str]) -> Tuple[BatchItem, bytes, str]:
+        report, kwargs = self.service.options(query)
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        data = self._read_body()
+
+        work = Path(tempfile.mkdtemp(prefix="nctools_service_"))
+        try:
+            if content_type == "application/json":
+                try:
+                    html_path = Path(json.loads(data.decode("utf-8"))["path"]).expanduser()
+                except (ValueError, KeyError, TypeError):
+                    raise _RequestError(HTTPStatus.BAD_REQUEST, 'JSON body must be {"path": "..."}') from None
+                if not html_path.is_file():
+                    raise _RequestError(HTTPStatus.NOT_FOUND, f"HTML not found: {html_path}")
+            elif content_type in ("application/zip", "application/x-zip-compressed", "application/octet-stream"):
+                html_path = _extract_upload(
+                    data,
+                    work,
+                    query.get("html"),
+                    max_bytes=self.service.max_unpacked_bytes,
+                    max_entries=self.service.max_zip_entries,
+                )
+            else:
+                raise _RequestError(
+                    HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "send application/zip (HTML + img folder) or application/json"
+                )
+
+            item = self.service.export(report, html_path, work / "out", kwargs)
+            body = Path(item.out_xlsx).read_bytes() if item.ok else b""
+            return item, body, Path(item.out_xlsx).name if item.ok else ""
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def make_server(service: ExportService, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    service を載せた HTTP サーバーを作る（loopback 以外のアドレスには bind しない）。
+    port=0 なら空いているポートを使う（server.server_address で分かる）。
+    """
+    if not _is_loopback(host):
+        raise ValueError(f"the export service only listens on localhost, not {host!r}")
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service  # type: ignore[attr-defined]
+    return server
@@ -0,0 +1,41 @@
+# src/hypermill_nctools_html_exporter/thumbnails.py
+"""
+画像1枚分の縮小ジョブ（段階実行の core と パイプラインの pipeline が共用する）。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Literal, Optional, Tuple
+
+from .cache import ThumbnailCache, thumbnail_png_cached
+from .images import make_thumbnail_png, ResamplePreset, DEFAULT_RESAMPLE
+
+
+ImageExecutor = Literal["thread", "process"]  # 画像縮小の並列方式（Pillow は縮小中 GIL を離すので既定は thread）
+
+ThumbResult = Tuple[Optional[bytes], Optional[str], bool]  # (png, error, cache_hit)
+
+
+def thumbnail_job(
+    src_img: Path,
+    max_px: int,
+    cache_dir: Optional[Path],
+    png_level: Optional[int] = None,
+    image_sha256: Optional[str] = None,
+    preset: ResamplePreset = DEFAULT_RESAMPLE,
+) -> ThumbResult:
+    """
+    画像1枚分の縮小（プロセスプールにも渡せるようにトップレベル関数）。
+    cache_dir=None ならキャッシュを使わない。
+    """
+    if cache_dir is None:
+        png, err = make_thumbnail_png(src_img, max_px=max_px, png_level=png_level, preset=preset)
+        return png, err, False
+    return thumbnail_png_cached(
+        src_img,
+        max_px=max_px,
+        png_level=png_level,
+        preset=preset,
+        image_sha256=image_sha256,
+        cache=ThumbnailCache(cache_dir),
+    )
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import os
 import re
+import tempfile
+from pathlib import Path
 
 
 _WS = re.compile(r"\s+")
@@ -17,3 +20,20 @@ def sanitize_filename(name: str) -> str:
         out = out.replace(ch, "_")
     out = out.rstrip(". ").strip()
     return out or "output"
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    同じフォルダの一時ファイルに書いてから置き換える（他プロセスが途中の内容を読まないように）。
+    """
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,384 @@
+# src/hypermill_nctools_html_exporter/watch.py
+"""
+フォルダ監視（常駐）による自動出力。hyperMILL が共有フォルダへ NC-Tool_*.html と img フォルダを出したら出力する。
+  - 監視    : ポーリング（scandir / stat だけ。ネットワーク共有でも同じに動く）
+  - 待ち合わせ: HTML と同じフォルダの img/ 配下の（サイズ, 更新時刻）が settle 秒変わらなくなるまで待つ
+  - スキップ : HTML・画像・出力設定の内容ハッシュが前回の出力時と同じで、出力XLSXが残っていれば出力しない
+  - 実行    : キューをワーカープールで処理する（batch._batch_job。プロセスは起動したまま使い回す）
+  - 状態    : 出力先に状態ファイル（JSON）を書く（待ち合わせ中・キュー・実行中の件数、ジョブごとの待ち時間と処理時間）
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from .batch import BatchItem, BatchReport, ProgressCb, _batch_job, _out_dirs
+from .cache import file_sha256
+from .util import atomic_write_bytes, sanitize_filename
+
+
+WATCH_STATE_NAME = ".watch_state.json"   # 入力ごとの出力先と、前回出力時のスナップショット・内容ハッシュ
+WATCH_STATUS_NAME = "watch_status.json"  # 外から見る状態ファイル
+DEFAULT_IMAGE_DIRS = ("img",)
+_RECENT_JOBS = 50  # 状態ファイルに残す直近のジョブ数
+
+Snapshot = List[List[Any]]  # [[HTMLからの相対パス, サイズ, 更新時刻(ns)], ...]（JSON にそのまま書ける形）
+
+
+@dataclass
+class _Pending:
+    """
+    変更を見つけて、落ち着くのを待っている入力。
+    """
+    snapshot: Snapshot
+    since: float  # このスナップショットを最初に見た時刻（monotonic）
+    detected_at: float  # 最初に変更を見つけた時刻（epoch）
+
+
+@dataclass
+class WatchJob:
+    """
+    キューに入れた（実行中・完了した）1入力分。時刻は epoch 秒。
+    """
+    html: str
+    out_dir: str
+    snapshot: Snapshot
+    key: str
+    detected_at: float
+    queued_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    item: Optional[BatchItem] = None
+
+    def status(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = asdict(self.item) if self.item is not None else {"html": self.html}
+        out["detected_at"] = _iso(self.detected_at)
+        out["queued_at"] = _iso(self.queued_at)
+        out["finished_at"] = _iso(self.finished_at) if self.finished_at else None
+        if self.started_at is not None:
+            out["wait_seconds"] = round(self.started_at - self.queued_at, 3)
+        if self.finished_at is not None:
+            out["latency_seconds"] = round(self.finished_at - self.detected_at, 3)  # 変更を見つけてから出力まで
+        return out
+
+
+def _iso(t: float) -> str:
+    return datetime.fromtimestamp(t).isoformat(timespec="seconds")
+
+
+def _image_files(html_path: Path, image_dirs: Sequence[str]) -> List[Path]:
+    files: List[Path] = []
+    for name in image_dirs:
+        d = html_path.parent / name
+        if d.is_dir():
+            files.extend(p for p in d.rglob("*") if p.is_file())
+    return sorted(files)
+
+
+def snapshot_inputs(html_path: Path, image_dirs: Sequence[str] = DEFAULT_IMAGE_DIRS) -> Snapshot:
+    """
+    HTML と画像フォルダの（相対パス, サイズ, 更新時刻）。中身は読まない（ポーリングごとに呼ぶ）。
+    """
+    snap: Snapshot = []
+    for p in [html_path, *_image_files(html_path, image_dirs)]:
+        st = p.stat()
+        snap.append([p.relative_to(html_path.parent).as_posix(), st.st_size, st.st_mtime_ns])
+    return snap
+
+
+def content_key(html_path: Path, image_dirs: Sequence[str], options: Dict[str, Any]) -> str:
+    """
+    HTML・画像の内容と出力設定のハッシュ。同じなら前回の出力をそのまま使える。
+    """
+    h = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+    for p in [html_path, *_image_files(html_path, image_dirs)]:
+        h.update(p.relative_to(html_path.parent).as_posix().encode("utf-8"))
+        h.update(file_sha256(p).encode("ascii"))
+    return h.hexdigest()
+
+
+class WatchFolder:
+    """
+    watch_dir 配下（サブフォルダ含む）の pattern に一致する HTML を監視し、落ち着いたものを out_dir へ出力する。
+    poll() を繰り返し呼ぶ（run() はその繰り返し）。with 文で使い、抜けるとワーカーを止めて状態を書く。
+    workers>=2 ならプロセスプール、それ以外はスレッド1本で出力する（どちらも監視中は起動したまま）。
+    export_kwargs は batch.export_batch と同じく export_from_html / export_report_f2_from_html にそのまま渡す。
+    """
+
+    def __init__(
+        self,
+        watch_dir: Path,
+        out_dir: Path,
+        *,
+        report: BatchReport = "flat",
+        pattern: str = "*.html",
+        settle: float = 2.0,
+        workers: int = 1,
+        image_dirs: Sequence[str] = DEFAULT_IMAGE_DIRS,
+        status_path: Optional[Path] = None,
+        state_path: Optional[Path] = None,
+        progress: Optional[ProgressCb] = None,
+        **export_kwargs: Any,
+    ) -> None:
+        if report not in ("flat", "f2"):
+            raise ValueError(f"unknown watch report: {report!r}")
+        self.watch_dir = watch_dir.expanduser().resolve()
+        self.out_dir = out_dir.expanduser().resolve()
+        self.report = report
+        self.pattern = pattern
+        self.settle = settle
+        self.workers = max(1, workers)
+        self.image_dirs = tuple(image_dirs)
+        self.status_path = status_path or self.out_dir / WATCH_STATUS_NAME
+        self.state_path = state_path or self.out_dir / WATCH_STATE_NAME
+        self.progress = progress
+        self.export_kwargs = export_kwargs
+        self.options = {"report": report, **export_kwargs}
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._state: Dict[str, Dict[str, Any]] = self._load_state()
+        self._pending: Dict[str, _Pending] = {}
+        self._queue: Deque[WatchJob] = deque()
+        self._running: Dict[Future, WatchJob] = {}
+        self._recent: Deque[WatchJob] = deque(maxlen=_RECENT_JOBS)
+        self._started_at = time.time()
+        self._pool = (
+            ProcessPoolExecutor(max_workers=self.workers)
+            if self.workers >= 2
+            else ThreadPoolExecutor(max_workers=1, thread_name_prefix="nctools-watch")
+        )
+
+    def __enter__(self) -> "WatchFolder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        キューに残ったジョブは捨て、実行中のジョブは終わるまで待つ。
+        """
+        self._queue.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._collect()
+            self._pool = None
+        self._write_status()
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _scan(self) -> List[Path]:
+        found = []
+        for p in sorted(self.watch_dir.rglob(self.pattern)):
+            if p.is_file() and self.out_dir not in p.parents:
+                found.append(p)
+        return found
+
+    def poll(self, now: Optional[float] = None) -> None:
+        """
+        1回分の監視: 完了したジョブを回収し、変更を探し、落ち着いた入力をキューへ入れ、空いたワーカーへ渡す。
+        """
+        now = time.monotonic() if now is None else now
+        self._collect()
+
+        found = self._scan()
+        busy = {job.html for job in (*self._queue, *self._running.values())}
+        for html_path, out_dir in zip(found, self._fixed_out_dirs(found)):
+            key = str(html_path)
+            if key in busy:
+                continue  # 実行後にもう一度見る（実行中に変わっていれば次の poll で拾う）
+            try:
+                snap = snapshot_inputs(html_path, self.image_dirs)
+            except OSError:
+                continue  # 書き込み途中で消えた・置き換え中
+            entry = self._state.get(key)
+            if entry is not None and entry.get("snapshot") == snap:
+                self._pending.pop(key, None)
+                continue
+
+            pending = self._pending.get(key)
+            if pending is None or pending.snapshot != snap:
+                detected = pending.detected_at if pending is not None else time.time()
+                self._pending[key] = _Pending(snapshot=snap, since=now, detected_at=detected)
+                continue
+            if now - pending.since < self.settle:
+                continue
+            del self._pending[key]
+            self._enqueue(html_path, out_dir, pending)
+
+        names = {str(p) for p in found}
+        for key in [k for k in self._pending if k not in names]:
+            del self._pending[key]
+
+        self._start_jobs()
+        self._write_status()
+
+    def _fixed_out_dirs(self, found: List[Path]) -> List[Path]:
+        """
+        各入力の出力先フォルダ。最初に見つけたときに決めて状態ファイルに残し、以後は動かさない
+        （後から同じ名前の HTML が増えても、先にあった入力の出力先は変わらない）。
+        """
+        def slot(d: Path, p: Path):
+            return str(d).lower(), sanitize_filename(p.stem).lower()
+
+        taken = {
+            slot(Path(self._state[str(p)]["out_dir"]), p)
+            for p in found
+            if self._state.get(str(p), {}).get("out_dir")
+        }
+        dirs = []
+        assigned = False
+        for p, d in zip(found, _out_dirs(found, self.out_dir)):
+            entry = self._state.setdefault(str(p), {})
+            if not entry.get("out_dir"):
+                if slot(d, p) in taken and d == self.out_dir:
+                    d = self.out_dir / sanitize_filename(p.parent.name)
+                base, n = d, 2
+                while slot(d, p) in taken:
+                    d = base.with_name(f"{base.name}_{n}")
+                    n += 1
+                taken.add(slot(d, p))
+                entry["out_dir"] = str(d)
+                assigned = True
+            dirs.append(Path(entry["out_dir"]))
+        if assigned:
+            self._save_state()
+        return dirs
+
+    def _enqueue(self, html_path: Path, out_dir: Path, pending: _Pending) -> None:
+        try:
+            ckey = content_key(html_path, self.image_dirs, self.options)
+        except OSError:
+            return  # 次の poll でもう一度待ち合わせから
+        entry = self._state.get(str(html_path))
+        if (
+            entry is not None
+            and entry.get("ok")
+            and entry.get("key") == ckey
+            and Path(entry.get("out_xlsx", "")).is_file()
+        ):
+            entry["snapshot"] = pending.snapshot  # 触っただけ（内容は同じ）
+            self.skipped += 1
+            self._save_state()
+            return
+        self._queue.append(WatchJob(
+            html=str(html_path),
+            out_dir=str(out_dir),
+            snapshot=pending.snapshot,
+            key=ckey,
+            detected_at=pending.detected_at,
+            queued_at=time.time(),
+        ))
+
+    def _start_jobs(self) -> None:
+        while self._queue and len(self._running) < self.workers:
+            job = self._queue.popleft()
+            job.started_at = time.time()
+            fut = self._pool.submit(_batch_job, self.report, Path(job.html), Path(job.out_dir), self.export_kwargs)
+            self._running[fut] = job
+
+    def _collect(self) -> None:
+        finished = [fut for fut in self._running if fut.done()]
+        for fut in finished:
+            job = self._running.pop(fut)
+            try:
+                job.item = fut.result()
+            except Exception as e:  # ワーカープロセスごと落ちた場合（BrokenProcessPool など）
+                job.item = BatchItem(html=job.html, report=self.report, error=f"{type(e).__name__}: {e}")
+            job.finished_at = time.time()
+            # 失敗も記録する（同じ内容のまま再試行を繰り返さない。ファイルが変われば再実行）
+            self._state[job.html] = {
+                "out_dir": job.out_dir,
+                "snapshot": job.snapshot,
+                "key": job.key,
+                "ok": job.item.ok,
+                "out_xlsx": job.item.out_xlsx,
+            }
+            if job.item.ok:
+                self.done += 1
+            else:
+                self.failed += 1
+            self._recent.append(job)
+            if self.progress:
+                self.progress(
+                    self.done + self.failed,
+                    self.done + self.failed + len(self._queue) + len(self._running),
+                    f"{'OK' if job.item.ok else 'NG'}: {Path(job.html).name}",
+                )
+        if finished:
+            self._save_state()
+
+    def _save_state(self) -> None:
+        try:
+            atomic_write_bytes(self.state_path, json.dumps(self._state, ensure_ascii=False).encode("utf-8"))
+        except OSError:
+            pass
+
+    def status(self) -> Dict[str, Any]:
+        recent = [job.status() for job in self._recent]
+        latencies = [r["latency_seconds"] for r in recent if "latency_seconds" in r]
+        return {
+            "watch_dir": str(self.watch_dir),
+            "out_dir": str(self.out_dir),
+            "report": self.report,
+            "pid": os.getpid(),
+            "started_at": _iso(self._started_at),
+            "updated_at": _iso(time.time()),
+            "workers": self.workers,
+            "settling": len(self._pending),
+            "queued": len(self._queue),
+            "running": [job.html for job in self._running.values()],
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "mean_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "recent": recent,
+        }
+
+    def _write_status(self) -> None:
+        try:
+            data = json.dumps(self.status(), ensure_ascii=False, indent=2).encode("utf-8")
+            atomic_write_bytes(self.status_path, data)
+        except OSError:
+            pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        キューと実行中のジョブが無くなるまで待つ（新しい変更は探さない）。timeout 内に終われば True。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue or self._running:
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                return False
+            wait(list(self._running), timeout=left, return_when=FIRST_COMPLETED)
+            self._collect()
+            self._start_jobs()
+        self._write_status()
+        return True
+
+    def run(self, *, interval: float = 1.0, stop: Optional[threading.Event] = None) -> None:
+        """
+        stop がセットされるまで interval 秒ごとに poll() する。
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.poll()
+            stop.wait(interval)
@@ -0,0 +1,111 @@
+# src/hypermill_nctools_html_exporter/xlsx_media.py
+from __future__ import annotations
+
+import datetime
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+from zipfile import ZipFile, ZIP_DEFLATED
+
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.writer.excel import ExcelWriter
+
+from .images import probe_image
+
+
+_MediaPart = Tuple[str, Tuple[int, int], str]  # (archive内パス, (w, h), format)
+
+
+class _MediaImage(XLImage):
+    """
+    MediaPool が作る openpyxl Image（遅延ハンドル）。
+      - 寸法はヘッダーから読んだ値を持つだけで、画素はデコードしない
+      - バイト列は loader で、アーカイブへ書き込むときに初めて取り出す
+    同じ内容の画像は同じ media パーツ（/xl/media/thumbN.png）を指すので、
+    アンカーが複数あってもブックには1つだけ格納される。
+    """
+
+    def __init__(self, loader: Callable[[], bytes], part: _MediaPart) -> None:
+        self.ref = None
+        self._loader = loader
+        self._part_path, (self.width, self.height), self.format = part
+
+    @property
+    def path(self) -> str:
+        return self._part_path
+
+    def _data(self) -> bytes:
+        return self._loader()
+
+
+class _DedupExcelWriter(ExcelWriter):
+    """
+    同じ media パーツを指す画像を1回だけ書き込む ExcelWriter。
+    """
+
+    def _write_images(self) -> None:
+        written = set()
+        for img in self._images:
+            if img.path in written:
+                continue
+            written.add(img.path)
+            self._archive.writestr(img.path[1:], img._data())
+
+
+class MediaPool:
+    """
+    1ブック分の埋め込み画像を共有する。
+      - image(png): 同じ内容（SHA-1）なら同じ media パーツを指す Image を返す
+      - file(path): 画像ファイルの遅延 Image（読み込みは保存時。同じパスは同じパーツ）
+      - save(wb, path): 共有パーツを1回だけ書き込んで保存する（wb.save の代わりに使う）
+    どちらも寸法はヘッダーだけから読むので、レイアウト計算では画素をデコードしない。
+    """
+
+    def __init__(self) -> None:
+        self._parts: Dict[Hashable, _MediaPart] = {}
+
+    @property
+    def unique_count(self) -> int:
+        return len(self._parts)
+
+    def _part(self, key: Hashable, src) -> _MediaPart:
+        part = self._parts.get(key)
+        if part is None:
+            info = probe_image(src)
+            if info is None:
+                raise ValueError(f"画像の寸法を読めません: {src if isinstance(src, Path) else '<bytes>'}")
+            fmt, w, h = info
+            part = (f"/xl/media/thumb{len(self._parts) + 1}.{fmt}", (w, h), fmt)
+            self._parts[key] = part
+        return part
+
+    def image(self, data: bytes) -> XLImage:
+        part = self._part(hashlib.sha1(data).digest(), data)
+        return _MediaImage(lambda: data, part)
+
+    def file(self, path: Path) -> XLImage:
+        path = Path(path)
+        part = self._part(("file", str(path)), path)
+        return _MediaImage(path.read_bytes, part)
+
+    def open(
+        self,
+        thumbs: Optional[Sequence[Optional[bytes]]],
+        index: int,
+        cached_path: Optional[Path],
+    ) -> Optional[XLImage]:
+        """
+        writer 用。thumbs（レコード順の縮小PNGバイト列）があればメモリから、
+        無ければ従来どおり cached_path のファイルから Image を作る。
+        """
+        if thumbs is not None:
+            png = thumbs[index]
+            return self.image(png) if png else None
+        return self.file(cached_path) if cached_path else None
+
+    @staticmethod
+    def save(wb, out_xlsx: Path) -> None:
+        # openpyxl.writer.excel.save_workbook と同じ手順で、writer だけ差し替える
+        with ZipFile(out_xlsx, "w", ZIP_DEFLATED, allowZip64=True) as archive:
+            wb.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+            _DedupExcelWriter(wb, archive).save()
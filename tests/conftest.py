@@ -0,0 +1,47 @@
+"""
+テスト共通のヘルパー（同梱の html/ サンプルから作るジョブ・出力XLSXの比較用ダンプ）。
+"""
+from pathlib import Path
+
+from openpyxl import load_workbook
+from PIL import Image
+
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html
+
+
+def job_with_images(tmp_path, sample, same_content=False):
+    """
+    サンプルと同じ HTML を tmp_path/job/ に置き、参照画像（合成）を添える。
+    same_content=True なら全部同じ内容の画像（パスだけ違う）にする。戻り: HTML のパス
+    """
+    html_path = tmp_path / "job" / sample.name
+    html_path.parent.mkdir()
+    html_path.write_bytes(Path(sample).read_bytes())
+    records, _ = parse_nctools_html(html_path)
+    for k, src in enumerate(sorted({r.image_rel_src for r in records if r.image_rel_src})):
+        if same_content:
+            k = 0
+        p = html_path.parent / src.replace("\\", "/")
+        p.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (300 + k * 7, 200), (k * 40 % 256, 90, 0)).save(p)
+    return html_path
+
+
+def dump_workbook(path):
+    """
+    出力XLSXの比較用ダンプ（値・書式の一部・結合・行の高さ・画像の位置と大きさ）。
+    errors シートは、行番号ごとの内容が同じなら順序は問わない。
+    """
+    out = []
+    for ws in load_workbook(path).worksheets:
+        rows = [[(c.value, c.number_format, c.font.sz, c.border.bottom.style) for c in r] for r in ws.iter_rows()]
+        if ws.title == "errors":
+            rows = rows[:1] + sorted(rows[1:], key=repr)
+        out.append((
+            ws.title,
+            rows,
+            sorted(str(m) for m in ws.merged_cells.ranges),
+            {k: d.height for k, d in ws.row_dimensions.items() if d.height},
+            [(i.anchor._from.col, i.anchor._from.row, i.width, i.height) for i in ws._images],
+        ))
+    return out
@@ -0,0 +1,78 @@
+"""
+一括出力（batch）の入力展開・失敗の切り分け・マニフェストの確認。
+同梱の html/ サンプルを使う。
+"""
+import csv
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.hypermill_nctools_html_exporter.batch import collect_html_inputs, export_batch
+
+
+HTML_DIR = Path(__file__).resolve().parents[1] / "html"
+SAMPLES = sorted(HTML_DIR.glob("*/*.html"))
+
+
+def test_collect_html_inputs(tmp_path):
+    listing = tmp_path / "list.txt"
+    listing.write_text(f"# comment\n\n{SAMPLES[0]}\n{HTML_DIR / '*' / '*.html'}\n", encoding="utf-8")
+
+    assert collect_html_inputs([HTML_DIR]) == [p.resolve() for p in SAMPLES]
+    assert collect_html_inputs([str(HTML_DIR / "**" / "*.html")]) == [p.resolve() for p in SAMPLES]
+    # 重複は最初の1つだけ（順序は指定順）
+    assert collect_html_inputs([SAMPLES[1], f"@{listing}"]) == [
+        SAMPLES[1].resolve(), SAMPLES[0].resolve(), *[p.resolve() for p in SAMPLES[2:]]
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("report", ["flat", "f2"])
+def test_export_batch_isolates_failures(tmp_path, workers, report):
+    missing = tmp_path / "missing.html"
+    inputs = [*SAMPLES, missing]
+    manifest = [tmp_path / "m.json", tmp_path / "m.csv"]
+
+    seen = []
+    items = export_batch(
+        inputs,
+        tmp_path / "out",
+        report=report,
+        workers=workers,
+        manifest=manifest,
+        progress=lambda done, total, msg: seen.append((done, total)),
+        embed_images=False,
+        use_cache=False,
+    )
+
+    assert [i.html for i in items] == [str(p) for p in inputs]
+    assert [i.ok for i in items] == [True] * len(SAMPLES) + [False]
+    assert "FileNotFoundError" in items[-1].error
+    for item in items[:-1]:
+        assert Path(item.out_xlsx).is_file()
+        assert item.records > 0 and item.seconds >= 0
+    assert sorted(seen) == [(n, len(inputs)) for n in range(1, len(inputs) + 1)]
+
+    data = json.loads(manifest[0].read_text(encoding="utf-8"))
+    assert (data["files"], data["ok"], data["failed"]) == (len(inputs), len(SAMPLES), 1)
+    assert data["items"][0]["records"] == items[0].records
+
+    with manifest[1].open(encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["ok"] for r in rows] == ["True"] * len(SAMPLES) + ["False"]
+    assert [int(r["errors"]) for r in rows] == [i.errors for i in items]
+
+
+def test_export_batch_same_stem_in_different_folders(tmp_path):
+    a = tmp_path / "a" / "job.html"
+    b = tmp_path / "b" / "job.html"
+    for dst in (a, b):
+        dst.parent.mkdir()
+        shutil.copy(SAMPLES[0], dst)
+
+    items = export_batch([a, b], tmp_path / "out", workers=2, embed_images=False, use_cache=False)
+
+    assert all(i.ok for i in items)
+    assert len({i.out_xlsx for i in items}) == 2
@@ -0,0 +1,68 @@
+"""
+解析キャッシュ（ParseCache）・縮小画像キャッシュ（ThumbnailCache）の確認。
+"""
+import os
+from pathlib import Path
+
+from src.hypermill_nctools_html_exporter import cache as cache_mod
+from PIL import Image
+
+from src.hypermill_nctools_html_exporter.cache import (
+    ParseCache,
+    ThumbnailCache,
+    parse_nctools_html_cached,
+    thumbnail_png_cached,
+)
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html
+
+
+SAMPLE = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))[0]
+
+
+def test_parse_cache_hit_skips_parsing(tmp_path, monkeypatch):
+    cache = ParseCache(tmp_path / "parse")
+    expected = parse_nctools_html(SAMPLE)
+
+    records, errors, hit = parse_nctools_html_cached(SAMPLE, cache=cache)
+    assert not hit
+    assert (records, errors) == expected
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("キャッシュヒット時に解析が走っています")
+
+    monkeypatch.setattr(cache_mod, "parse_nctools_html", _fail)
+    records, errors, hit = parse_nctools_html_cached(SAMPLE, cache=cache)
+    assert hit
+    assert (records, errors) == expected
+
+
+def test_disk_lru_evicts_oldest(tmp_path):
+    lru = cache_mod.DiskLRU(tmp_path, max_bytes=250)
+    for i, key in enumerate(["a", "b", "c"]):
+        lru.write(key, b"x" * 100)
+        os.utime(lru.path_for(key), (1000 + i, 1000 + i))
+    lru.evict()
+
+    assert lru.read("a") is None
+    assert lru.read("b") is not None
+    assert lru.read("c") is not None
+
+
+def test_thumbnail_cache_hit_skips_pillow(tmp_path, monkeypatch):
+    src = tmp_path / "tool.png"
+    Image.new("RGB", (640, 480), "red").save(src)
+    cache = ThumbnailCache(tmp_path / "thumbs", max_bytes=1024 * 1024)
+
+    png, err, hit = thumbnail_png_cached(src, max_px=320, cache=cache)
+    assert png and err is None and not hit
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("キャッシュヒット時に縮小が走っています")
+
+    monkeypatch.setattr(cache_mod, "make_thumbnail_png", _fail)
+    png2, err2, hit2 = thumbnail_png_cached(src, max_px=320, cache=cache)
+    assert hit2 and err2 is None
+    assert png2 == png
+
+    # max_px が違えば別エントリ
+    assert cache.read(ThumbnailCache.key_for(cache_mod.file_sha256(src), 160)) is None
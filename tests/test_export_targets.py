@@ -0,0 +1,101 @@
+"""
+複数出力（export_targets）が、単独出力の関数と同じ内容を1回の解析・画像縮小で書くことの確認。
+同梱の html/ サンプルを使う。
+"""
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter import core
+from src.hypermill_nctools_html_exporter.core import (
+    ExportTarget,
+    export_from_html,
+    export_report_f2_from_html,
+    export_targets,
+)
+from tests.conftest import dump_workbook, job_with_images
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+@pytest.fixture
+def job(tmp_path):
+    return job_with_images(tmp_path, SAMPLES[-1])
+
+
+def test_target_spec():
+    assert ExportTarget.parse("f2:en:2row:raw:160") == ExportTarget("f2", "en", "2row", "raw", 160)
+    assert ExportTarget.parse("flat") == ExportTarget()
+    assert ExportTarget.parse("f2:4row").label == "f2:ja:4row"
+    assert ExportTarget.parse("f2:en:160").file_name("job") == "nctools_report__job__en__160px.xlsx"
+    assert ExportTarget.parse("f2").file_name("job") == "nctools_report__job.xlsx"
+    for bad in ("flat:en", "f2:xx", "f2:ja:en", "pdf", "f2:0"):
+        with pytest.raises(ValueError):
+            ExportTarget.parse(bad)
+
+
+@pytest.mark.parametrize("writers", [1, 3])
+def test_export_targets_matches_single_exports(tmp_path, job, monkeypatch, writers):
+    out_flat, _ = export_from_html(job, tmp_path / "single", use_cache=False)
+    out_ja, _ = export_report_f2_from_html(job, tmp_path / "single", use_cache=False)
+    out_en, _ = export_report_f2_from_html(
+        job, tmp_path / "single_en", use_cache=False, out_lang="en", f2_layout="2row"
+    )
+
+    calls = []
+    parse = core.parse_nctools_html
+    monkeypatch.setattr(core, "parse_nctools_html", lambda *a, **kw: calls.append(1) or parse(*a, **kw))
+    jobs = []
+    run_jobs = core._run_thumbnail_jobs
+    monkeypatch.setattr(core, "_run_thumbnail_jobs", lambda src, **kw: jobs.append(len(src)) or run_jobs(src, **kw))
+
+    paths, summary = export_targets(
+        job, tmp_path / "multi", ["flat", "f2", "f2:en:2row", "f2"], use_cache=False, writers=writers
+    )
+
+    assert calls == [1] and len(jobs) == 1  # 解析・画像縮小は1回
+    assert [p.name for p in paths] == [out_flat.name, out_ja.name, f"{out_ja.stem}__en__2row.xlsx"]
+    for got, expected in zip(paths, (out_flat, out_ja, out_en)):
+        assert dump_workbook(got) == dump_workbook(expected)
+    assert [t["target"] for t in summary["targets"]] == ["flat", "f2:ja:3row", "f2:en:2row"]
+    assert all(t["records"] == summary["records"] for t in summary["targets"])
+
+
+def test_export_targets_smaller_max_px_shrinks_shared_thumbnails(tmp_path, job):
+    paths, summary = export_targets(job, tmp_path, ["f2", "f2:en:100"], max_px=200, use_cache=False)
+
+    assert summary["max_px"] == 200
+    sizes = []
+    for path in paths:
+        ws = load_workbook(path).active
+        sizes.append(max(max(i.width, i.height) for i in ws._images))
+    assert sizes == [200, 100]
+    assert summary["targets"][1]["embedded_images"] == summary["targets"][0]["embedded_images"] > 0
+
+
+def test_export_targets_rejects_colliding_outputs(tmp_path, job):
+    with pytest.raises(ValueError):
+        export_targets(job, tmp_path, ["f2", "f2:raw"])
+    assert not (tmp_path / job.stem).exists()
+
+
+def test_export_targets_keep_image_errors_per_target(tmp_path, job, monkeypatch):
+    # 1件目の縮小PNGが壊れている: そのままの max_px では埋め込みに失敗し、小さい max_px では縮小に失敗する
+    prepare = core._prepare
+
+    def broken_first_thumb(*a, **kw):
+        prepared = prepare(*a, **kw)
+        prepared.thumbs[0] = b"broken"
+        return prepared
+
+    monkeypatch.setattr(core, "_prepare", broken_first_thumb)
+    paths, summary = export_targets(job, tmp_path, ["flat", "flat:100"], use_cache=False, writers=2)
+
+    base = summary["errors"]
+    assert [t["errors"] for t in summary["targets"]] == [base + 1, base + 1]
+    for path in paths:
+        rows = [r for r in load_workbook(path)["errors"].iter_rows(min_row=2, values_only=True) if r[0] == 2]
+        assert len(rows) == 1, rows  # 他の target のエラーが混ざらない
+    assert summary["targets"][1]["embedded_images"] == summary["targets"][0]["embedded_images"]
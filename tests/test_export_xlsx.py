@@ -0,0 +1,26 @@
+"""
+フラット一覧 writer（write_xlsx）の書き出しの確認。
+"""
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter.export_xlsx import write_xlsx
+from src.hypermill_nctools_html_exporter.model import NcToolRecord, RecordTable
+
+
+def test_write_xlsx_streams_past_autosize_window(tmp_path):
+    # 列幅を決める先頭 _AUTOSIZE_ROWS 行を超えても、行の高さ・列幅・値が揃って出る
+    names = [f"T{i}" for i in range(450)]
+    names[10] = "X" * 40  # 列幅計算の範囲内
+    names[400] = "Y" * 80  # 範囲外（列幅には効かない）
+    table = RecordTable.from_records([NcToolRecord(nctool_no=i, nctool_name=n) for i, n in enumerate(names)])
+
+    out = tmp_path / "big.xlsx"
+    assert write_xlsx(table, out, embed_images=False, row_height=30) == (450, 0)
+
+    ws = load_workbook(out)["nctools"]
+    assert ws.max_row == 451
+    assert [c.value for c in ws["B"][1:]] == names
+    assert ws.column_dimensions["B"].width == 42
+    assert ws.row_dimensions[1].height is None
+    assert {ws.row_dimensions[r].height for r in (2, 200, 451)} == {30}
+
@@ -0,0 +1,41 @@
+"""
+F2帳票 writer（export_blocks_f2_xlsx）の書式・結合の確認。
+"""
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter.export_xlsx_blocks import export_blocks_f2_xlsx
+from src.hypermill_nctools_html_exporter.model import NcToolRecord, RecordTable
+
+
+def _table(n):
+    return RecordTable.from_records([NcToolRecord(nctool_no=i, nctool_name=f"T{i}") for i in range(n)])
+
+
+def test_f2_block_styles_and_merges(tmp_path):
+    out = tmp_path / "f2.xlsx"
+    export_blocks_f2_xlsx(_table(3), out, embed_images=False)
+    ws = load_workbook(out).active
+
+    assert len(ws.merged_cells.ranges) == 8 * 3
+    assert "G5:G7" in {str(r) for r in ws.merged_cells.ranges}
+
+    def sides(coord):
+        b = ws[coord].border
+        return b.left.style, b.right.style, b.top.style, b.bottom.style
+
+    assert sides("A2") == ("medium", "thin", "medium", "thin")
+    assert sides("J7") == ("thin", "thin", "thin", "medium")
+    assert sides("K2")[1] == "medium"
+    assert sides("G6") == ("thin", "thin", None, None)  # 画像列の内部横線は無し
+    assert (ws["A2"].font.sz, ws["B2"].font.sz, ws["I3"].font.sz, ws["A1"].font.b) == (12, 14, 11, True)
+
+
+def test_f2_body_cells_keep_workbook_default_font(tmp_path):
+    for backend in ("openpyxl", "raw"):
+        out = tmp_path / f"{backend}.xlsx"
+        export_blocks_f2_xlsx(_table(2), out, embed_images=False, backend=backend)
+        ws = load_workbook(out).active
+        for coord in ("C2", "E3", "J4", "K7"):
+            f = ws[coord].font
+            assert (f.name, f.sz, f.b, f.scheme) == ("Calibri", 11, False, "minor"), (backend, coord)
+
@@ -0,0 +1,133 @@
+"""
+export_blocks_f2_xlsx の backend（openpyxl / raw）で出力内容が変わらないことを、
+openpyxl で読み戻して確認する。
+"""
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+from PIL import Image
+
+from src.hypermill_nctools_html_exporter.export_xlsx_blocks import export_blocks_f2_xlsx
+from src.hypermill_nctools_html_exporter.images import make_thumbnail_png
+from src.hypermill_nctools_html_exporter.model import NcToolRecord, RecordTable
+
+
+def _records(n):
+    return [
+        NcToolRecord(
+            nctool_no=k,
+            nctool_name=f"T{k} <&> \"x\"",
+            holder_name=f"HSK-A63 {k}",
+            tool_name=f"ツール{k}",
+            tool_diameter_mm="10.000",
+            extensions_str=["", "EXT-1(L=25)", "EXT-1(L=25) / EXT-2(L=50) / EXT-3"][k % 3],
+            overhang_mm=str(40 + k),
+        )
+        for k in range(n)
+    ]
+
+
+def _thumbs(tmp_path, n):
+    pngs = []
+    for k in range(2):
+        p = tmp_path / f"img{k}.png"
+        Image.new("RGB", (400, 200 + k * 150), (k * 90, 30, 0)).save(p)
+        pngs.append(make_thumbnail_png(p, max_px=120, png_level=1)[0])
+    # 画像なし・同じ内容の画像の共有も含める
+    return [None if k % 4 == 3 else pngs[k % 2] for k in range(n)]
+
+
+def _snapshot(path):
+    ws = load_workbook(path).active
+    cells = {}
+    for row in ws.iter_rows():
+        for c in row:
+            cells[c.coordinate] = (
+                c.value,
+                (c.font.name, c.font.sz, c.font.b, c.font.scheme),
+                tuple(getattr(c.border, s).style for s in ("left", "right", "top", "bottom")),
+                (c.alignment.horizontal, c.alignment.vertical, c.alignment.wrap_text),
+            )
+    anchors = [
+        (a._from.col, a._from.colOff, a._from.row, a._from.rowOff, a.ext.width, a.ext.height)
+        for a in (img.anchor for img in ws._images)
+    ]
+    return {
+        "title": ws.title,
+        "cells": cells,
+        "merged": sorted(str(r) for r in ws.merged_cells.ranges),
+        "heights": {r: d.height for r, d in ws.row_dimensions.items() if d.height},
+        "widths": {k: d.width for k, d in ws.column_dimensions.items() if d.customWidth},
+        "anchors": anchors,
+    }
+
+
+@pytest.mark.parametrize("layout", ["3row", "2row", "4row"])
+@pytest.mark.parametrize("lang", ["ja", "en"])
+@pytest.mark.parametrize("as_table", [False, True], ids=["list", "table"])
+def test_raw_backend_matches_openpyxl(tmp_path, lang, as_table, layout):
+    n = 9
+    records = _records(n)
+    if as_table:
+        records = RecordTable.from_records(records)
+    thumbs = _thumbs(tmp_path, n)
+
+    results = {}
+    for backend in ("openpyxl", "raw"):
+        out = tmp_path / f"{backend}.xlsx"
+        results[backend] = export_blocks_f2_xlsx(
+            records, out, lang=lang, thumbs=thumbs, backend=backend, layout=layout
+        )
+
+    assert results["raw"] == results["openpyxl"] == (n, 7)
+    expected = _snapshot(tmp_path / "openpyxl.xlsx")
+    actual = _snapshot(tmp_path / "raw.xlsx")
+    for key in expected:
+        assert actual[key] == expected[key], key
+
+    # 同じ内容の画像は1つの media パーツを共有する
+    media = [n for n in zipfile.ZipFile(tmp_path / "raw.xlsx").namelist() if n.startswith("xl/media/")]
+    assert len(media) == 2
+
+
+def test_raw_backend_without_images(tmp_path):
+    records = _records(3)
+    for backend in ("openpyxl", "raw"):
+        export_blocks_f2_xlsx(records, tmp_path / f"{backend}.xlsx", embed_images=False, backend=backend)
+
+    assert _snapshot(tmp_path / "raw.xlsx") == _snapshot(tmp_path / "openpyxl.xlsx")
+    names = zipfile.ZipFile(tmp_path / "raw.xlsx").namelist()
+    assert not any(n.startswith("xl/drawings/") for n in names)
+
+
+def test_unknown_f2_backend(tmp_path):
+    with pytest.raises(ValueError):
+        export_blocks_f2_xlsx([], tmp_path / "x.xlsx", backend="xlsxwriter")
+    with pytest.raises(ValueError):
+        export_blocks_f2_xlsx([], tmp_path / "x.xlsx", layout="5row")
+
+
+@pytest.mark.parametrize("backend", ["openpyxl", "raw"])
+def test_alternate_layouts(tmp_path, backend):
+    records = _records(3)
+
+    out = tmp_path / "4row.xlsx"
+    export_blocks_f2_xlsx(records, out, embed_images=False, backend=backend, layout="4row")
+    ws = load_workbook(out).active
+    assert "G10:G13" in {str(r) for r in ws.merged_cells.ranges}
+    # 3つ目のレコード（extension 3つ）: 1つ目と残りを別の行に出す
+    assert [ws.cell(r, 9).value for r in range(10, 14)] == [
+        "HSK-A63 2", "EXT-1(L=25)", "EXT-2(L=50) / EXT-3", "ツール2",
+    ]
+    assert ws["J13"].border.bottom.style == "medium"
+    assert {ws.row_dimensions[r].height for r in range(2, 14)} == {80}
+
+    out = tmp_path / "2row.xlsx"
+    export_blocks_f2_xlsx(records, out, embed_images=False, backend=backend, layout="2row")
+    ws = load_workbook(out).active
+    assert len(ws.merged_cells.ranges) == 8 * 3
+    assert "A6:A7" in {str(r) for r in ws.merged_cells.ranges}
+    assert ws["H4"].value == "ホルダー / エクステンション"
+    assert ws["I4"].value == "HSK-A63 1\nEXT-1(L=25)"
+    assert (ws["H2"].value, ws["H3"].value) == ("ホルダー", "工具")
@@ -0,0 +1,149 @@
+"""
+画像ステージ（縮小・並列化）の確認。
+"""
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+
+from src.hypermill_nctools_html_exporter.core import _run_thumbnail_jobs
+from src.hypermill_nctools_html_exporter.export_xlsx_blocks import export_blocks_f2_xlsx
+from src.hypermill_nctools_html_exporter.images import (
+    RESAMPLE_PRESETS,
+    make_thumbnail_png,
+    probe_image_size,
+    render_thumbnail_png,
+)
+from src.hypermill_nctools_html_exporter.model import NcToolRecord
+
+
+def _make_images(tmp_path, n):
+    paths = []
+    for k in range(n):
+        p = tmp_path / f"img{k}.png"
+        Image.new("RGB", (400 + k * 10, 300), (k * 20 % 256, 0, 0)).save(p)
+        paths.append(p)
+    return paths
+
+
+def test_parallel_thumbnails_keep_order(tmp_path):
+    sources = _make_images(tmp_path, 6)
+    serial = _run_thumbnail_jobs(sources, max_px=100, cache_dir=None, workers=1, executor="thread")
+
+    done = []
+    parallel = _run_thumbnail_jobs(
+        sources, max_px=100, cache_dir=None, workers=3, executor="thread", on_done=done.append
+    )
+    assert parallel == serial
+    assert sorted(done) == list(range(1, len(sources) + 1))
+
+
+def test_f2_embeds_in_memory_thumbnails(tmp_path):
+    sources = _make_images(tmp_path, 2)
+    thumbs = [make_thumbnail_png(p, max_px=64, png_level=1)[0] for p in sources] + [None]
+    records = [NcToolRecord(nctool_no=k, nctool_name=f"T{k}") for k in range(3)]
+
+    out = tmp_path / "f2.xlsx"
+    written, img_count = export_blocks_f2_xlsx(records, out, thumbs=thumbs)
+
+    assert (written, img_count) == (3, 2)
+    media = [n for n in zipfile.ZipFile(out).namelist() if n.startswith("xl/media/")]
+    assert len(media) == 2
+
+
+def test_duplicate_images_share_one_media_part(tmp_path):
+    from openpyxl import load_workbook
+
+    from src.hypermill_nctools_html_exporter.core import export_from_html
+
+    src = _make_images(tmp_path, 1)[0]
+    (tmp_path / "copy.png").write_bytes(src.read_bytes())  # パス違い・同一内容
+    pages = "".join(
+        f'<div class="page"><h3>NC-Tool:T{k} ({k})</h3><img src="{name}"/></div>'
+        for k, name in enumerate(["img0.png", "img0.png", "copy.png"], start=1)
+    )
+    html_path = tmp_path / "dup.html"
+    html_path.write_text(f"<html><body>{pages}</body></html>", encoding="utf-8")
+
+    out, summary = export_from_html(html_path, tmp_path / "out", use_cache=False)
+    assert (summary["images_total"], summary["images_unique"]) == (3, 1)
+
+    media = [n for n in zipfile.ZipFile(out).namelist() if n.startswith("xl/media/")]
+    assert len(media) == 1
+    assert len(load_workbook(out)["nctools"]._images) == 3
+
+
+@pytest.mark.parametrize("preset", RESAMPLE_PRESETS)
+def test_resample_presets_fit_max_px(tmp_path, preset):
+    jpg = tmp_path / "big.jpg"
+    Image.new("RGB", (1700, 900), (10, 120, 200)).save(jpg)
+    rgba = tmp_path / "alpha.png"
+    Image.new("RGBA", (900, 1700), (10, 120, 200, 100)).save(rgba)
+
+    for src, size, mode in [(jpg, (320, 169), "RGB"), (rgba, (169, 320), "RGBA")]:
+        with Image.open(io.BytesIO(render_thumbnail_png(src, max_px=320, preset=preset))) as im:
+            assert im.size == size
+            assert im.mode == ("RGBA" if preset == "best" else mode)
+
+
+def test_small_png_is_not_reencoded(tmp_path):
+    small = tmp_path / "small.png"
+    Image.new("RGB", (100, 80), (1, 2, 3)).save(small)
+
+    assert render_thumbnail_png(small, max_px=320, preset="balanced") == small.read_bytes()
+    assert render_thumbnail_png(small, max_px=320, preset="best") != small.read_bytes()
+    assert render_thumbnail_png(small, max_px=320) == render_thumbnail_png(small, max_px=320, preset="best")  # 既定は従来どおり
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG", "GIF"])
+def test_probe_image_size_reads_header_only(tmp_path, fmt):
+    p = tmp_path / f"x.{fmt.lower()}"
+    Image.new("RGB", (123, 45)).save(p, fmt)
+    data = p.read_bytes()
+
+    assert probe_image_size(p) == (123, 45)
+    assert probe_image_size(data[:4096]) == (123, 45)  # 画素データが無くても読める
+    assert probe_image_size(b"not an image") is None
+
+
+def test_f2_dry_run_layout_matches_written_anchors(tmp_path):
+    from openpyxl import load_workbook
+    from openpyxl.utils.units import EMU_to_pixels
+
+    from src.hypermill_nctools_html_exporter.core import export_report_f2_from_html
+
+    Image.new("RGB", (800, 600)).save(tmp_path / "a.jpg")
+    Image.new("RGBA", (200, 500)).save(tmp_path / "b.png")
+    pages = "".join(
+        f'<div class="page"><h3>NC-Tool:T{k} ({k})</h3><img src="{name}"/></div>'
+        for k, name in enumerate(["a.jpg", "missing.png", "b.png"], start=1)
+    )
+    html_path = tmp_path / "job.html"
+    html_path.write_text(f"<html><body>{pages}</body></html>", encoding="utf-8")
+
+    out, dry = export_report_f2_from_html(html_path, tmp_path / "out", use_cache=False, dry_run=True)
+    assert dry["dry_run"] and not out.exists()
+    assert [lay.image_size for lay in dry["layout"]] == [(320, 240), None, (128, 320)]
+
+    out, _summary = export_report_f2_from_html(html_path, tmp_path / "out", use_cache=False)
+    anchors = [img.anchor._from for img in load_workbook(out).active._images]
+    expected = [lay for lay in dry["layout"] if lay.image_size]
+    assert [(a.row + 1, EMU_to_pixels(a.colOff), EMU_to_pixels(a.rowOff)) for a in anchors] == [
+        (lay.row_top, *lay.image_offset) for lay in expected
+    ]
+
+
+def test_write_xlsx_streams_errors_sheet(tmp_path):
+    from openpyxl import load_workbook
+
+    from src.hypermill_nctools_html_exporter.export_xlsx import write_xlsx
+
+    records = [NcToolRecord(nctool_no=k, nctool_name=f"T{k}") for k in range(2)]
+    errors = [(0, "", "parse warning")]
+    out = tmp_path / "list.xlsx"
+    write_xlsx(records, out, thumbs=[None, b"broken"], errors=errors)
+
+    assert errors[1][:2] == (3, "T1")  # 書き込み中の埋め込み失敗もシンクに入る
+    rows = list(load_workbook(out)["errors"].iter_rows(min_row=2, values_only=True))
+    assert [(r[0], r[2]) for r in rows] == [(e[0], e[2]) for e in errors]
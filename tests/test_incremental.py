@@ -0,0 +1,58 @@
+"""
+incremental（前回出力の指紋ファイルによる再利用）の確認。
+同梱の html/ サンプルを使う。
+"""
+import json
+import pickle
+from pathlib import Path
+
+import pytest
+
+from src.hypermill_nctools_html_exporter.core import export_from_html
+from src.hypermill_nctools_html_exporter.incremental import load_state, state_path_for
+from tests.conftest import job_with_images
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+@pytest.fixture
+def job(tmp_path):
+    return job_with_images(tmp_path, SAMPLES[0])
+
+
+def test_incremental_reuses_groups_from_json_state(tmp_path, job):
+    out, s1 = export_from_html(job, tmp_path / "out", use_cache=False, incremental=True)
+    state = state_path_for(out)
+    assert json.loads(state.read_text(encoding="utf-8"))["version"]
+
+    out, s2 = export_from_html(job, tmp_path / "out", use_cache=False, incremental=True)
+    assert s2["groups_reused"] == s2["records"] > 0
+    assert s2["images_total"] == s1["images_total"]
+
+
+@pytest.mark.parametrize("content", [
+    b"not json",
+    pickle.dumps({"version": 3}),
+    b"[]",
+    b'{"version": 3, "fields": [], "thumb": [320, ""], "groups": {}}',
+    "groups-bad-row",
+    "groups-bad-png",
+])
+def test_incremental_falls_back_to_full_rebuild_on_bad_state(tmp_path, job, content):
+    out, s1 = export_from_html(job, tmp_path / "out", use_cache=False, incremental=True)
+    state = state_path_for(out)
+    if isinstance(content, str):
+        data = json.loads(state.read_text(encoding="utf-8"))
+        entry = next(iter(data["groups"].values()))
+        if content == "groups-bad-row":
+            entry["row"][1] = {"__reduce__": "os.system"}
+        else:
+            entry["png"] = "***"
+        content = json.dumps(data).encode("utf-8")
+    state.write_bytes(content)
+
+    assert load_state(state, max_px=320) == {}
+    out, s2 = export_from_html(job, tmp_path / "out", use_cache=False, incremental=True)
+    assert s2["groups_reused"] == 0 and s2["records"] == s1["records"]
+    assert load_state(state, max_px=320)  # 全部作り直して、読める状態ファイルを書き直す
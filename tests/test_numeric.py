@@ -0,0 +1,50 @@
+"""
+数値ステージ（numeric_stage / to_float_array）の確認。
+"""
+import math
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter.export_xlsx import write_xlsx
+from src.hypermill_nctools_html_exporter.model import NcToolRecord
+from src.hypermill_nctools_html_exporter.numeric import numeric_stage, to_float_array
+from src.hypermill_nctools_html_exporter.parse_html import _to_float_mm
+
+
+def test_to_float_array_matches_scalar():
+    values = ["", "130", "130.000", "130,000", "１３０．０００ mm", "L=-5", "a+2.5b", "5-3", "-", "mm", "\x1fx 7"]
+    arr = to_float_array(values)
+    for v, x in zip(values, arr.tolist()):
+        expected = _to_float_mm(v)
+        if expected is None:
+            assert math.isnan(x), v
+        else:
+            assert x == expected, v
+
+
+def test_numeric_stage_fills_totals_and_ld(tmp_path):
+    records = [
+        NcToolRecord(nctool_name="A", holder_length="50", tool_length="30", ext_overhang_mm="25.5",
+                     overhang_mm="55.5", tool_overhang_mm="30", tool_diameter_mm="10"),
+        NcToolRecord(nctool_name="B", holder_length="", tool_length="40", ext_overhang_mm="0",
+                     overhang_mm="40", tool_overhang_mm="40", tool_diameter_mm="0"),
+    ]
+    numeric = numeric_stage(records)
+
+    assert records[0].total_length_mm == "105.5"
+    assert records[0].overhang_ld_ratio == "5.55"
+    assert records[0].tool_ld_ratio == "3.00"
+    # holder長さが無ければ全長は出さない / 径0 は L/D を出さない
+    assert records[1].total_length_mm == ""
+    assert records[1].overhang_ld_ratio == ""
+    assert numeric.value("tool_length", 1) == 40.0
+
+    out = tmp_path / "out.xlsx"
+    write_xlsx(records, out, embed_images=False, numeric=numeric)
+    ws = load_workbook(out)["nctools"]
+    header = [c.value for c in ws[1]]
+    row = {h: c.value for h, c in zip(header, ws[2])}
+    assert row["tool_length"] == 30
+    assert row["total_length_mm"] == 105.5
+    assert row["nctool_name"] == "A"
@@ -0,0 +1,106 @@
+"""
+parse_nctools_html の backend / 読み込み方式の違いで結果が変わらないことを確認する。
+同梱の html/ サンプルを使う。
+"""
+from pathlib import Path
+
+import pytest
+
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html, parse_nctools_html_groups
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+@pytest.mark.parametrize("html_path", SAMPLES, ids=lambda p: p.stem)
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"backend": "lxml"},
+        {"stream": True},
+        {"backend": "lxml", "stream": True},
+        {"workers": 2},
+        {"backend": "lxml", "workers": 2},
+    ],
+    ids=lambda kw: "-".join(f"{k}={v}" for k, v in kw.items()),
+)
+def test_parse_parity(html_path, kwargs):
+    expected = parse_nctools_html(html_path)
+    actual = parse_nctools_html(html_path, **kwargs)
+
+    assert expected[0], "サンプルからレコードが取れていません"
+    assert actual == expected
+
+
+def test_unknown_backend(tmp_path):
+    html_path = tmp_path / "x.html"
+    html_path.write_text("<html></html>", encoding="utf-8")
+    with pytest.raises(ValueError):
+        parse_nctools_html(html_path, backend="regex")
+
+
+@pytest.mark.parametrize("html_path", SAMPLES, ids=lambda p: p.stem)
+def test_parse_groups_reuse_parity(html_path):
+    expected = parse_nctools_html(html_path)
+
+    records, errors, fps = parse_nctools_html_groups(html_path)
+    assert (records, errors) == expected
+    assert len(fps) == len(records)
+
+    # 全グループ再利用でも同じ結果になる
+    reuse = {fp: rec for fp, rec in zip(fps, records)}
+    records2, errors2, fps2 = parse_nctools_html_groups(html_path, reuse=reuse)
+    assert (records2, errors2) == expected
+    assert fps2 == fps
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+@pytest.mark.parametrize("kwargs", [{}, {"stream": True}, {"workers": 2}], ids=["default", "stream", "workers"])
+def test_invalid_utf8_bytes_are_ignored(tmp_path, backend, kwargs):
+    html_path = tmp_path / "bad.html"
+    html_path.write_bytes(
+        b'<?xml version="1.0" encoding="utf-8"?><html><body>'
+        b'<div class="page"><h3>NC-Tool:BAD\xff\xfeNAME (1)</h3></div>'
+        b'<div class="page"><h3>NC-Tool:\xe3\x83\x84\xe3\x83 (2)</h3></div>'
+        b"</body></html>"
+    )
+    records, _errors = parse_nctools_html(html_path, backend=backend, **kwargs)
+    assert [(r.nctool_no, r.nctool_name) for r in records] == [(1, "BADNAME"), (2, "ツ")]
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+def test_table_rows_are_direct_children_only(tmp_path, backend):
+    # 外側レイアウトtableの中に KV表 と 構成部品表 が入れ子になっている（hyperMILL の NC-Tool ページと同じ形）
+    html_path = tmp_path / "nested.html"
+    html_path.write_text(
+        '<html><body><div class="page"><h3>NC-Tool:N1 (1)</h3>'
+        "<table><tr><td>"
+        "<table><tbody><tr><td>NC-Tool comment</td><td>outer</td></tr></tbody></table>"
+        '<table border="1"><tbody>'
+        "<tr><td>Coupling type</td><td>Name</td><td>Reach</td></tr>"
+        "<tr><td>tool</td><td>T1</td><td>"
+        "<table><tr><td>holder</td><td>NESTED</td><td>9</td></tr></table>30"
+        "</td></tr>"
+        "</tbody></table>"
+        "</td></tr></table>"
+        "</div></body></html>",
+        encoding="utf-8",
+    )
+    records, _errors = parse_nctools_html(html_path, backend=backend)
+    rec = records[0]
+    assert rec.nctool_comment == "outer"
+    assert rec.tool_name == "T1"
+    assert rec.holder_name == ""  # 入れ子tableの行は構成部品として拾わない
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+def test_truncated_html_stream_parity(tmp_path, backend):
+    # 書き込み途中で切れたHTML（最後の div.page が閉じていない）でも、逐次解析で最後のページを落とさない
+    text = SAMPLES[-1].read_text(encoding="utf-8")
+    html_path = tmp_path / "truncated.html"
+    last = text.rindex('<div class="page"')
+    html_path.write_text(text[: text.index("</table>", last)], encoding="utf-8")
+
+    expected = parse_nctools_html(html_path, backend=backend)
+    assert expected[0]
+    assert parse_nctools_html(html_path, backend=backend, stream=True) == expected
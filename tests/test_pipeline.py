@@ -0,0 +1,99 @@
+"""
+パイプライン出力（pipeline=True）が段階実行と同じ内容になること、並べ直しバッファが順序を保つことの確認。
+同梱の html/ サンプルを使う。
+"""
+from pathlib import Path
+
+import pytest
+
+from src.hypermill_nctools_html_exporter import pipeline
+from src.hypermill_nctools_html_exporter.core import export_from_html, export_report_f2_from_html
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html
+from src.hypermill_nctools_html_exporter.pipeline import RecordPipeline
+from tests.conftest import dump_workbook, job_with_images
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+@pytest.mark.parametrize("html_path", SAMPLES, ids=lambda p: p.stem)
+@pytest.mark.parametrize("report", ["flat", "f2"])
+def test_pipeline_matches_phased(tmp_path, html_path, report):
+    html_path = job_with_images(tmp_path, html_path)
+    if report == "f2":
+        def run(out, **kw):
+            return export_report_f2_from_html(html_path, out, use_cache=False, f2_backend="raw", **kw)
+    else:
+        def run(out, **kw):
+            return export_from_html(html_path, out, use_cache=False, **kw)
+
+    out1, s1 = run(tmp_path / "phased")
+    out2, s2 = run(tmp_path / "pipeline", pipeline=True, image_workers=2)
+
+    assert dump_workbook(out2) == dump_workbook(out1)
+    for key in ("records", "errors", "images_total", "images_unique"):
+        assert s2.get(key) == s1.get(key), key
+    assert s2["pipeline"] and s2["first_row_seconds"] is not None
+
+
+@pytest.mark.parametrize("same_content, lru", [(True, pipeline._JOB_LRU), (False, 1)], ids=["same_content", "lru1"])
+def test_pipeline_dedupes_by_content_with_bounded_jobs(tmp_path, monkeypatch, same_content, lru):
+    # 別パスでも同じ内容の画像は1回だけ縮小する / 覚えておくジョブを追い出しても出力は同じ
+    html_path = job_with_images(tmp_path, SAMPLES[-1], same_content=same_content)
+    srcs = [r.image_rel_src for r in parse_nctools_html(html_path)[0]]
+    text = html_path.read_text(encoding="utf-8")
+    html_path.write_text(text.replace(srcs[2], srcs[0]), encoding="utf-8")  # 3件目が1件目の画像に戻る
+    monkeypatch.setattr(pipeline, "_JOB_LRU", lru)
+    submitted = []
+    job = pipeline.thumbnail_job
+    monkeypatch.setattr(pipeline, "thumbnail_job", lambda *a: submitted.append(a[0]) or job(*a))
+
+    out1, s1 = export_from_html(html_path, tmp_path / "phased", use_cache=False)
+    out2, s2 = export_from_html(html_path, tmp_path / "pipeline", use_cache=False, pipeline=True)
+
+    assert dump_workbook(out2) == dump_workbook(out1)
+    for key in ("records", "errors", "images_total", "images_unique"):
+        assert s2.get(key) == s1.get(key), key
+    if same_content:
+        assert len(submitted) == 1 and s2["images_unique"] == 1
+    else:
+        # 画像は1種類減ったが、追い出した1件目の画像を3件目で縮小し直す
+        assert len(submitted) == len(set(srcs)) and submitted[2] == submitted[0]
+
+
+def test_pipeline_keeps_order_with_small_window(tmp_path):
+    html_path = job_with_images(tmp_path, SAMPLES[-1])
+    expected, _ = parse_nctools_html(html_path)
+
+    errors = []
+    with RecordPipeline(html_path, embed_images=True, max_px=64, use_cache=False, image_workers=3,
+                        window=2, errors=errors) as pipe:
+        seen = []
+        for k, rec in enumerate(pipe):
+            seen.append((rec.nctool_no, rec.nctool_name))
+            png = pipe.thumbs[k]
+            assert png is None or png.startswith(b"\x89PNG")
+            assert pipe.numeric.value("tool_diameter_mm", k) == (
+                float(rec.tool_diameter_mm) if rec.tool_diameter_mm else None
+            )
+
+    assert seen == [(r.nctool_no, r.nctool_name) for r in expected]
+    assert pipe.stats.records == len(expected)
+    assert pipe.stats.images_total > 0
+    assert [e[0] for e in errors] == sorted(e[0] for e in errors)
+
+
+def test_pipeline_stops_when_writer_leaves_early(tmp_path):
+    html_path = job_with_images(tmp_path, SAMPLES[-1])
+    with RecordPipeline(html_path, embed_images=True, max_px=64, use_cache=False, window=1) as pipe:
+        for _rec in pipe:
+            break
+    assert pipe._thread is None and pipe._pool is None
+
+
+def test_pipeline_surfaces_parse_errors(tmp_path):
+    html_path = tmp_path / "empty.html"
+    html_path.write_text("<html><body></body></html>", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with RecordPipeline(html_path, embed_images=False, max_px=64, use_cache=False) as pipe:
+            list(pipe)
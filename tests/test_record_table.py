@@ -0,0 +1,44 @@
+"""
+RecordTable（列指向レコード）の確認。
+"""
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter.export_xlsx import write_xlsx
+from src.hypermill_nctools_html_exporter.model import RecordTable
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html
+
+
+SAMPLE = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))[0]
+
+
+def test_record_table_roundtrip():
+    records, _errors = parse_nctools_html(SAMPLE)
+    table = RecordTable.from_records(records)
+
+    assert len(table) == len(records)
+    assert table.to_records() == records
+    assert table[0].nctool_name == records[0].nctool_name
+    assert table[-1].to_record() == records[-1]
+
+    # 同じ文字列は共有される
+    paths = table.column("source_html_path")
+    assert all(p is paths[0] for p in paths)
+
+    # 行ビュー経由の書き込みは列に入る
+    table[0].tool_name = "X"
+    assert table.column("tool_name")[0] == "X"
+
+
+def test_write_xlsx_table_matches_list(tmp_path):
+    records, _errors = parse_nctools_html(SAMPLE)
+    write_xlsx(records, tmp_path / "list.xlsx", embed_images=False)
+    write_xlsx(RecordTable.from_records(records), tmp_path / "table.xlsx", embed_images=False)
+
+    def _values(p):
+        ws = load_workbook(p)["nctools"]
+        return [list(r) for r in ws.iter_rows(values_only=True)]
+
+    assert _values(tmp_path / "table.xlsx") == _values(tmp_path / "list.xlsx")
+
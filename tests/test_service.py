@@ -0,0 +1,148 @@
+"""
+ローカル HTTP 出力サービス（service）の zip / サーバー側パスでの出力・エラー応答・/metrics の確認。
+同梱の html/ サンプルを使う。
+"""
+import http.client
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+import zipfile
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from src.hypermill_nctools_html_exporter.parse_html import parse_nctools_html
+from src.hypermill_nctools_html_exporter.service import ExportService, _extract_upload, _RequestError, make_server
+from tests.conftest import job_with_images
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    with ExportService(workers=1, use_cache=False) as service:
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            yield "http://%s:%d" % server.server_address[:2]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def _post(url, data, content_type):
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=120) as res:
+            return res.status, dict(res.headers), res.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def _zip_job(tmp_path, sample):
+    # HTML と、参照画像（合成）を入れた img フォルダを zip にする
+    html_path = job_with_images(tmp_path, sample)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for p in sorted(html_path.parent.rglob("*")):
+            if p.is_file():
+                zf.write(p, p.relative_to(html_path.parent).as_posix())
+    return buf.getvalue(), len(parse_nctools_html(html_path)[0])
+
+
+def test_export_zip_upload(base_url, tmp_path):
+    data, n = _zip_job(tmp_path, SAMPLES[-1])
+    status, headers, body = _post(f"{base_url}/export?report=f2&lang=en&max_px=64", data, "application/zip")
+
+    assert status == 200, body
+    assert int(headers["X-Export-Records"]) == n
+    out = tmp_path / "out.xlsx"
+    out.write_bytes(body)
+    ws = load_workbook(out).active
+    assert ws._images and max(max(i.width, i.height) for i in ws._images) == 64
+
+
+def test_export_server_side_path(base_url, tmp_path):
+    payload = json.dumps({"path": str(SAMPLES[0])}).encode("utf-8")
+    status, headers, body = _post(f"{base_url}/export?embed=0", payload, "application/json")
+
+    assert status == 200, body
+    assert "nctools_list__" in urllib.request.unquote(headers["Content-Disposition"])
+    out = tmp_path / "out.xlsx"
+    out.write_bytes(body)
+    assert load_workbook(out).active.max_row == int(headers["X-Export-Records"]) + 1
+
+
+@pytest.mark.parametrize("query, data, content_type, expected", [
+    ("report=pdf", b"{}", "application/json", 400),
+    ("report=flat&lang=en", b"{}", "application/json", 400),
+    ("", json.dumps({"path": "/no/such.html"}).encode(), "application/json", 404),
+    ("", b"not a zip", "application/zip", 400),
+    ("", b"<html></html>", "text/html", 415),
+])
+def test_export_rejects_bad_requests(base_url, query, data, content_type, expected):
+    status, _headers, body = _post(f"{base_url}/export?{query}", data, content_type)
+    assert status == expected
+    assert "error" in json.loads(body)
+
+
+def test_export_failure_is_422(base_url, tmp_path):
+    html = tmp_path / "empty.html"
+    html.write_text("<html><body></body></html>", encoding="utf-8")
+    status, _headers, body = _post(f"{base_url}/export", json.dumps({"path": str(html)}).encode(), "application/json")
+    assert status == 422 and "RuntimeError" in json.loads(body)["error"]
+
+
+def test_zip_with_unsafe_path_is_rejected(base_url):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("../evil.html", "<html></html>")
+    status, _headers, _body = _post(f"{base_url}/export", buf.getvalue(), "application/zip")
+    assert status == 400
+
+
+def test_zip_larger_than_limit_when_extracted_is_rejected(tmp_path):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("job.html", "<html></html>")
+        zf.writestr("img/zeros.bin", b"\0" * 100_000)  # 圧縮後は小さい
+    with pytest.raises(_RequestError) as e:
+        _extract_upload(buf.getvalue(), tmp_path, None, max_bytes=50_000)
+    assert e.value.status == 413
+    with pytest.raises(_RequestError) as e:
+        _extract_upload(buf.getvalue(), tmp_path, None, max_entries=1)
+    assert e.value.status == 413
+    assert not (tmp_path / "src").exists()
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_invalid_content_length_is_400(base_url, length):
+    host, port = base_url.rsplit("/", 1)[1].split(":")
+    conn = http.client.HTTPConnection(host, int(port), timeout=10)
+    conn.putrequest("POST", "/export")
+    conn.putheader("Content-Type", "application/zip")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    assert conn.getresponse().status == 400
+    conn.close()
+
+
+def test_metrics(base_url):
+    _post(f"{base_url}/export?embed=0", json.dumps({"path": str(SAMPLES[0])}).encode(), "application/json")
+    with urllib.request.urlopen(f"{base_url}/metrics", timeout=10) as res:
+        metrics = json.loads(res.read())
+
+    assert metrics["workers"] == 1 and metrics["warmup_seconds"] is not None
+    assert metrics["exports_ok"] >= 1 and metrics["requests"]["POST /export 200"] >= 1
+    lat = metrics["export_latency_seconds"]
+    assert lat["count"] >= 1 and 0 < lat["p50"] <= lat["p95"] <= lat["max"]
+    assert metrics["exports_per_minute"] > 0 and metrics["in_flight"] == 1  # この /metrics 自身
+
+
+def test_service_listens_on_localhost_only():
+    with pytest.raises(ValueError):
+        make_server(ExportService(), host="0.0.0.0", port=0)
@@ -0,0 +1,115 @@
+"""
+フォルダ監視（watch）の待ち合わせ・内容ハッシュによるスキップ・状態ファイルの確認。
+同梱の html/ サンプルを使う。
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+from src.hypermill_nctools_html_exporter.watch import WatchFolder
+
+
+SAMPLES = sorted((Path(__file__).resolve().parents[1] / "html").glob("*/*.html"))
+
+
+def _drop(watch_dir, sample):
+    # hyperMILL の出力と同じ形（<名前>/<名前>.html と img/）
+    dst = watch_dir / sample.parent.name / sample.name
+    dst.parent.mkdir(parents=True)
+    shutil.copy(sample, dst)
+    (dst.parent / "img").mkdir()
+    (dst.parent / "img" / "a.png").write_bytes(b"not an image")
+    return dst
+
+
+def _watcher(tmp_path, **kw):
+    return WatchFolder(tmp_path / "in", tmp_path / "out", settle=1.0, embed_images=False, use_cache=False, **kw)
+
+
+def test_watch_waits_until_inputs_settle(tmp_path):
+    html = _drop(tmp_path / "in", SAMPLES[0])
+    with _watcher(tmp_path) as w:
+        w.poll(now=0.0)
+        (html.parent / "img" / "b.png").write_bytes(b"still copying")
+        w.poll(now=5.0)  # 画像が増えた -> 待ち合わせをやり直す
+        w.poll(now=5.5)
+        assert w.status()["settling"] == 1 and not w._queue and not w._running
+
+        w.poll(now=6.0)
+        assert w.wait(timeout=60)
+
+    status = json.loads((tmp_path / "out" / "watch_status.json").read_text(encoding="utf-8"))
+    assert (status["done"], status["failed"], status["settling"], status["queued"]) == (1, 0, 0, 0)
+    job = status["recent"][0]
+    assert job["ok"] and Path(job["out_xlsx"]).is_file()
+    assert job["latency_seconds"] >= 0 and job["wait_seconds"] >= 0
+
+
+def test_watch_skips_unchanged_content_after_restart(tmp_path):
+    html = _drop(tmp_path / "in", SAMPLES[0])
+    with _watcher(tmp_path) as w:
+        w.poll(now=0.0)
+        w.poll(now=1.0)
+        w.wait(timeout=60)
+        assert w.done == 1
+
+    # 再起動: 変わっていないものは待ち合わせもしない
+    with _watcher(tmp_path) as w:
+        w.poll(now=0.0)
+        assert w.status()["settling"] == 0
+
+        # 更新時刻だけ変わった -> 内容ハッシュが同じなのでスキップ
+        st = html.stat()
+        os.utime(html, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        w.poll(now=1.0)
+        w.poll(now=2.0)
+        assert (w.done, w.skipped) == (0, 1) and not w._queue
+
+        # 内容が変わった -> 出力し直す
+        html.write_bytes(html.read_bytes() + b"\n<!-- re-export -->\n")
+        w.poll(now=3.0)
+        w.poll(now=4.0)
+        w.wait(timeout=60)
+        assert (w.done, w.skipped) == (1, 1)
+
+
+def test_watch_records_failures_with_worker_pool(tmp_path):
+    good = _drop(tmp_path / "in", SAMPLES[0])
+    bad = tmp_path / "in" / "broken" / "broken.html"
+    bad.parent.mkdir()
+    bad.write_text("<html><body></body></html>", encoding="utf-8")
+
+    with _watcher(tmp_path, workers=2, report="f2") as w:
+        w.poll(now=0.0)
+        w.poll(now=1.0)
+        assert len(w._running) == 2
+        w.wait(timeout=120)
+        w.poll(now=2.0)  # 失敗したものも、変わるまでは再実行しない
+        assert (w.done, w.failed) == (1, 1) and not w._queue and not w._running
+
+    results = {Path(j["html"]).name: j for j in w.status()["recent"]}
+    assert results[good.name]["ok"] and not results[bad.name]["ok"]
+
+
+def test_watch_keeps_output_dir_when_same_name_appears(tmp_path):
+    first = _drop(tmp_path / "in", SAMPLES[0])
+    with _watcher(tmp_path) as w:
+        w.poll(now=0.0)
+        w.poll(now=1.0)
+        w.wait(timeout=60)
+        assert w._state[str(first)]["out_dir"] == str(tmp_path / "out")
+
+    # 後から同じ名前の HTML が別フォルダに増えた: 先にあった入力の出力先は動かさない
+    second = tmp_path / "in" / "again" / first.name
+    second.parent.mkdir()
+    shutil.copy(first, second)
+    with _watcher(tmp_path) as w:
+        w.poll(now=0.0)
+        first.write_bytes(first.read_bytes() + b"\n<!-- re-export -->\n")
+        w.poll(now=1.0)
+        w.poll(now=2.0)
+        w.wait(timeout=60)
+        out_dirs = {j.html: j.out_dir for j in w._recent}
+
+    assert out_dirs == {str(first): str(tmp_path / "out"), str(second): str(tmp_path / "out" / "again")}